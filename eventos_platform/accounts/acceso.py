@@ -0,0 +1,130 @@
+"""
+Caché del rol y los permisos efectivos de cada usuario.
+
+El perfil y los permisos se guardan en el framework de caché de Django y se
+aplican al objeto `user` de la petición, de modo que `user.perfil.rol` y
+`user.has_perm(...)` no consultan la base de datos mientras la caché esté
+caliente. Se invalida al cambiar el perfil, los grupos o los permisos. Las
+marcas is_active, is_superuser e is_staff se guardan junto a los permisos y se
+comparan con las del usuario de la petición (que se lee de la base en cada
+petición): si cambiaron, los permisos se recalculan aunque la invalidación no
+haya llegado a este proceso. Dentro de una transacción la invalidación se
+repite al confirmarla, como la del catálogo (eventos.cache.invalidar_catalogo).
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+
+CLAVE_VERSION = 'accounts:acceso:version'
+CAMPOS_PERFIL = ['id', 'user_id', 'rol', 'telefono', 'biografia']
+
+
+def _version():
+    return cache.get_or_set(CLAVE_VERSION, 1, None)
+
+
+def _clave(user_id):
+    return f'accounts:acceso:{_version()}:{user_id}'
+
+
+def _al_confirmar(funcion):
+    # Otra petición puede volver a cachear los datos previos mientras la
+    # transacción sigue abierta: se descartan otra vez al confirmarla
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(funcion)
+
+
+def invalidar_acceso(user_id):
+    """
+    Descarta el rol y los permisos cacheados de un usuario, ya y al confirmar la transacción
+    """
+    cache.delete(_clave(user_id))
+    _al_confirmar(lambda: cache.delete(_clave(user_id)))
+
+
+def reiniciar_acceso():
+    """
+    Descarta en el acto la caché de todos los usuarios (sin esperar a ninguna
+    transacción). Las pruebas la llaman en setUp: deshacer la transacción de
+    una prueba no deshace la caché, y el siguiente usuario creado reutiliza el ID.
+    """
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.set(CLAVE_VERSION, 2, None)
+
+
+def invalidar_acceso_global():
+    """
+    Descarta la caché de todos los usuarios (p. ej. al cambiar los permisos de un grupo)
+    """
+    reiniciar_acceso()
+    _al_confirmar(reiniciar_acceso)
+
+
+def _estado(user):
+    return [user.is_active, user.is_superuser, user.is_staff]
+
+
+def _vigentes(datos, user):
+    return datos is not None and datos.get('estado') == _estado(user)
+
+
+def cargar_acceso(user):
+    """
+    Resuelve el perfil y los permisos del usuario una sola vez y los deja
+    aplicados sobre el objeto `user`. Retorna los datos cacheados.
+    """
+    from .models import PerfilUsuario
+
+    if not user.is_authenticated:
+        return None
+
+    clave = _clave(user.pk)
+    datos = cache.get(clave)
+    if not _vigentes(datos, user):
+        perfil = PerfilUsuario.objects.filter(user_id=user.pk).values_list(*CAMPOS_PERFIL).first()
+        datos = {
+            'estado': _estado(user),
+            'perfil': perfil,
+            'permisos': sorted(ModelBackend().get_all_permissions(user)),
+        }
+        cache.set(clave, datos, getattr(settings, 'ACCESO_CACHE_TIMEOUT', 300))
+    _aplicar(user, datos)
+    return datos
+
+
+async def acargar_acceso(user):
+    """
+    Versión asíncrona de cargar_acceso (ORM y caché asíncronos)
+    """
+    from .models import PerfilUsuario
+
+    if not user.is_authenticated:
+        return None
+
+    clave = f'accounts:acceso:{await cache.aget_or_set(CLAVE_VERSION, 1, None)}:{user.pk}'
+    datos = await cache.aget(clave)
+    if not _vigentes(datos, user):
+        perfil = await PerfilUsuario.objects.filter(user_id=user.pk).values_list(*CAMPOS_PERFIL).afirst()
+        datos = {
+            'estado': _estado(user),
+            'perfil': perfil,
+            'permisos': sorted(await ModelBackend().aget_all_permissions(user)),
+        }
+        await cache.aset(clave, datos, getattr(settings, 'ACCESO_CACHE_TIMEOUT', 300))
+    _aplicar(user, datos)
+    return datos
+
+
+def _aplicar(user, datos):
+    from .models import PerfilUsuario
+
+    if datos['perfil'] is not None:
+        perfil = PerfilUsuario.from_db(None, CAMPOS_PERFIL, datos['perfil'])
+        PerfilUsuario.user.field.set_cached_value(perfil, user)
+        User.perfil.related.set_cached_value(user, perfil)
+    # ModelBackend.has_perm consulta primero este atributo
+    user._perm_cache = set(datos['permisos'])
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        # Los grupos de rol se crean (y sus permisos se sincronizan) al migrar
+        from .roles import preparar_grupos
+        post_migrate.connect(preparar_grupos, sender=self)
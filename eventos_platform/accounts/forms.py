@@ -2,6 +2,7 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
 from .models import PerfilUsuario
+from .roles import asignar_grupo
 
 
 class RegistroUsuarioForm(UserCreationForm):
@@ -45,69 +46,26 @@ class RegistroUsuarioForm(UserCreationForm):
         user.first_name = self.cleaned_data['first_name']
         user.last_name = self.cleaned_data['last_name']
         
+        rol = self.cleaned_data['rol']
+        user.is_staff = rol == 'administrador'  # Acceso al admin de Django
+        
         if commit:
             user.save()
             # Actualizar el rol del perfil
             perfil = user.perfil
-            perfil.rol = self.cleaned_data['rol']
-            perfil.save()
+            perfil.rol = rol
+            perfil.save(update_fields=['rol'])
             
             # Asignar permisos según el rol
-            self.asignar_permisos_por_rol(user, perfil.rol)
+            self.asignar_permisos_por_rol(user, rol)
         
         return user
     
     def asignar_permisos_por_rol(self, user, rol):
         """
-        Asigna permisos según el rol del usuario
+        Asigna permisos según el rol del usuario (grupo creado al migrar)
         """
-        from django.contrib.auth.models import Group, Permission
-        from django.contrib.contenttypes.models import ContentType
-        from eventos.models import Evento
-        
-        # Limpiar grupos previos
-        user.groups.clear()
-        
-        if rol == 'administrador':
-            # Crear o obtener grupo de administradores
-            admin_group, created = Group.objects.get_or_create(name='Administradores')
-            
-            # Dar todos los permisos sobre Evento
-            content_type = ContentType.objects.get_for_model(Evento)
-            permisos = Permission.objects.filter(content_type=content_type)
-            admin_group.permissions.set(permisos)
-            
-            user.groups.add(admin_group)
-            user.is_staff = True  # Acceso al admin de Django
-            user.save()
-            
-        elif rol == 'organizador':
-            # Crear o obtener grupo de organizadores
-            org_group, created = Group.objects.get_or_create(name='Organizadores')
-            
-            # Dar permisos específicos
-            content_type = ContentType.objects.get_for_model(Evento)
-            permisos = Permission.objects.filter(
-                content_type=content_type,
-                codename__in=['add_evento', 'change_evento', 'view_evento', 'puede_gestionar_eventos']
-            )
-            org_group.permissions.set(permisos)
-            
-            user.groups.add(org_group)
-            
-        else:  # asistente
-            # Crear o obtener grupo de asistentes
-            asist_group, created = Group.objects.get_or_create(name='Asistentes')
-            
-            # Solo permiso de ver
-            content_type = ContentType.objects.get_for_model(Evento)
-            permiso_ver = Permission.objects.filter(
-                content_type=content_type,
-                codename='view_evento'
-            )
-            asist_group.permissions.set(permiso_ver)
-            
-            user.groups.add(asist_group)
+        asignar_grupo(user, rol)
 
 
 class LoginForm(AuthenticationForm):
@@ -0,0 +1,39 @@
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .acceso import acargar_acceso, cargar_acceso
+
+
+class AccesoUsuarioMiddleware:
+    """
+    Carga el rol y los permisos del usuario autenticado desde la caché al
+    inicio de cada petición. Bajo ASGI funciona en modo asíncrono y deja
+    `request.user` resuelto, así las vistas asíncronas no consultan la base
+    de datos de forma síncrona al renderizar.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        user = request.user
+        cargar_acceso(user)
+        # Una vista asíncrona bajo WSGI pide request.auser(): que reciba el usuario ya cargado
+        request.auser = partial(_usuario_cargado, user)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.user = await request.auser()
+        await acargar_acceso(request.user)
+        return await self.get_response(request)
+
+
+async def _usuario_cargado(user):
+    return user
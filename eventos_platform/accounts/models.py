@@ -1,7 +1,9 @@
 from django.db import models
-from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.contrib.auth.models import User, Group
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
+from .acceso import invalidar_acceso, invalidar_acceso_global
+from .roles import invalidar_grupos
 
 
 class PerfilUsuario(models.Model):
@@ -16,9 +18,35 @@ class PerfilUsuario(models.Model):
     telefono = models.CharField(max_length=15, blank=True)
     biografia = models.TextField(blank=True)
     
+    # Campos que se comparan para decidir si hay que guardar el perfil
+    CAMPOS_EDITABLES = ['rol', 'telefono', 'biografia']
+    
     def __str__(self):
         return f"{self.user.username} - {self.get_rol_display()}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        perfil = super().from_db(db, field_names, values)
+        perfil._valores_guardados = perfil._valores_actuales()
+        return perfil
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._valores_guardados = self._valores_actuales()
+    
+    def _valores_actuales(self):
+        # Solo los campos cargados: leer uno diferido haría una consulta
+        return {campo: self.__dict__[campo] for campo in self.CAMPOS_EDITABLES if campo in self.__dict__}
+    
+    def campos_modificados(self):
+        """
+        Campos editables que cambiaron desde que el perfil se leyó o se guardó
+        """
+        guardados = getattr(self, '_valores_guardados', None)
+        if guardados is None:
+            return list(self.CAMPOS_EDITABLES)
+        return [campo for campo, valor in self._valores_actuales().items() if guardados.get(campo) != valor]
+    
     class Meta:
         verbose_name = 'Perfil de Usuario'
         verbose_name_plural = 'Perfiles de Usuarios'
@@ -31,5 +59,51 @@ def crear_perfil_usuario(sender, instance, created, **kwargs):
         PerfilUsuario.objects.create(user=instance)
 
 @receiver(post_save, sender=User)
-def guardar_perfil_usuario(sender, instance, **kwargs):
-    instance.perfil.save()
\ No newline at end of file
+def guardar_perfil_usuario(sender, instance, created, **kwargs):
+    # Solo si el perfil ya está cargado en el usuario y cambió: guardar el usuario
+    # (p. ej. al actualizar last_login en cada login) no consulta ni escribe el perfil
+    if created or not User.perfil.is_cached(instance):
+        return
+    perfil = instance.perfil
+    if perfil.pk is None:
+        perfil.save()
+        return
+    modificados = perfil.campos_modificados()
+    if modificados:
+        perfil.save(update_fields=modificados)
+
+
+# Señales para invalidar la caché de rol y permisos
+@receiver(post_save, sender=User)
+def invalidar_acceso_marcas(sender, instance, created, update_fields=None, **kwargs):
+    # is_superuser, is_staff o is_active cambian los permisos efectivos. cargar_acceso
+    # también compara esas marcas, así que esto solo evita guardar datos que no sirven
+    campos = {'is_active', 'is_superuser', 'is_staff'}
+    if not created and (update_fields is None or campos & set(update_fields)):
+        invalidar_acceso(instance.pk)
+
+@receiver(post_save, sender=PerfilUsuario)
+@receiver(post_delete, sender=PerfilUsuario)
+def invalidar_acceso_perfil(sender, instance, **kwargs):
+    invalidar_acceso(instance.user_id)
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidar_acceso_usuario(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidar_acceso(instance.pk)
+    elif pk_set or action == 'post_clear':
+        # Cambio hecho desde el grupo o el permiso: afecta a varios usuarios
+        invalidar_acceso_global()
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidar_acceso_grupo(sender, action, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidar_acceso_global()
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidar_ids_grupos(sender, **kwargs):
+    invalidar_grupos()
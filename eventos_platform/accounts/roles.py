@@ -0,0 +1,108 @@
+"""
+Grupo de permisos asociado a cada rol de PerfilUsuario.
+
+Los grupos y sus permisos se crean una vez, al migrar (post_migrate). Después
+solo se usan sus IDs, guardados en caché: asignar un rol es insertar una fila
+en la tabla de grupos del usuario.
+"""
+from django.contrib.auth.models import Group, Permission, User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import models, transaction
+
+from .acceso import invalidar_acceso, invalidar_acceso_global
+
+CLAVE_GRUPOS = 'accounts:grupos_rol'
+LOTE_CAMBIO_ROL = 5000
+
+GRUPOS_POR_ROL = {
+    'administrador': 'Administradores',
+    'organizador': 'Organizadores',
+    'asistente': 'Asistentes',
+}
+
+# Permisos sobre Evento de cada rol (None = todos)
+PERMISOS_POR_ROL = {
+    'administrador': None,
+    'organizador': ['add_evento', 'change_evento', 'view_evento', 'puede_gestionar_eventos'],
+    'asistente': ['view_evento'],
+}
+
+
+def preparar_grupo(rol):
+    """
+    Crea (si no existe) el grupo del rol y le asigna sus permisos. Retorna el grupo.
+    """
+    from eventos.models import Evento
+
+    grupo, _ = Group.objects.get_or_create(name=GRUPOS_POR_ROL[rol])
+    permisos = Permission.objects.filter(content_type=ContentType.objects.get_for_model(Evento))
+    if PERMISOS_POR_ROL[rol] is not None:
+        permisos = permisos.filter(codename__in=PERMISOS_POR_ROL[rol])
+    grupo.permissions.set(permisos)
+    return grupo
+
+
+def preparar_grupos(**kwargs):
+    """
+    Receptor de post_migrate: crea los grupos de rol y sincroniza sus permisos
+    """
+    for rol in GRUPOS_POR_ROL:
+        preparar_grupo(rol)
+    invalidar_grupos()
+
+
+def invalidar_grupos():
+    cache.delete(CLAVE_GRUPOS)
+
+
+def ids_grupos():
+    """
+    {rol: id del grupo}, en caché. Si falta algún grupo (base sin migrar) se crea.
+    """
+    ids = cache.get(CLAVE_GRUPOS)
+    if ids is None:
+        por_nombre = dict(Group.objects.filter(name__in=GRUPOS_POR_ROL.values()).values_list('name', 'pk'))
+        ids = {
+            rol: por_nombre[nombre] if nombre in por_nombre else preparar_grupo(rol).pk
+            for rol, nombre in GRUPOS_POR_ROL.items()
+        }
+        cache.set(CLAVE_GRUPOS, ids, None)
+    return ids
+
+
+def asignar_grupo(user, rol):
+    """
+    Agrega al usuario el grupo de su rol con un único INSERT (usuario recién creado)
+    """
+    User.groups.through.objects.create(user_id=user.pk, group_id=ids_grupos()[rol])
+    invalidar_acceso(user.pk)
+
+
+def cambiar_rol(usuarios, rol):
+    """
+    Cambia el rol de varios usuarios (queryset o lista de IDs) con consultas en
+    bloque: actualiza el perfil, reemplaza el grupo de rol y ajusta el acceso al
+    admin (salvo superusuarios). Retorna la cantidad de usuarios procesados.
+    """
+    from .models import PerfilUsuario
+
+    if isinstance(usuarios, models.QuerySet):
+        usuarios = usuarios.values_list('pk', flat=True)
+    # Se materializan los IDs: el queryset podría depender de los grupos que se van a cambiar
+    ids = list(usuarios)
+    grupos = ids_grupos()
+    Pertenencia = User.groups.through
+    with transaction.atomic():
+        for inicio in range(0, len(ids), LOTE_CAMBIO_ROL):
+            lote = ids[inicio:inicio + LOTE_CAMBIO_ROL]
+            PerfilUsuario.objects.filter(user_id__in=lote).update(rol=rol)
+            Pertenencia.objects.filter(user_id__in=lote, group_id__in=grupos.values()).delete()
+            Pertenencia.objects.bulk_create(
+                [Pertenencia(user_id=user_id, group_id=grupos[rol]) for user_id in lote],
+                ignore_conflicts=True,
+            )
+            User.objects.filter(pk__in=lote, is_superuser=False).update(is_staff=rol == 'administrador')
+    # update() y bulk_create no emiten señales: se descarta la caché de acceso de una vez
+    invalidar_acceso_global()
+    return len(ids)
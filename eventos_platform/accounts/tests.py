@@ -1,3 +1,150 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .acceso import _clave, cargar_acceso, reiniciar_acceso
+from .forms import RegistroUsuarioForm
+from .models import PerfilUsuario
+from .roles import cambiar_rol, ids_grupos
+
+
+class GuardarPerfilTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user('usuario', password='clave-segura-123')
+
+    def test_guardar_usuario_no_toca_el_perfil(self):
+        user = User.objects.get(username='usuario')
+        with self.assertNumQueries(1):
+            user.save()
+        self.assertEqual(user.perfil.rol, 'asistente')
+        with self.assertNumQueries(1):
+            user.save()
+
+    def test_login_no_consulta_el_perfil(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertTrue(self.client.login(username='usuario', password='clave-segura-123'))
+        self.assertFalse([c['sql'] for c in consultas.captured_queries if 'accounts_perfilusuario' in c['sql']])
+
+    def test_guarda_solo_los_campos_modificados(self):
+        user = User.objects.get(username='usuario')
+        user.perfil.telefono = '555-0100'
+        with self.assertNumQueries(2):
+            user.save()
+        self.assertEqual(PerfilUsuario.objects.get(user=user).telefono, '555-0100')
+
+
+class ProvisionarUsuariosTest(TestCase):
+    def test_crea_usuarios_perfiles_y_grupos(self):
+        User.objects.create_user('existente')
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as archivo:
+            archivo.write('username,email,first_name,last_name,rol,password\n')
+            archivo.write('ana,ana@ejemplo.com,Ana,Pérez,organizador,\n')
+            archivo.write('luis,luis@ejemplo.com,Luis,Soto,,clave-segura-123\n')
+            archivo.write('existente,otro@ejemplo.com,,,asistente,\n')
+            archivo.write('raro,raro@ejemplo.com,,,rey,\n')
+            archivo.write('ana,ana2@ejemplo.com,,,asistente,\n')
+        self.addCleanup(os.remove, archivo.name)
+
+        errores = StringIO()
+        call_command('provisionar_usuarios', archivo.name, lote=2, stdout=StringIO(), stderr=errores)
+        # Los omitidos se informan con su línea, también los repetidos entre lotes
+        self.assertEqual(errores.getvalue().splitlines(), [
+            'Línea 5: fila inválida (username vacío o rol desconocido), se omite.',
+            'Línea 4: existente ya existe, se omite.',
+            'Línea 6: ana repetido (línea 2), se omite.',
+        ])
+
+        ana = User.objects.get(username='ana')
+        self.assertEqual(ana.perfil.rol, 'organizador')
+        self.assertEqual(list(ana.groups.values_list('name', flat=True)), ['Organizadores'])
+        self.assertFalse(ana.has_usable_password())
+        luis = User.objects.get(username='luis')
+        self.assertEqual(luis.perfil.rol, 'asistente')
+        self.assertTrue(luis.check_password('clave-segura-123'))
+        self.assertFalse(User.objects.filter(username='raro').exists())
+        self.assertEqual(User.objects.count(), 3)
+
+
+class RolesTest(TestCase):
+    def test_registro_inserta_solo_la_pertenencia(self):
+        ids_grupos()
+        formulario = RegistroUsuarioForm(data={
+            'username': 'nuevo', 'email': 'nuevo@ejemplo.com', 'first_name': 'Nuevo', 'last_name': 'Usuario',
+            'rol': 'administrador', 'password1': 'clave-segura-123', 'password2': 'clave-segura-123',
+        })
+        self.assertTrue(formulario.is_valid(), formulario.errors)
+        # Usuario, perfil, rol del perfil y grupo: sin consultas de permisos ni un segundo save del usuario
+        with self.assertNumQueries(4):
+            user = formulario.save()
+        self.assertTrue(user.is_staff)
+        self.assertTrue(User.objects.get(pk=user.pk).has_perm('eventos.delete_evento'))
+
+    def test_cambiar_rol_en_bloque(self):
+        usuarios = [User.objects.create_user(f'usuario{i}') for i in range(3)]
+        cambiar_rol(User.objects.filter(username__startswith='usuario'), 'organizador')
+        self.assertEqual(
+            list(PerfilUsuario.objects.filter(user__in=usuarios).values_list('rol', flat=True).distinct()),
+            ['organizador'],
+        )
+        self.assertTrue(User.objects.get(pk=usuarios[0].pk).has_perm('eventos.puede_gestionar_eventos'))
+
+        cambiar_rol([usuarios[0].pk], 'asistente')
+        user = User.objects.get(pk=usuarios[0].pk)
+        self.assertEqual(list(user.groups.values_list('name', flat=True)), ['Asistentes'])
+        self.assertFalse(user.has_perm('eventos.puede_gestionar_eventos'))
+
+
+class CacheAccesoTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', is_superuser=True, is_staff=True)
+
+    def setUp(self):
+        reiniciar_acceso()
+
+    def acceso(self):
+        # Como en cada petición: el usuario se lee de la base y se le aplica la caché
+        user = User.objects.get(pk=self.admin.pk)
+        cargar_acceso(user)
+        return user
+
+    def test_revocar_superusuario(self):
+        self.assertTrue(self.acceso().has_perm('eventos.delete_evento'))
+        self.admin.is_superuser = False
+        self.admin.save()
+        self.assertFalse(self.acceso().has_perm('eventos.delete_evento'))
+
+    def test_marcas_distintas_a_las_cacheadas(self):
+        # Cambio hecho en otro proceso: la invalidación no llegó a esta caché
+        self.assertTrue(self.acceso().has_perm('eventos.delete_evento'))
+        User.objects.filter(pk=self.admin.pk).update(is_superuser=False)
+        self.assertFalse(self.acceso().has_perm('eventos.delete_evento'))
+
+    def test_quitar_rol(self):
+        cambiar_rol([self.admin.pk], 'organizador')
+        User.objects.filter(pk=self.admin.pk).update(is_superuser=False)
+        self.assertTrue(self.acceso().has_perm('eventos.puede_gestionar_eventos'))
+        cambiar_rol([self.admin.pk], 'asistente')
+        self.assertFalse(self.acceso().has_perm('eventos.puede_gestionar_eventos'))
 
-# Create your tests here.
+    def test_invalidar_al_confirmar(self):
+        user = User.objects.create_user('organizador')
+        cambiar_rol([user.pk], 'organizador')
+        previos = cargar_acceso(User.objects.get(pk=user.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                cambiar_rol([user.pk], 'asistente')
+                # Otra petición, que aún ve el rol previo, lo vuelve a cachear
+                cache.set(_clave(user.pk), previos)
+        user = User.objects.get(pk=user.pk)
+        cargar_acceso(user)
+        self.assertEqual(user.perfil.rol, 'asistente')
+        self.assertFalse(user.has_perm('eventos.puede_gestionar_eventos'))
@@ -2,6 +2,8 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
+from eventos.tareas import encolar_bienvenida
 from .forms import RegistroUsuarioForm, LoginForm
 
 
@@ -15,7 +17,9 @@ def registro_view(request):
     if request.method == 'POST':
         form = RegistroUsuarioForm(request.POST)
         if form.is_valid():
-            user = form.save()
+            with transaction.atomic():
+                user = form.save()
+                encolar_bienvenida(user)
             messages.success(request, f'¡Cuenta creada exitosamente! Bienvenido {user.username}.')
             login(request, user)  # Login automático después del registro
             return redirect('inicio')
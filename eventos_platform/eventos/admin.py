@@ -1,8 +1,23 @@
+import math
+
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
-from .models import Evento
+from django.db.models import F, Value, IntegerField
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.html import format_html, format_html_join
+from .models import Evento, EventoArchivado, ListaEspera, Tarea
+from .archivo import restaurar
+from .cache import invalidar_catalogo
+from .paginacion import PaginadorEstimado
+from .busqueda import buscar
+from .exportacion import (
+    COLUMNAS_CATALOGO, COLUMNAS_PARTICIPANTES, filas_catalogo, filas_participantes,
+    respuesta_exportacion,
+)
 from accounts.models import PerfilUsuario
+from accounts.roles import cambiar_rol
 
 
 class PerfilUsuarioInline(admin.StackedInline):
@@ -11,22 +26,77 @@ class PerfilUsuarioInline(admin.StackedInline):
     verbose_name_plural = 'Perfil'
 
 
+def accion_cambiar_rol(rol, nombre):
+    """
+    Acción del admin que cambia el rol de los usuarios seleccionados en bloque
+    """
+    def accion(modeladmin, request, queryset):
+        cantidad = cambiar_rol(queryset, rol)
+        modeladmin.message_user(request, f'{cantidad} usuarios pasaron a tener el rol {nombre}.')
+    accion.__name__ = f'cambiar_rol_{rol}'
+    accion.short_description = f'Cambiar rol a {nombre}'
+    return accion
+
+
 class UserAdmin(BaseUserAdmin):
     inlines = (PerfilUsuarioInline,)
+    actions = [accion_cambiar_rol(rol, nombre) for rol, nombre in PerfilUsuario.ROL_CHOICES]
     list_display = ['username', 'email', 'first_name', 'last_name', 'get_rol', 'is_staff']
+    list_select_related = ['perfil']
+    list_per_page = 50
+    paginator = PaginadorEstimado
+    show_full_result_count = False
     
     def get_rol(self, obj):
         return obj.perfil.get_rol_display()
     get_rol.short_description = 'Rol'
+    get_rol.admin_order_field = 'perfil__rol'
+
+
+class ParticipacionInline(admin.TabularInline):
+    """
+    Participantes editados sobre la tabla intermedia, de a una página por vez
+    y con selector de usuario por autocompletado
+    """
+    model = Evento.participantes.through
+    autocomplete_fields = ['user']
+    extra = 1
+    verbose_name = 'Participante'
+    verbose_name_plural = 'Participantes'
+    por_pagina = 50
+    parametro_pagina = 'participantes'
+    
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        try:
+            pagina = max(int(request.GET.get(self.parametro_pagina, 1)), 1)
+        except ValueError:
+            pagina = 1
+        inicio = (pagina - 1) * self.por_pagina
+        fin = inicio + self.por_pagina
+        
+        class FormsetPaginado(formset):
+            def get_queryset(self):
+                # Solo se cargan y validan las filas de la página actual
+                if not hasattr(self, '_pagina'):
+                    self._pagina = super().get_queryset().select_related('user')[inicio:fin]
+                return self._pagina
+        
+        return FormsetPaginado
 
 
 @admin.register(Evento)
 class EventoAdmin(admin.ModelAdmin):
     list_display = ['titulo', 'tipo', 'fecha_inicio', 'ubicacion', 'privacidad', 'creador', 'contar_participantes', 'espacios_disponibles']
+    list_select_related = ['creador']
+    paginator = PaginadorEstimado
+    show_full_result_count = False
     list_filter = ['tipo', 'privacidad', 'fecha_inicio']
     search_fields = ['titulo', 'descripcion', 'ubicacion', 'creador__username']
     date_hierarchy = 'fecha_inicio'
-    readonly_fields = ['fecha_creacion', 'fecha_actualizacion']
+    readonly_fields = ['fecha_creacion', 'fecha_actualizacion', 'paginas_participantes']
+    autocomplete_fields = ['creador']
+    inlines = [ParticipacionInline]
     
     fieldsets = (
         ('Información Básica', {
@@ -39,7 +109,7 @@ class EventoAdmin(admin.ModelAdmin):
             'fields': ('privacidad', 'capacidad', 'creador')
         }),
         ('Participantes', {
-            'fields': ('participantes',)
+            'fields': ('paginas_participantes',)
         }),
         ('Metadatos', {
             'fields': ('fecha_creacion', 'fecha_actualizacion'),
@@ -47,17 +117,124 @@ class EventoAdmin(admin.ModelAdmin):
         }),
     )
     
-    filter_horizontal = ['participantes']
+    actions = ['exportar_participantes', 'exportar_catalogo']
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Usa el mismo índice de texto completo que la búsqueda pública
+        if not search_term:
+            return queryset, False
+        return buscar(queryset, search_term, ordenar=False), False
+    
+    def get_queryset(self, request):
+        # Los espacios se calculan en SQL para poder ordenar por esa columna
+        return super().get_queryset(request).annotate(
+            espacios=Greatest(F('capacidad') - F('inscritos'), Value(0), output_field=IntegerField())
+        )
+    
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # El inline escribe directamente en la tabla intermedia: se recalcula el contador
+        Evento.objects.filter(pk=form.instance.pk).recalcular_inscritos()
+        form.instance.refresh_from_db(fields=['inscritos'])
+        form.instance.promover_lista_espera()
+        invalidar_catalogo()
+    
+    def paginas_participantes(self, obj):
+        # Enlaces a las páginas del inline de participantes
+        if obj is None or not obj.inscritos:
+            return '-'
+        paginas = range(1, math.ceil(obj.inscritos / ParticipacionInline.por_pagina) + 1)
+        return format_html(
+            '{} inscritos. Páginas: {}', obj.inscritos,
+            format_html_join(' ', '<a href="?{}={}">{}</a>',
+                             ((ParticipacionInline.parametro_pagina, n, n) for n in paginas))
+        )
+    paginas_participantes.short_description = 'Participantes'
     
     def contar_participantes(self, obj):
-        return obj.participantes.count()
+        return obj.inscritos
     contar_participantes.short_description = 'Participantes'
+    contar_participantes.admin_order_field = 'inscritos'
     
     def espacios_disponibles(self, obj):
-        return obj.espacios_disponibles()
+        return obj.espacios
     espacios_disponibles.short_description = 'Espacios'
+    espacios_disponibles.admin_order_field = 'espacios'
+    
+    def exportar_participantes(self, request, queryset):
+        # Subconsulta de ids: no se cargan los eventos seleccionados en memoria
+        return respuesta_exportacion(
+            'participantes', COLUMNAS_PARTICIPANTES, filas_participantes(queryset.values('pk'))
+        )
+    exportar_participantes.short_description = 'Exportar participantes (CSV)'
+    
+    def exportar_catalogo(self, request, queryset):
+        return respuesta_exportacion('catalogo_eventos', COLUMNAS_CATALOGO, filas_catalogo(queryset))
+    exportar_catalogo.short_description = 'Exportar eventos seleccionados (CSV)'
 
 
+
+@admin.register(ListaEspera)
+class ListaEsperaAdmin(admin.ModelAdmin):
+    list_display = ['evento', 'user', 'fecha_ingreso']
+    list_select_related = ['evento', 'user']
+    autocomplete_fields = ['evento', 'user']
+    search_fields = ['user__username', 'evento__titulo']
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+
+
+@admin.register(EventoArchivado)
+class EventoArchivadoAdmin(admin.ModelAdmin):
+    """
+    Archivo de solo lectura; la única modificación es devolver eventos al catálogo
+    """
+    list_display = ['titulo', 'tipo', 'fecha_inicio', 'ubicacion', 'privacidad', 'creador', 'inscritos', 'fecha_archivado']
+    list_select_related = ['creador']
+    list_filter = ['tipo', 'privacidad']
+    search_fields = ['titulo', 'creador__username']
+    date_hierarchy = 'fecha_inicio'
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    actions = ['restaurar_eventos']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def restaurar_eventos(self, request, queryset):
+        cantidad = restaurar(queryset)
+        self.message_user(request, f'{cantidad} eventos volvieron al catálogo.')
+    restaurar_eventos.short_description = 'Restaurar eventos seleccionados'
+    restaurar_eventos.allowed_permissions = ('delete',)
+
+
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    """
+    Seguimiento de la cola de tareas; las fallidas se pueden volver a encolar
+    """
+    list_display = ['id', 'tipo', 'estado', 'intentos', 'ejecutar_despues', 'trabajador', 'fecha_creacion']
+    list_filter = ['estado', 'tipo']
+    readonly_fields = [campo.name for campo in Tarea._meta.fields]
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    actions = ['reintentar_tareas']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def reintentar_tareas(self, request, queryset):
+        cantidad = queryset.exclude(estado='en_curso').update(
+            estado='pendiente', intentos=0, ejecutar_despues=timezone.now(),
+            bloqueada_hasta=None, fecha_finalizacion=None,
+        )
+        self.message_user(request, f'{cantidad} tareas volvieron a la cola.')
+    reintentar_tareas.short_description = 'Reintentar tareas seleccionadas'
+    reintentar_tareas.allowed_permissions = ('change',)
+
 # Re-registrar UserAdmin
 admin.site.unregister(User)
 admin.site.register(User, UserAdmin)
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+API JSON de solo lectura para el catálogo de eventos.
+
+Las filas se serializan directamente desde proyecciones `.values()` (sin
+instanciar modelos), con campos a elección (`?fields=titulo,fecha_inicio`),
+paginación por cursor y ETag. Aplica las mismas reglas de visibilidad que
+ListaEventosView.
+"""
+from functools import wraps
+
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+
+from .cache import etag_para, version_catalogo
+from .models import Evento
+from .paginacion import PaginadorCursor
+from .views import _estado_visitante, marcar_respuesta, respuesta_no_modificada
+
+# Nombre público del campo -> expresión de .values()
+CAMPOS = {
+    'id': 'id',
+    'titulo': 'titulo',
+    'descripcion': 'descripcion',
+    'tipo': 'tipo',
+    'fecha_inicio': 'fecha_inicio',
+    'fecha_fin': 'fecha_fin',
+    'ubicacion': 'ubicacion',
+    'privacidad': 'privacidad',
+    'capacidad': 'capacidad',
+    'inscritos': 'inscritos',
+    'creador': 'creador__username',
+    'fecha_actualizacion': 'fecha_actualizacion',
+}
+CAMPOS_LISTA = ['id', 'titulo', 'tipo', 'fecha_inicio', 'ubicacion', 'privacidad', 'capacidad', 'inscritos']
+LIMITE_POR_DEFECTO = 20
+LIMITE_MAXIMO = 100
+
+
+class ErrorAPI(Exception):
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.status = status
+
+
+def vista_api(requiere_sesion=False):
+    """
+    Decorador de las vistas de la API: convierte ErrorAPI en una respuesta
+    JSON y, si se indica, exige usuario autenticado (401 en lugar de redirigir)
+    """
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(request, *args, **kwargs):
+            try:
+                if requiere_sesion and not request.user.is_authenticated:
+                    raise ErrorAPI('Autenticación requerida.', status=401)
+                return funcion(request, *args, **kwargs)
+            except ErrorAPI as error:
+                return JsonResponse({'error': str(error)}, status=error.status)
+        return envoltura
+    return decorador
+
+
+def _campos(request, por_defecto):
+    pedidos = request.GET.get('fields')
+    if not pedidos:
+        return por_defecto
+    campos = [campo.strip() for campo in pedidos.split(',') if campo.strip()]
+    desconocidos = [campo for campo in campos if campo not in CAMPOS]
+    if desconocidos:
+        raise ErrorAPI(f"Campos desconocidos: {', '.join(desconocidos)}.")
+    return campos
+
+
+def _limite(request):
+    try:
+        limite = int(request.GET.get('limite', LIMITE_POR_DEFECTO))
+    except ValueError:
+        raise ErrorAPI('El parámetro limite debe ser un número.')
+    return min(max(limite, 1), LIMITE_MAXIMO)
+
+
+def _proyectar(queryset, campos, extra=()):
+    """
+    .values() con los campos pedidos más los que hagan falta internamente (cursor, ETag)
+    """
+    return queryset.values(*{CAMPOS[campo] for campo in [*campos, *extra]})
+
+
+def _serializar(fila, campos):
+    return {campo: fila[CAMPOS[campo]] for campo in campos}
+
+
+def _pagina(request, queryset, campos):
+    paginador = PaginadorCursor(queryset, _limite(request), contar_total=False)
+    try:
+        pagina = paginador.page(request.GET.get('cursor'))
+    except Http404:
+        raise ErrorAPI('Cursor de paginación inválido.')
+
+    def enlace(cursor):
+        if cursor is None:
+            return None
+        parametros = request.GET.copy()
+        parametros['cursor'] = cursor
+        return f'{request.path}?{parametros.urlencode()}'
+
+    return {
+        'resultados': [_serializar(fila, campos) for fila in pagina],
+        'siguiente': enlace(pagina.cursor_siguiente),
+        'anterior': enlace(pagina.cursor_anterior),
+    }
+
+
+def _lista(request, queryset, nombre):
+    campos = _campos(request, CAMPOS_LISTA)
+    # El ETag depende del catálogo, del usuario y de los parámetros (campos, cursor, límite)
+    etag = etag_para(nombre, version_catalogo(), request.GET.urlencode(), *_estado_visitante(request.user))
+    respuesta = respuesta_no_modificada(request, etag, None)
+    if respuesta is not None:
+        return respuesta
+    datos = _pagina(request, _proyectar(queryset, campos, extra=['id', 'fecha_inicio']), campos)
+    return marcar_respuesta(JsonResponse(datos), etag)
+
+
+@vista_api()
+def eventos(request):
+    """
+    GET /api/eventos/ - eventos visibles para el usuario
+    """
+    return _lista(request, Evento.objects.visibles_para(request.user), 'api-eventos')
+
+
+@vista_api(requiere_sesion=True)
+def mis_eventos(request):
+    """
+    GET /api/mis-eventos/ - eventos donde el usuario está inscrito
+    """
+    return _lista(request, request.user.eventos_inscritos.all(), 'api-mis-eventos')
+
+
+@vista_api()
+def evento(request, pk):
+    """
+    GET /api/eventos/<pk>/ - detalle de un evento visible para el usuario
+    """
+    campos = _campos(request, list(CAMPOS))
+    fila = (_proyectar(Evento.objects.visibles_para(request.user).filter(pk=pk), campos,
+                       extra=['fecha_actualizacion', 'inscritos'])
+            .first())
+    if fila is None:
+        raise ErrorAPI('Evento no encontrado.', status=404)
+
+    etag = etag_para('api-evento', pk, fila['fecha_actualizacion'].timestamp(), fila['inscritos'],
+                     request.GET.urlencode(), *_estado_visitante(request.user))
+    respuesta = respuesta_no_modificada(request, etag, fila['fecha_actualizacion'])
+    if respuesta is not None:
+        return respuesta
+    datos = _serializar(fila, campos)
+    datos['url'] = reverse('detalle_evento', kwargs={'pk': pk})
+    return marcar_respuesta(JsonResponse(datos), etag, fila['fecha_actualizacion'])
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class EventosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'eventos'
+
+    def ready(self):
+        # Registra las señales que mantienen el índice de búsqueda, configuran SQLite
+        # e instrumentan las conexiones para las métricas, y los manejadores de tareas
+        from . import basedatos, busqueda, metricas, tareas  # noqa: F401
@@ -0,0 +1,129 @@
+"""
+Archivo de eventos terminados.
+
+Los eventos cuya fecha de fin es anterior a ARCHIVO_ANTIGUEDAD_DIAS se mueven,
+con sus inscripciones, a EventoArchivado y ParticipacionArchivada. Así la tabla
+de eventos, la tabla intermedia y el índice de búsqueda solo crecen con el
+catálogo vigente. Cada lote es una transacción: se copia con INSERT ... SELECT
+y se borra del origen sin cargar los eventos en memoria ni emitir señales por
+fila; la caché del catálogo se invalida una vez por lote.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from .busqueda import TABLA as TABLA_BUSQUEDA, fts_disponible
+from .cache import invalidar_catalogo
+from .models import Evento, EventoArchivado, ListaEspera, ParticipacionArchivada
+
+LOTE_ARCHIVO = 1000
+
+Participacion = Evento.participantes.through
+
+
+def _tabla(modelo):
+    return connection.ops.quote_name(modelo._meta.db_table)
+
+
+def _columnas():
+    # Columnas de Evento, que EventoArchivado repite con los mismos nombres
+    return ', '.join(connection.ops.quote_name(campo.column) for campo in Evento._meta.concrete_fields)
+
+
+def _marcadores(ids):
+    return ', '.join(['%s'] * len(ids))
+
+
+def fecha_limite(dias=None, ahora=None):
+    dias = settings.ARCHIVO_ANTIGUEDAD_DIAS if dias is None else dias
+    return (ahora or timezone.now()) - timedelta(days=dias)
+
+
+def archivables(limite):
+    # fecha_fin < limite implica fecha_inicio < limite: el filtro extra recorre el índice de fecha
+    return (Evento.objects.filter(fecha_inicio__lt=limite, fecha_fin__lt=limite)
+            .order_by('fecha_inicio', 'id'))
+
+
+def archivar(dias=None, lote=LOTE_ARCHIVO, ahora=None):
+    """
+    Mueve al archivo los eventos terminados hace más de `dias` días, por lotes.
+    Retorna la cantidad de eventos archivados.
+    """
+    limite = fecha_limite(dias, ahora)
+    total = 0
+    while True:
+        with transaction.atomic():
+            ids = list(archivables(limite).values_list('pk', flat=True)[:lote])
+            if not ids:
+                break
+            _archivar_lote(ids)
+            invalidar_catalogo()
+        total += len(ids)
+    return total
+
+
+def _archivar_lote(ids):
+    marcadores = _marcadores(ids)
+    columnas = _columnas()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {_tabla(EventoArchivado)} ({columnas}, fecha_archivado) '
+            f'SELECT {columnas}, %s FROM {_tabla(Evento)} WHERE id IN ({marcadores})',
+            [connection.ops.adapt_datetimefield_value(timezone.now()), *ids]
+        )
+        cursor.execute(
+            f'INSERT INTO {_tabla(ParticipacionArchivada)} (evento_id, user_id) '
+            f'SELECT evento_id, user_id FROM {_tabla(Participacion)} WHERE evento_id IN ({marcadores})',
+            ids
+        )
+        # La lista de espera de un evento terminado ya no sirve: no se archiva
+        for modelo in (ListaEspera, Participacion):
+            cursor.execute(f'DELETE FROM {_tabla(modelo)} WHERE evento_id IN ({marcadores})', ids)
+        if fts_disponible():
+            cursor.execute(f'DELETE FROM {TABLA_BUSQUEDA} WHERE rowid IN ({marcadores})', ids)
+        cursor.execute(f'DELETE FROM {_tabla(Evento)} WHERE id IN ({marcadores})', ids)
+
+
+def restaurar(archivados, lote=LOTE_ARCHIVO):
+    """
+    Devuelve a la tabla de eventos los eventos archivados indicados (queryset
+    de EventoArchivado o lista de IDs), con su id, sus fechas y sus inscripciones.
+    Retorna la cantidad de eventos restaurados.
+    """
+    if isinstance(archivados, models.QuerySet):
+        archivados = archivados.values_list('pk', flat=True)
+    ids = sorted(archivados)
+    for inicio in range(0, len(ids), lote):
+        with transaction.atomic():
+            _restaurar_lote(ids[inicio:inicio + lote])
+            invalidar_catalogo()
+    return len(ids)
+
+
+def _restaurar_lote(ids):
+    marcadores = _marcadores(ids)
+    columnas = _columnas()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {_tabla(Evento)} ({columnas}) '
+            f'SELECT {columnas} FROM {_tabla(EventoArchivado)} WHERE id IN ({marcadores})',
+            ids
+        )
+        cursor.execute(
+            f'INSERT INTO {_tabla(Participacion)} (evento_id, user_id) '
+            f'SELECT evento_id, user_id FROM {_tabla(ParticipacionArchivada)} WHERE evento_id IN ({marcadores})',
+            ids
+        )
+        if fts_disponible():
+            cursor.execute(
+                f'INSERT INTO {TABLA_BUSQUEDA}(rowid, titulo, descripcion, ubicacion, creador) '
+                'SELECT e.id, e.titulo, e.descripcion, e.ubicacion, u.username '
+                f'FROM {_tabla(Evento)} e INNER JOIN auth_user u ON u.id = e.creador_id '
+                f'WHERE e.id IN ({marcadores})',
+                ids
+            )
+        cursor.execute(f'DELETE FROM {_tabla(ParticipacionArchivada)} WHERE evento_id IN ({marcadores})', ids)
+        cursor.execute(f'DELETE FROM {_tabla(EventoArchivado)} WHERE id IN ({marcadores})', ids)
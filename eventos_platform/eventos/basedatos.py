@@ -0,0 +1,21 @@
+"""
+Ajustes de SQLite para servir con varios procesos a la vez.
+
+Cada conexión nueva recibe los PRAGMA de settings.SQLITE_PRAGMAS: con WAL las
+lecturas no bloquean a la escritura (ni al revés), busy_timeout hace que una
+escritura espere el bloqueo en lugar de fallar con "database is locked", y
+synchronous=NORMAL, cache_size y mmap_size reducen la E/S. El BEGIN IMMEDIATE
+de las transacciones se configura en DATABASES (transaction_mode).
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def configurar_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for nombre, valor in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {nombre} = {valor}')
@@ -0,0 +1,269 @@
+"""
+Utilidades para los comandos de benchmark: generación de datos sintéticos,
+medición de tiempos y planes de consulta.
+"""
+import random
+import re
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import PerfilUsuario
+from accounts.roles import cambiar_rol, ids_grupos
+from .icalendario import token_para
+from .models import Evento
+
+# Rutas de eventos/urls.py y accounts/urls.py que recorre EscenarioRutas:
+# (nombre de la URL, actor, argumentos, query string, consultas máximas).
+# Los argumentos nombran valores del escenario (eventos de referencia, mes actual).
+# El presupuesto de consultas no depende del volumen de datos: si una vista lo
+# supera, hay una consulta por fila (N+1) o una consulta nueva que revisar.
+# Las escrituras van de a pares para que cada pasada deje el estado como estaba.
+RUTAS = [
+    ('inicio', 'anonimo', {}, '', 1),
+    ('inicio', 'asistente', {}, '', 5),
+    ('lista_eventos', 'anonimo', {}, '', 2),
+    ('lista_eventos', 'asistente', {}, '', 4),
+    ('lista_eventos', 'organizador', {}, '?cuando=todos', 4),
+    ('buscar_eventos', 'anonimo', {}, '?q=evento', 1),
+    ('calendario', 'asistente', {}, '', 3),
+    ('calendario_mes', 'anonimo', {'anio': 'anio', 'mes': 'mes'}, '', 1),
+    ('calendario_ics', 'anonimo', {}, '', 1),
+    ('calendario_mis_eventos', 'anonimo', {'token': 'token'}, '', 1),
+    ('detalle_evento', 'anonimo', {'pk': 'abierto'}, '', 1),
+    ('detalle_evento', 'asistente', {'pk': 'lleno'}, '', 5),
+    ('participantes_evento', 'asistente', {'pk': 'lleno'}, '', 4),
+    ('exportar_participantes', 'organizador', {'pk': 'lleno'}, '?formato=csv', 4),
+    ('exportar_catalogo', 'administrador', {}, '?formato=csv', 3),
+    ('crear_evento', 'organizador', {}, '', 2),
+    ('editar_evento', 'organizador', {'pk': 'lleno'}, '', 4),
+    ('eliminar_evento', 'administrador', {'pk': 'abierto'}, '', 3),
+    ('inscribirse_evento', 'asistente', {'evento_id': 'abierto'}, '', 11),
+    ('cancelar_inscripcion', 'asistente', {'evento_id': 'abierto'}, '', 9),
+    ('unirse_lista_espera', 'asistente', {'evento_id': 'lleno'}, '', 13),
+    ('salir_lista_espera', 'asistente', {'evento_id': 'lleno'}, '', 4),
+    ('mis_eventos', 'asistente', {}, '', 3),
+    ('mis_eventos_historial', 'asistente', {}, '', 3),
+    ('historial', 'anonimo', {}, '', 1),
+    ('estadisticas_cache', 'administrador', {}, '', 2),
+    ('metricas', 'administrador', {}, '', 2),
+    ('api_eventos', 'anonimo', {}, '', 1),
+    ('api_evento', 'anonimo', {'pk': 'abierto'}, '', 1),
+    ('api_mis_eventos', 'asistente', {}, '', 3),
+    ('acceso_denegado', 'asistente', {}, '', 2),
+    ('registro', 'anonimo', {}, '', 0),
+    ('login', 'anonimo', {}, '', 0),
+    ('perfil', 'asistente', {}, '', 5),
+    ('logout', 'sesion', {}, '', 4),
+]
+
+
+def generar_datos(n_usuarios, n_eventos, n_inscripciones, lote=10000, semilla=0):
+    """
+    Crea usuarios, eventos e inscripciones con bulk_create por lotes.
+    La popularidad de los eventos sigue una distribución sesgada (pocos eventos
+    concentran la mayoría de inscripciones). Retorna (ids_usuarios, ids_eventos).
+    """
+    rnd = random.Random(semilla)
+    ahora = timezone.now()
+    prefijo = f'bench{int(time.time())}_'
+
+    for inicio in range(0, n_usuarios, lote):
+        User.objects.bulk_create([
+            User(username=f'{prefijo}{i}', password='!')
+            for i in range(inicio, min(inicio + lote, n_usuarios))
+        ], batch_size=lote)
+    ids_usuarios = list(
+        User.objects.filter(username__startswith=prefijo).values_list('pk', flat=True)
+    )
+    # Uno de cada 50 usuarios organiza eventos; el resto son asistentes
+    creadores = ids_usuarios[:max(1, len(ids_usuarios) // 50)]
+    grupos = ids_grupos()
+    Pertenencia = User.groups.through
+    # bulk_create no emite post_save: los perfiles y grupos de rol se crean aparte
+    for inicio in range(0, len(ids_usuarios), lote):
+        roles = [
+            (user_id, 'organizador' if inicio + i < len(creadores) else 'asistente')
+            for i, user_id in enumerate(ids_usuarios[inicio:inicio + lote])
+        ]
+        PerfilUsuario.objects.bulk_create(
+            [PerfilUsuario(user_id=user_id, rol=rol) for user_id, rol in roles], batch_size=lote
+        )
+        Pertenencia.objects.bulk_create(
+            [Pertenencia(user_id=user_id, group_id=grupos[rol]) for user_id, rol in roles], batch_size=lote
+        )
+
+    tipos = [t for t, _ in Evento.TIPO_CHOICES]
+    for inicio in range(0, n_eventos, lote):
+        eventos = []
+        for i in range(inicio, min(inicio + lote, n_eventos)):
+            fecha = ahora + timedelta(hours=rnd.randint(-24 * 365 * 3, 24 * 365))
+            eventos.append(Evento(
+                titulo=f'Evento {i}',
+                descripcion='Evento generado para benchmark',
+                tipo=rnd.choice(tipos),
+                fecha_inicio=fecha,
+                fecha_fin=fecha + timedelta(hours=rnd.randint(1, 8)),
+                ubicacion=f'Sala {rnd.randint(1, 500)}',
+                privacidad='privado' if rnd.random() < 0.3 else 'publico',
+                capacidad=rnd.randint(20, 5000),
+                creador_id=rnd.choice(creadores),
+            ))
+        Evento.objects.bulk_create(eventos, batch_size=lote)
+    ids_eventos = list(
+        Evento.objects.filter(creador_id__in=creadores).values_list('pk', flat=True)
+    )
+
+    # Pesos tipo Zipf: el evento k recibe inscripciones proporcionales a 1/k
+    pesos = list(_acumulados(1 / (k + 1) for k in range(len(ids_eventos))))
+    Participacion = Evento.participantes.through
+    for inicio in range(0, n_inscripciones, lote):
+        cantidad = min(lote, n_inscripciones - inicio)
+        elegidos = rnd.choices(ids_eventos, cum_weights=pesos, k=cantidad)
+        Participacion.objects.bulk_create([
+            Participacion(evento_id=evento_id, user_id=rnd.choice(ids_usuarios))
+            for evento_id in elegidos
+        ], batch_size=lote, ignore_conflicts=True)
+
+    # Por creador y no por pk__in: con millones de eventos se supera el límite de parámetros de SQLite
+    Evento.objects.filter(creador_id__in=creadores).recalcular_inscritos()
+    return ids_usuarios, ids_eventos
+
+
+def _acumulados(valores):
+    total = 0
+    for valor in valores:
+        total += valor
+        yield total
+
+
+def medir(funcion, repeticiones=20):
+    """
+    Ejecuta la función varias veces y retorna un dict con percentiles en milisegundos
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return percentiles(tiempos)
+
+
+def percentiles(tiempos):
+    """
+    p50, p95, p99 y máximo de una lista de tiempos en milisegundos
+    """
+    tiempos = sorted(tiempos)
+    return {
+        'media': statistics.fmean(tiempos),
+        'p50': statistics.median(tiempos),
+        'p95': tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))],
+        'p99': tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.99))],
+        'max': tiempos[-1],
+    }
+
+
+def formatear(nombre, resultado):
+    return (f"{nombre:<45} p50={resultado['p50']:8.2f}ms  p95={resultado['p95']:8.2f}ms  "
+            f"p99={resultado['p99']:8.2f}ms")
+
+
+def escanea_tabla(plan, tablas, incluir_indices=False):
+    """
+    Indica si un plan de EXPLAIN (SQLite) recorre completa alguna de las tablas
+    (o alias) indicadas. Por defecto solo cuenta los recorridos sin índice; con
+    incluir_indices también los que recorren un índice entero.
+    """
+    if isinstance(tablas, str):
+        tablas = [tablas]
+    for linea in plan.splitlines():
+        encontrado = re.search(r'\bSCAN (\w+)(.*)', linea)
+        if not encontrado or encontrado.group(1) not in tablas:
+            continue
+        if incluir_indices or 'USING' not in encontrado.group(2):
+            return True
+    return False
+
+
+class EscenarioRutas:
+    """
+    Usuarios de cada rol con su sesión y eventos de referencia para recorrer
+    RUTAS con el cliente de pruebas. El asistente queda inscrito en los
+    `inscripciones` eventos públicos más populares, como un usuario activo.
+    """
+    actores = {
+        'asistente': 'asistente',
+        'organizador': 'organizador',
+        'administrador': 'administrador',
+        'sesion': 'asistente',
+    }
+
+    def __init__(self, inscripciones=20):
+        prefijo = f'ruta{int(time.time())}_'
+        usuarios = {}
+        for actor, rol in self.actores.items():
+            usuarios[actor] = User.objects.create_user(f'{prefijo}{actor}')
+            if rol != 'asistente':
+                cambiar_rol([usuarios[actor].pk], rol)
+
+        ahora = timezone.now()
+        datos = {
+            'descripcion': 'Evento de referencia del benchmark', 'tipo': 'conferencia',
+            'privacidad': 'publico', 'ubicacion': 'Auditorio', 'creador': usuarios['organizador'],
+        }
+        abierto = Evento.objects.create(
+            titulo='Evento abierto', capacidad=100, fecha_inicio=ahora + timedelta(days=3),
+            fecha_fin=ahora + timedelta(days=3, hours=2), **datos,
+        )
+        lleno = Evento.objects.create(
+            titulo='Evento lleno', capacidad=1, fecha_inicio=ahora + timedelta(days=5),
+            fecha_fin=ahora + timedelta(days=5, hours=2), **datos,
+        )
+        lleno.inscribir(usuarios['organizador'])
+        populares = (Evento.objects.filter(privacidad='publico').exclude(pk__in=[abierto.pk, lleno.pk])
+                     .order_by('-inscritos').values_list('pk', flat=True)[:inscripciones])
+        for evento in Evento.objects.filter(pk__in=list(populares)):
+            evento.inscribir(usuarios['asistente'])
+
+        self.usuarios = usuarios
+        self.valores = {
+            'abierto': abierto.pk, 'lleno': lleno.pk, 'anio': ahora.year, 'mes': ahora.month,
+            'token': token_para(usuarios['asistente']),
+        }
+        self.clientes = {'anonimo': Client()}
+        for actor in usuarios:
+            self.iniciar_sesion(actor)
+
+    def iniciar_sesion(self, actor):
+        self.clientes[actor] = Client()
+        self.clientes[actor].force_login(self.usuarios[actor])
+
+    def url(self, ruta):
+        nombre, _, argumentos, query, _ = ruta
+        return reverse(nombre, kwargs={clave: self.valores[valor] for clave, valor in argumentos.items()}) + query
+
+    def pedir(self, ruta):
+        """
+        Hace la petición de la ruta y consume la respuesta (las descargas son streaming)
+        """
+        respuesta = self.clientes[ruta[1]].get(self.url(ruta))
+        if respuesta.streaming:
+            b''.join(respuesta.streaming_content)
+        return respuesta
+
+    def reponer(self, ruta):
+        """
+        Deja al actor listo para la próxima pasada (logout cierra su sesión)
+        """
+        if ruta[0] == 'logout':
+            self.iniciar_sesion(ruta[1])
+
+    def pasada(self):
+        for ruta in RUTAS:
+            self.pedir(ruta)
+            self.reponer(ruta)
@@ -0,0 +1,123 @@
+"""
+Búsqueda de texto completo sobre eventos con SQLite FTS5.
+
+El índice vive en la tabla virtual `eventos_evento_fts` (modelo EventoBusqueda)
+y se actualiza con señales al guardar o eliminar eventos, y al renombrar a su
+creador (la columna `creador` guarda el nombre de usuario). Los resultados se
+ordenan por relevancia BM25 (el título pesa más que la descripción) y cada
+término se busca como prefijo. En otros motores se usa `icontains`.
+"""
+import re
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import Evento, EventoBusqueda
+
+TABLA = EventoBusqueda._meta.db_table
+# Pesos BM25 por columna: titulo, descripcion, ubicacion, creador
+PESOS = '10.0, 1.0, 3.0, 2.0'
+
+
+def fts_disponible():
+    return connection.vendor == 'sqlite'
+
+
+def construir_consulta(texto):
+    """
+    Convierte el texto del usuario en una consulta FTS5 segura: cada palabra
+    entre comillas y con * para buscar por prefijo. Retorna None si no hay palabras.
+    """
+    palabras = re.findall(r'\w+', texto or '')
+    if not palabras:
+        return None
+    return ' '.join(f'"{palabra}"*' for palabra in palabras)
+
+
+def buscar(queryset, texto, ordenar=True):
+    """
+    Filtra el queryset de eventos por texto y, si `ordenar`, lo ordena por relevancia
+    """
+    consulta = construir_consulta(texto)
+    if consulta is None:
+        return queryset
+
+    if not fts_disponible():
+        filtro = Q()
+        for palabra in re.findall(r'\w+', texto):
+            filtro &= (Q(titulo__icontains=palabra) | Q(descripcion__icontains=palabra) |
+                       Q(ubicacion__icontains=palabra) | Q(creador__username__icontains=palabra))
+        return queryset.filter(filtro)
+
+    queryset = queryset.filter(busqueda__documento__match=consulta)
+    if ordenar:
+        queryset = queryset.order_by('busqueda__rank', '-fecha_inicio')
+    return queryset
+
+
+def reconstruir_indice():
+    """
+    Vuelve a generar el índice completo a partir de la tabla de eventos
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLA}')
+        cursor.execute(
+            f'INSERT INTO {TABLA}(rowid, titulo, descripcion, ubicacion, creador) '
+            'SELECT e.id, e.titulo, e.descripcion, e.ubicacion, u.username '
+            'FROM eventos_evento e INNER JOIN auth_user u ON u.id = e.creador_id'
+        )
+        cursor.execute(f"INSERT INTO {TABLA}({TABLA}, rank) VALUES ('rank', 'bm25({PESOS})')")
+        cursor.execute(f"INSERT INTO {TABLA}({TABLA}) VALUES ('optimize')")
+        cursor.execute(f'SELECT count(*) FROM {TABLA}')
+        return cursor.fetchone()[0]
+
+
+def indexar_evento(evento):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLA} WHERE rowid = %s', [evento.pk])
+        cursor.execute(
+            f'INSERT INTO {TABLA}(rowid, titulo, descripcion, ubicacion, creador) '
+            'SELECT %s, %s, %s, %s, username FROM auth_user WHERE id = %s',
+            [evento.pk, evento.titulo, evento.descripcion, evento.ubicacion, evento.creador_id]
+        )
+
+
+@receiver(post_save, sender=Evento)
+def actualizar_indice_evento(sender, instance, raw=False, **kwargs):
+    if fts_disponible() and not raw:
+        indexar_evento(instance)
+
+
+@receiver(post_delete, sender=Evento)
+def eliminar_indice_evento(sender, instance, **kwargs):
+    if fts_disponible():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLA} WHERE rowid = %s', [instance.pk])
+
+
+@receiver(post_init, sender=User)
+def recordar_nombre_indexado(sender, instance, **kwargs):
+    # Sin leer el campo si se difirió: eso haría una consulta por usuario
+    instance._nombre_indexado = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=User)
+def actualizar_indice_creador(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Solo si cambió el nombre: guardar el usuario sin renombrarlo (p. ej.
+    # last_login en cada login, o el formulario de perfil) no toca el índice
+    nombre = instance.username
+    if created or raw or not fts_disponible() or nombre == instance._nombre_indexado:
+        instance._nombre_indexado = nombre
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {TABLA} SET creador = %s '
+            'WHERE rowid IN (SELECT id FROM eventos_evento WHERE creador_id = %s) AND creador != %s',
+            [nombre, instance.pk, nombre]
+        )
+    instance._nombre_indexado = nombre
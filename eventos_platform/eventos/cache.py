@@ -0,0 +1,119 @@
+"""
+Caché de fragmentos renderizados (tarjetas de evento y página de inicio anónima).
+
+Las claves de las tarjetas incluyen `fecha_actualizacion` y el contador de
+inscritos, así que cualquier edición o inscripción produce una clave nueva.
+La página de inicio depende de todo el catálogo y se versiona con una marca
+global que cambia al guardar, eliminar o cambiar inscripciones. La marca vive
+en la caché 'versiones', compartida entre procesos (ver CACHES), y cada
+invalidación genera un valor nuevo al azar: aunque dos procesos la cambien a la
+vez, ninguna versión vuelve a representar un estado distinto del catálogo.
+Una segunda marca, la de fechas, cambia solo al guardar o eliminar eventos (no
+con las inscripciones) y versiona duracion_maxima(). Cada usuario tiene además
+la suya, que cambia con sus propias inscripciones y versiona su feed iCalendar;
+esas se guardan en la caché 'usuarios', no en 'versiones': descartarlas al
+llenarse solo obliga a regenerar un feed, y no desplazan a las globales.
+"""
+import hashlib
+import threading
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+CLAVE_VERSION_CATALOGO = 'eventos:catalogo:version'
+CLAVE_VERSION_FECHAS = 'eventos:fechas:version'
+CLAVE_VERSION_USUARIO = 'eventos:usuario:{}:version'
+
+_contadores = Counter()
+_bloqueo = threading.Lock()
+
+
+def timeout():
+    return getattr(settings, 'FRAGMENTOS_CACHE_TIMEOUT', 600)
+
+
+def registrar(nombre, acierto):
+    with _bloqueo:
+        _contadores[f'{nombre}.{"aciertos" if acierto else "fallos"}'] += 1
+
+
+def estadisticas():
+    """
+    Aciertos y fallos de la caché de fragmentos en este proceso
+    """
+    with _bloqueo:
+        return dict(_contadores)
+
+
+def _nueva_version():
+    return uuid.uuid4().hex
+
+
+def version_catalogo():
+    return caches['versiones'].get_or_set(CLAVE_VERSION_CATALOGO, _nueva_version, None)
+
+
+async def aversion_catalogo():
+    return await caches['versiones'].aget_or_set(CLAVE_VERSION_CATALOGO, _nueva_version, None)
+
+
+def version_fechas():
+    return caches['versiones'].get_or_set(CLAVE_VERSION_FECHAS, _nueva_version, None)
+
+
+async def aversion_fechas():
+    return await caches['versiones'].aget_or_set(CLAVE_VERSION_FECHAS, _nueva_version, None)
+
+
+def version_usuario(user_id):
+    return caches['usuarios'].get_or_set(CLAVE_VERSION_USUARIO.format(user_id), _nueva_version, None)
+
+
+def _cambiar_version(claves, usuarios):
+    caches['versiones'].set_many({clave: _nueva_version() for clave in claves}, None)
+    if usuarios:
+        caches['usuarios'].set_many(
+            {CLAVE_VERSION_USUARIO.format(pk): _nueva_version() for pk in usuarios}, None
+        )
+
+
+def invalidar_catalogo(fechas=True, usuarios=()):
+    """
+    Cambia la versión del catálogo ya y, dentro de una transacción, otra vez al
+    confirmarla: lo que otra petición cachee mientras tanto con datos previos
+    queda bajo una versión que ya no se usa. Las inscripciones pasan
+    fechas=False (no cambian la duración de ningún evento) y en `usuarios` los
+    ids de quienes se inscribieron o cancelaron.
+    """
+    claves = [CLAVE_VERSION_CATALOGO]
+    if fechas:
+        claves.append(CLAVE_VERSION_FECHAS)
+    usuarios = list(usuarios)
+    _cambiar_version(claves, usuarios)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _cambiar_version(claves, usuarios))
+
+
+def clave_tarjeta(nombre, evento):
+    # La tarjeta muestra el nombre del creador, que se edita sin tocar el evento
+    creador = evento.creador
+    nombre_creador = hashlib.md5(
+        f'{creador.username}:{creador.first_name}:{creador.last_name}'.encode()
+    ).hexdigest()
+    return (f'eventos:tarjeta:{nombre}:{evento.pk}:'
+            f'{evento.fecha_actualizacion.timestamp()}:{evento.inscritos}:{nombre_creador}')
+
+
+def clave_inicio_anonimo(version=None):
+    return f'eventos:inicio:anonimo:{version or version_catalogo()}'
+
+
+def etag_para(*partes):
+    """
+    ETag (entre comillas) a partir de los valores de los que depende una respuesta
+    """
+    resumen = hashlib.md5(':'.join(str(p) for p in partes).encode()).hexdigest()
+    return f'"{resumen}"'
@@ -0,0 +1,105 @@
+"""
+Exportación de participantes y del catálogo de eventos en CSV o JSON.
+
+Las filas se leen con `.values_list().iterator()` y se escriben a medida que
+llegan en un `StreamingHttpResponse`, sin crear instancias de modelo: la
+memoria usada no depende del número de filas.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from accounts.models import PerfilUsuario
+from .models import Evento
+
+TAMANO_LOTE = 2000
+
+COLUMNAS_PARTICIPANTES = [
+    ('evento_id', 'evento_id'),
+    ('evento', 'evento__titulo'),
+    ('usuario', 'user__username'),
+    ('nombre', 'user__first_name'),
+    ('apellido', 'user__last_name'),
+    ('email', 'user__email'),
+    ('rol', 'user__perfil__rol'),
+]
+
+COLUMNAS_CATALOGO = [
+    ('id', 'id'),
+    ('titulo', 'titulo'),
+    ('tipo', 'tipo'),
+    ('fecha_inicio', 'fecha_inicio'),
+    ('fecha_fin', 'fecha_fin'),
+    ('ubicacion', 'ubicacion'),
+    ('privacidad', 'privacidad'),
+    ('capacidad', 'capacidad'),
+    ('inscritos', 'inscritos'),
+    ('creador', 'creador__username'),
+]
+
+ROLES = dict(PerfilUsuario.ROL_CHOICES)
+
+
+def filas_participantes(eventos):
+    """
+    Participantes de los eventos indicados (queryset o lista de ids), con el rol
+    del perfil resuelto en el mismo JOIN
+    """
+    Participacion = Evento.participantes.through
+    filas = (
+        Participacion.objects.filter(evento_id__in=eventos)
+        .order_by('evento_id', 'user_id')
+        .values_list(*[campo for _, campo in COLUMNAS_PARTICIPANTES])
+        .iterator(chunk_size=TAMANO_LOTE)
+    )
+    for *datos, rol in filas:
+        yield (*datos, ROLES.get(rol, rol))
+
+
+def filas_catalogo(queryset):
+    return (
+        queryset.order_by('id')
+        .values_list(*[campo for _, campo in COLUMNAS_CATALOGO])
+        .iterator(chunk_size=TAMANO_LOTE)
+    )
+
+
+class _Eco:
+    """
+    Objeto tipo archivo para csv.writer que devuelve la línea en lugar de guardarla
+    """
+    def write(self, valor):
+        return valor
+
+
+def _csv(encabezados, filas):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(encabezados)
+    for fila in filas:
+        yield escritor.writerow(fila)
+
+
+def _json(claves, filas):
+    yield '['
+    separador = ''
+    for fila in filas:
+        yield separador + json.dumps(dict(zip(claves, fila)), cls=DjangoJSONEncoder, ensure_ascii=False)
+        separador = ',\n'
+    yield ']\n'
+
+
+def respuesta_exportacion(nombre, columnas, filas, formato='csv'):
+    """
+    StreamingHttpResponse en CSV (por defecto) o JSON con las filas indicadas
+    """
+    encabezados = [nombre_columna for nombre_columna, _ in columnas]
+    if formato == 'json':
+        respuesta = StreamingHttpResponse(_json(encabezados, filas), content_type='application/json')
+        extension = 'json'
+    else:
+        respuesta = StreamingHttpResponse(_csv(encabezados, filas), content_type='text/csv; charset=utf-8')
+        extension = 'csv'
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre}.{extension}"'
+    return respuesta
@@ -0,0 +1,13 @@
+"""
+Utilidades de fechas compartidas por las vistas y los comandos de gestión
+"""
+from datetime import datetime, time
+
+from django.utils import timezone
+
+
+def inicio_del_dia(fecha):
+    """
+    Medianoche de `fecha` en la zona horaria actual, como datetime con zona
+    """
+    return timezone.make_aware(datetime.combine(fecha, time.min))
@@ -30,5 +30,13 @@ class EventoForm(forms.ModelForm):
         if fecha_inicio and fecha_fin:
             if fecha_fin <= fecha_inicio:
                 raise ValidationError('La fecha de fin debe ser posterior a la fecha de inicio.')
+            
+            # La ubicación no puede estar reservada por otro evento en el mismo horario
+            ubicacion = cleaned_data.get('ubicacion')
+            if ubicacion:
+                ocupada = (Evento.objects.en_ubicacion(ubicacion, fecha_inicio, fecha_fin)
+                           .exclude(pk=self.instance.pk).values('titulo').first())
+                if ocupada:
+                    self.add_error('ubicacion', f'La ubicación ya está reservada en ese horario por "{ocupada["titulo"]}".')
         
         return cleaned_data
\ No newline at end of file
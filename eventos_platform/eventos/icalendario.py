@@ -0,0 +1,221 @@
+"""
+Suscripciones iCalendar (RFC 5545) al catálogo público y a "mis eventos".
+
+Los clientes de calendario consultan el feed cada pocos minutos, así que:
+- El feed personal se autentica con un token firmado en la URL (el id del
+  usuario y su secreto de SuscripcionCalendario, firmados con SECRET_KEY): no
+  hay cookie ni consulta de sesión. Regenerar el secreto revoca la URL.
+- El feed renderizado se guarda en caché con una versión en la clave: la del
+  catálogo para el feed público; para el personal, la de fechas (cambia al
+  editar eventos) y la del usuario (cambia con sus inscripciones), así que las
+  inscripciones de otros no lo invalidan. Un acierto, o un 304 por
+  If-None-Match, no hace ninguna consulta.
+- Un fallo recorre los eventos con `.values_list().iterator()` y envía cada
+  VEVENT a medida que se genera; al terminar, el feed completo queda en caché.
+"""
+from datetime import timedelta, timezone as tz
+
+from django.core import signing
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.crypto import constant_time_compare
+
+from .cache import etag_para, timeout
+from .models import Evento, SuscripcionCalendario, nuevo_secreto_calendario
+
+SAL_TOKEN = 'eventos.icalendario'
+CLAVE_SECRETO = 'eventos:calendario:{}:secreto'
+# Los eventos terminados hace más de estos días ya no se incluyen en los feeds
+DIAS_PASADOS = 30
+# Segundos que el cliente puede reutilizar el feed sin volver a preguntar
+MAX_AGE = 300
+TAMANO_LOTE = 2000
+TIPOS = dict(Evento.TIPO_CHOICES)
+CAMPOS = ['id', 'titulo', 'descripcion', 'ubicacion', 'tipo', 'fecha_inicio', 'fecha_fin', 'fecha_actualizacion']
+
+
+def secreto_para(user_id, crear=False):
+    """
+    Secreto del feed personal del usuario (None si no tiene). Se guarda en la
+    base y se lee de la caché 'usuarios', compartida entre procesos, así que
+    validar un token no hace consultas.
+    """
+    clave = CLAVE_SECRETO.format(user_id)
+    secreto = caches['usuarios'].get(clave)
+    if secreto is None:
+        secreto = (SuscripcionCalendario.objects.filter(user_id=user_id)
+                   .values_list('secreto', flat=True).first())
+        if secreto is None and crear:
+            secreto = SuscripcionCalendario.objects.get_or_create(user_id=user_id)[0].secreto
+        if secreto is not None:
+            caches['usuarios'].set(clave, secreto, None)
+    return secreto
+
+
+async def asecreto_para(user_id):
+    clave = CLAVE_SECRETO.format(user_id)
+    secreto = await caches['usuarios'].aget(clave)
+    if secreto is None:
+        secreto = (await SuscripcionCalendario.objects.aget_or_create(user_id=user_id))[0].secreto
+        await caches['usuarios'].aset(clave, secreto, None)
+    return secreto
+
+
+def regenerar_secreto(user):
+    """
+    Cambia el secreto del usuario: las URL de su feed entregadas antes dejan de funcionar
+    """
+    SuscripcionCalendario.objects.update_or_create(
+        user=user, defaults={'secreto': nuevo_secreto_calendario()}
+    )
+    clave = CLAVE_SECRETO.format(user.pk)
+    caches['usuarios'].delete(clave)
+    # Lo que otra petición lea antes de confirmar la transacción no queda en la caché
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: caches['usuarios'].delete(clave))
+
+
+def _firmar(user_id, secreto):
+    return signing.Signer(salt=SAL_TOKEN).sign(f'{user_id}:{secreto}')
+
+
+def token_para(user):
+    return _firmar(user.pk, secreto_para(user.pk, crear=True))
+
+
+async def atoken_para(user):
+    return _firmar(user.pk, await asecreto_para(user.pk))
+
+
+def usuario_del_token(token):
+    """
+    Id del usuario del token, o None si la firma no es válida o el secreto cambió
+    """
+    try:
+        user_id, secreto = signing.Signer(salt=SAL_TOKEN).unsign(token).split(':')
+        user_id = int(user_id)
+    except (signing.BadSignature, ValueError):
+        return None
+    vigente = secreto_para(user_id)
+    if vigente is None or not constant_time_compare(secreto, vigente):
+        return None
+    return user_id
+
+
+def url_feed_personal(user):
+    return reverse('calendario_mis_eventos', kwargs={'token': token_para(user)})
+
+
+async def aurl_feed_personal(user):
+    return reverse('calendario_mis_eventos', kwargs={'token': await atoken_para(user)})
+
+
+# ========== Formato ==========
+
+def _texto(valor):
+    return (valor.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fecha(valor):
+    return valor.astimezone(tz.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _plegar(linea):
+    """
+    Parte la línea en trozos de hasta 75 octetos (sin cortar caracteres UTF-8)
+    """
+    if len(linea.encode()) <= 75:
+        return linea + '\r\n'
+    partes, actual, tamano = [], '', 0
+    for caracter in linea:
+        octetos = len(caracter.encode())
+        # Las líneas de continuación empiezan con un espacio que también cuenta
+        if tamano + octetos > (75 if not partes else 74):
+            partes.append(actual)
+            actual, tamano = '', 0
+        actual += caracter
+        tamano += octetos
+    partes.append(actual)
+    return '\r\n '.join(partes) + '\r\n'
+
+
+def _vevento(fila, base_url, dominio):
+    pk, titulo, descripcion, ubicacion, tipo, inicio, fin, actualizado = fila
+    lineas = [
+        'BEGIN:VEVENT',
+        f'UID:evento-{pk}@{dominio}',
+        f'DTSTAMP:{_fecha(actualizado)}',
+        f'LAST-MODIFIED:{_fecha(actualizado)}',
+        f'DTSTART:{_fecha(inicio)}',
+        f'DTEND:{_fecha(fin)}',
+        f'SUMMARY:{_texto(titulo)}',
+        f'DESCRIPTION:{_texto(descripcion)}',
+        f'LOCATION:{_texto(ubicacion)}',
+        f'CATEGORIES:{_texto(TIPOS.get(tipo, tipo))}',
+        f'URL:{base_url}{reverse("detalle_evento", kwargs={"pk": pk})}',
+        'END:VEVENT',
+    ]
+    return ''.join(_plegar(linea) for linea in lineas)
+
+
+def generar(queryset, nombre, base_url, dominio):
+    """
+    Texto del feed, por partes: cabecera, un VEVENT por evento y cierre
+    """
+    yield ''.join(_plegar(linea) for linea in [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:-//{dominio}//Gestion de eventos//ES',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_texto(nombre)}',
+    ])
+    desde = timezone.now() - timedelta(days=DIAS_PASADOS)
+    filas = (queryset.filter(fecha_fin__gte=desde).order_by('fecha_inicio', 'id')
+             .values_list(*CAMPOS).iterator(chunk_size=TAMANO_LOTE))
+    for fila in filas:
+        yield _vevento(fila, base_url, dominio)
+    yield 'END:VCALENDAR\r\n'
+
+
+def _guardar_al_terminar(partes, clave):
+    contenido = []
+    for parte in partes:
+        contenido.append(parte)
+        yield parte
+    # Solo si el feed se generó completo (el cliente no cortó la conexión)
+    cache.set(clave, ''.join(contenido), timeout())
+
+
+def respuesta_feed(request, clave, nombre, queryset, privado, version):
+    """
+    304 si el cliente tiene la versión actual, el feed cacheado o, si no está,
+    el feed generado en streaming. El queryset solo se evalúa al generar.
+    `version` identifica los datos del feed; se lee de la caché, sin consultas.
+    """
+    dominio = request.get_host()
+    base_url = f'{request.scheme}://{dominio}'
+    etag = etag_para('icalendario', clave, version, base_url)
+    respuesta = get_conditional_response(request, etag=etag)
+    if respuesta is None:
+        clave_cache = f'eventos:icalendario:{clave}:{etag.strip(chr(34))}'
+        contenido = cache.get(clave_cache)
+        tipo = 'text/calendar; charset=utf-8'
+        if contenido is not None:
+            respuesta = HttpResponse(contenido, content_type=tipo)
+        else:
+            partes = generar(queryset, nombre, base_url, dominio)
+            respuesta = StreamingHttpResponse(_guardar_al_terminar(partes, clave_cache), content_type=tipo)
+        respuesta['Content-Disposition'] = 'inline; filename="calendario.ics"'
+    respuesta['ETag'] = etag
+    if privado:
+        patch_cache_control(respuesta, private=True, max_age=MAX_AGE)
+    else:
+        patch_cache_control(respuesta, public=True, max_age=MAX_AGE)
+    return respuesta
+
@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from eventos.archivo import LOTE_ARCHIVO, archivables, archivar, fecha_limite
+
+
+class Command(BaseCommand):
+    help = ('Mueve al archivo (EventoArchivado) los eventos terminados hace más de '
+            'ARCHIVO_ANTIGUEDAD_DIAS días, con sus inscripciones, en lotes transaccionales.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=settings.ARCHIVO_ANTIGUEDAD_DIAS)
+        parser.add_argument('--lote', type=int, default=LOTE_ARCHIVO)
+        parser.add_argument('--simular', action='store_true', help='Solo cuenta los eventos a archivar')
+
+    def handle(self, *args, **options):
+        if options['simular']:
+            cantidad = archivables(fecha_limite(options['dias'])).count()
+            self.stdout.write(f'{cantidad} eventos terminados hace más de {options["dias"]} días.')
+            return
+        inicio = time.perf_counter()
+        cantidad = archivar(options['dias'], options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{cantidad} eventos archivados en {time.perf_counter() - inicio:.1f}s.'
+        ))
@@ -0,0 +1,44 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from eventos.benchmarks import generar_datos, medir, formatear
+from eventos.models import Evento
+
+
+class Command(BaseCommand):
+    help = ('Compara el rendimiento de la API JSON (proyecciones .values()) con las '
+            'vistas HTML equivalentes sobre datos sintéticos. Los datos se descartan al terminar.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--eventos', type=int, default=20000)
+        parser.add_argument('--inscripciones', type=int, default=100000)
+        parser.add_argument('--usuarios', type=int, default=10000)
+        parser.add_argument('--repeticiones', type=int, default=100)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write('Generando datos sintéticos...')
+            ids_usuarios, _ = generar_datos(options['usuarios'], options['eventos'], options['inscripciones'])
+            usuario = User.objects.get(pk=ids_usuarios[-1])
+            evento = Evento.objects.filter(privacidad='publico').order_by('-inscritos').first()
+
+            cliente = Client()
+            cliente.force_login(usuario)
+            comparaciones = [
+                ('lista', '/eventos/?cursor=', '/api/eventos/?limite=9'),
+                ('lista (campos mínimos)', '/eventos/?cursor=', '/api/eventos/?limite=9&fields=id,titulo'),
+                ('detalle', f'/evento/{evento.pk}/', f'/api/eventos/{evento.pk}/'),
+                ('mis eventos', '/mis-eventos/', '/api/mis-eventos/?limite=100'),
+            ]
+            for nombre, html, api in comparaciones:
+                for tipo, url in [('HTML', html), ('API', api)]:
+                    respuesta = cliente.get(url)
+                    resultado = medir(lambda: cliente.get(url), options['repeticiones'])
+                    self.stdout.write(
+                        f"{formatear(f'{nombre} {tipo}', resultado)}  "
+                        f"{1000 / resultado['media']:8.1f} req/s  {len(respuesta.content):7d} bytes"
+                    )
+                self.stdout.write('')
+
+            transaction.set_rollback(True)
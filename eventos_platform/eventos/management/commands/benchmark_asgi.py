@@ -0,0 +1,130 @@
+import asyncio
+import copy
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from eventos.benchmarks import generar_datos, percentiles
+from eventos.models import Evento
+
+
+class Command(BaseCommand):
+    help = ('Compara peticiones por segundo y latencia p99 de las vistas de lectura '
+            'servidas por el manejador ASGI (vistas asíncronas) y por el manejador WSGI '
+            '(vistas síncronas) con muchas peticiones concurrentes. Cada modo corre en '
+            'un proceso aparte; los datos generados se eliminan al terminar.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--eventos', type=int, default=5000)
+        parser.add_argument('--inscripciones', type=int, default=50000)
+        parser.add_argument('--usuarios', type=int, default=5000)
+        parser.add_argument('--peticiones', type=int, default=2000)
+        parser.add_argument('--concurrencia', type=int, default=100)
+        # Uso interno: ejecuta un solo modo y escribe el resultado en JSON
+        parser.add_argument('--modo', choices=['asgi', 'wsgi'], help='Ejecuta solo este modo')
+        parser.add_argument('--usuario', type=int, help='Usuario autenticado (uso interno)')
+
+    def handle(self, *args, **options):
+        if options['modo']:
+            return self.ejecutar_modo(options)
+
+        # Los datos se confirman en la base: los procesos hijos deben poder verlos
+        self.stdout.write('Generando datos sintéticos...')
+        ids_usuarios, _ = generar_datos(options['usuarios'], options['eventos'], options['inscripciones'])
+        try:
+            for modo in ['wsgi', 'asgi']:
+                resultado = self.lanzar(modo, ids_usuarios[-1], options)
+                self.stdout.write(
+                    f"{modo.upper():<5} {resultado['rps']:9.1f} req/s  "
+                    f"p50={resultado['p50']:8.2f}ms  p99={resultado['p99']:8.2f}ms  "
+                    f"errores={resultado['errores']}"
+                )
+        finally:
+            # Borra en cascada los eventos e inscripciones generados
+            User.objects.filter(pk__in=ids_usuarios).delete()
+
+    def lanzar(self, modo, usuario, options):
+        entorno = dict(os.environ, EVENTOS_VISTAS_ASYNC='1' if modo == 'asgi' else '0')
+        comando = [
+            sys.executable, sys.argv[0], 'benchmark_asgi', '--modo', modo, '--usuario', str(usuario),
+            '--peticiones', str(options['peticiones']), '--concurrencia', str(options['concurrencia']),
+        ]
+        proceso = subprocess.run(comando, env=entorno, capture_output=True, text=True)
+        if proceso.returncode != 0:
+            raise CommandError(f'Falló el modo {modo}:\n{proceso.stderr}')
+        return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+    def rutas(self):
+        evento = Evento.objects.filter(privacidad='publico').order_by('-inscritos').first()
+        return ['/', '/eventos/', '/eventos/?page=2', '/eventos/?cursor=',
+                f'/evento/{evento.pk}/', '/mis-eventos/']
+
+    def ejecutar_modo(self, options):
+        if settings.VISTAS_ASYNC != (options['modo'] == 'asgi'):
+            raise CommandError('EVENTOS_VISTAS_ASYNC no coincide con el modo pedido.')
+        usuario = User.objects.get(pk=options['usuario'])
+        rutas = self.rutas()
+        total, concurrencia = options['peticiones'], options['concurrencia']
+        # La mitad de las peticiones son anónimas y la otra mitad de un usuario autenticado
+        peticiones = [(i % 2 == 0, rutas[i % len(rutas)]) for i in range(total)]
+
+        inicio = time.perf_counter()
+        if options['modo'] == 'asgi':
+            tiempos, errores = asyncio.run(self.asgi(usuario, peticiones, concurrencia))
+        else:
+            tiempos, errores = self.wsgi(usuario, peticiones, concurrencia)
+        duracion = time.perf_counter() - inicio
+
+        resultado = percentiles(tiempos)
+        resultado.update(rps=total / duracion, errores=errores)
+        self.stdout.write(json.dumps(resultado))
+
+    async def asgi(self, usuario, peticiones, concurrencia):
+        anonimo, autenticado = AsyncClient(), AsyncClient()
+        await autenticado.aforce_login(usuario)
+        semaforo = asyncio.Semaphore(concurrencia)
+        tiempos, errores = [], 0
+
+        async def pedir(con_sesion, ruta):
+            nonlocal errores
+            async with semaforo:
+                inicio = time.perf_counter()
+                respuesta = await (autenticado if con_sesion else anonimo).get(ruta)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+                errores += respuesta.status_code >= 400
+
+        await asyncio.gather(*(pedir(*peticion) for peticion in peticiones))
+        return tiempos, errores
+
+    def wsgi(self, usuario, peticiones, concurrencia):
+        locales = threading.local()
+        sesion = Client()
+        sesion.force_login(usuario)
+        cookies = sesion.cookies
+        bloqueo = threading.Lock()
+        tiempos, errores = [], [0]
+
+        def pedir(peticion):
+            con_sesion, ruta = peticion
+            if not hasattr(locales, 'clientes'):
+                autenticado = Client()
+                autenticado.cookies = copy.deepcopy(cookies)
+                locales.clientes = (Client(), autenticado)
+            inicio = time.perf_counter()
+            respuesta = locales.clientes[con_sesion].get(ruta)
+            transcurrido = (time.perf_counter() - inicio) * 1000
+            with bloqueo:
+                tiempos.append(transcurrido)
+                errores[0] += respuesta.status_code >= 400
+
+        with ThreadPoolExecutor(max_workers=concurrencia) as ejecutor:
+            list(ejecutor.map(pedir, peticiones))
+        return tiempos, errores[0]
@@ -0,0 +1,127 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection
+from django.test import Client
+from eventos.benchmarks import generar_datos, percentiles
+from eventos.models import Evento
+
+# (nombre, valor de EVENTOS_SQLITE_CONCURRENTE, journal_mode previo a la corrida)
+PERFILES = [
+    ('por defecto', '0', 'DELETE'),
+    ('concurrente', '1', 'WAL'),
+]
+USUARIOS_POR_TRABAJADOR = 10
+
+
+class Command(BaseCommand):
+    help = ('Inscripciones y cancelaciones simultáneas desde varios procesos, con la '
+            'configuración SQLite por defecto de Django y con la concurrente (WAL, '
+            'busy_timeout, BEGIN IMMEDIATE, conexiones persistentes). Reporta operaciones '
+            'por segundo y la tasa de errores "database is locked". Los datos generados '
+            'se eliminan al terminar.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=8)
+        parser.add_argument('--operaciones', type=int, default=200, help='Operaciones por proceso')
+        parser.add_argument('--eventos', type=int, default=20)
+        parser.add_argument('--usuarios', type=int, default=500)
+        parser.add_argument('--capacidad', type=int, default=50)
+        # Uso interno: ejecuta un proceso trabajador y escribe el resultado en JSON
+        parser.add_argument('--trabajador', type=int, help='Semilla del trabajador (uso interno)')
+        parser.add_argument('--datos', help='Archivo con los IDs generados (uso interno)')
+        parser.add_argument('--inicio', type=float, help='Instante de arranque común (uso interno)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Este benchmark compara configuraciones de SQLite.')
+        if options['trabajador'] is not None:
+            return self.trabajar(options)
+
+        # Los datos se confirman en la base: los procesos trabajadores deben poder verlos
+        self.stdout.write('Generando datos sintéticos...')
+        ids_usuarios, ids_eventos = generar_datos(options['usuarios'], options['eventos'], 0)
+        Evento.objects.filter(pk__in=ids_eventos).update(capacidad=options['capacidad'])
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as archivo:
+            json.dump({'usuarios': ids_usuarios, 'eventos': ids_eventos}, archivo)
+        try:
+            for nombre, concurrente, journal_mode in PERFILES:
+                resultado = self.lanzar(concurrente, journal_mode, archivo.name, options)
+                self.stdout.write(
+                    f"{nombre:<12} {resultado['ops']:9.1f} ops/s  "
+                    f"p50={resultado['p50']:8.2f}ms  p99={resultado['p99']:8.2f}ms  "
+                    f"bloqueos={resultado['errores']} ({resultado['tasa_errores']:.1%})"
+                )
+        finally:
+            os.remove(archivo.name)
+            # Borra en cascada los eventos e inscripciones generados
+            User.objects.filter(pk__in=ids_usuarios).delete()
+
+    def lanzar(self, concurrente, journal_mode, datos, options):
+        # El modo de journal queda guardado en el archivo: se fija antes de cada corrida
+        # y se cierra la conexión para que los trabajadores no compitan con este proceso
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA journal_mode = {journal_mode}')
+        connection.close()
+
+        entorno = dict(os.environ, EVENTOS_SQLITE_CONCURRENTE=concurrente)
+        inicio = time.time() + 2
+        procesos = [
+            subprocess.Popen(
+                [sys.executable, sys.argv[0], 'benchmark_escrituras', '--trabajador', str(semilla),
+                 '--datos', datos, '--inicio', str(inicio), '--operaciones', str(options['operaciones'])],
+                env=entorno, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+            for semilla in range(options['procesos'])
+        ]
+        resultados = []
+        for proceso in procesos:
+            salida, error = proceso.communicate()
+            if proceso.returncode != 0:
+                raise CommandError(f'Falló un trabajador:\n{error}')
+            resultados.append(json.loads(salida.strip().splitlines()[-1]))
+
+        tiempos = [tiempo for resultado in resultados for tiempo in resultado['tiempos']]
+        errores = sum(resultado['errores'] for resultado in resultados)
+        duracion = max(resultado['duracion'] for resultado in resultados)
+        resumen = percentiles(tiempos)
+        resumen.update(ops=len(tiempos) / duracion, errores=errores, tasa_errores=errores / len(tiempos))
+        return resumen
+
+    def trabajar(self, options):
+        with open(options['datos']) as archivo:
+            datos = json.load(archivo)
+        rnd = random.Random(options['trabajador'])
+        eventos = datos['eventos']
+        # Cada trabajador atiende a unos pocos usuarios, cada uno con su sesión
+        clientes = []
+        for user_id in rnd.sample(datos['usuarios'], USUARIOS_POR_TRABAJADOR):
+            cliente = Client()
+            cliente.force_login(User.objects.get(pk=user_id))
+            clientes.append(cliente)
+        close_old_connections()
+        time.sleep(max(0, options['inicio'] - time.time()))
+
+        tiempos, errores = [], 0
+        comienzo = time.perf_counter()
+        for _ in range(options['operaciones']):
+            cliente, evento_id = rnd.choice(clientes), rnd.choice(eventos)
+            accion = 'inscribirse' if rnd.random() < 0.6 else 'cancelar'
+            inicio = time.perf_counter()
+            try:
+                cliente.get(f'/evento/{evento_id}/{accion}/')
+            except OperationalError:
+                errores += 1
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            # Como al terminar una petición: la conexión se cierra salvo que sea persistente
+            # (el cliente de pruebas no lo hace por su cuenta)
+            close_old_connections()
+        duracion = time.perf_counter() - comienzo
+        self.stdout.write(json.dumps({'tiempos': tiempos, 'errores': errores, 'duracion': duracion}))
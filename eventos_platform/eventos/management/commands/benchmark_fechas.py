@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from eventos.benchmarks import generar_datos, medir, formatear, escanea_tabla
+from eventos.fechas import inicio_del_dia
+from eventos.models import Evento, duracion_maxima
+
+
+class Command(BaseCommand):
+    help = ('Mide las consultas por fecha (próximos, pasados, rangos y calendario mensual) '
+            'sobre un catálogo sintético mayormente histórico. Los datos se descartan al terminar.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--eventos', type=int, default=1000000)
+        parser.add_argument('--inscripciones', type=int, default=10000)
+        parser.add_argument('--usuarios', type=int, default=1000)
+        parser.add_argument('--repeticiones', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write('Generando datos sintéticos...')
+            generar_datos(options['usuarios'], options['eventos'], options['inscripciones'])
+
+            anonimo = AnonymousUser()
+            visibles = Evento.objects.visibles_para(anonimo)
+            hoy = timezone.localdate()
+            sabado = hoy - timedelta(days=hoy.weekday()) + timedelta(days=5)
+            mes = hoy.replace(day=1)
+            hace_dos_anios = mes.replace(year=mes.year - 2)
+
+            def rango(desde, dias):
+                return inicio_del_dia(desde), inicio_del_dia(desde + timedelta(days=dias))
+
+            consultas = [
+                ('próximos: primera página', visibles.proximos().para_tarjetas(anonimo)[:9]),
+                ('pasados: primera página', visibles.pasados().para_tarjetas(anonimo)[:9]),
+                ('fin de semana', visibles.en_rango(*rango(sabado, 2)).values('id', 'titulo')),
+                ('calendario: mes actual',
+                 visibles.en_rango(*rango(mes, 31)).values('id', 'titulo', 'fecha_inicio', 'fecha_fin')),
+                ('calendario: hace dos años',
+                 visibles.en_rango(*rango(hace_dos_anios, 31)).values('id', 'titulo', 'fecha_inicio', 'fecha_fin')),
+            ]
+            # Superposición sin la cota inferior de duracion_maxima(): recorre todo lo anterior al rango
+            desde, hasta = rango(hace_dos_anios, 31)
+            sin_cota = visibles.filter(fecha_inicio__lt=hasta, fecha_fin__gt=desde).values('id', 'titulo')
+            consultas.append(('hace dos años sin cota inferior', sin_cota))
+
+            repeticiones = options['repeticiones']
+            self.stdout.write(formatear('duracion_maxima()', medir(duracion_maxima, repeticiones)))
+            for nombre, queryset in consultas:
+                filas = len(list(queryset))
+                self.stdout.write(f"{formatear(nombre, medir(lambda: list(queryset.all()), repeticiones))}  "
+                                  f"{filas:6d} filas")
+                plan = queryset.explain()
+                if escanea_tabla(plan, 'eventos_evento'):
+                    self.stdout.write(self.style.WARNING(f'  recorre eventos_evento completa:\n{plan}'))
+            self.stdout.write(f'Eventos en la tabla: {Evento.objects.count()}')
+
+            transaction.set_rollback(True)
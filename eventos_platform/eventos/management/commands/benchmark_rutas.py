@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from eventos.benchmarks import RUTAS, EscenarioRutas, generar_datos, percentiles, formatear
+
+# Escala: (usuarios, eventos, inscripciones)
+ESCALAS = {
+    '1k': (200, 1000, 5000),
+    '100k': (10000, 100000, 500000),
+    '1M': (50000, 1000000, 2000000),
+}
+
+
+class Command(BaseCommand):
+    help = ('Recorre todas las rutas de eventos y accounts con el cliente de pruebas sobre un '
+            'catálogo sintético de la escala indicada. Reporta percentiles de latencia y falla '
+            'si alguna vista supera su presupuesto de consultas (RUTAS en eventos/benchmarks.py). '
+            'Los datos se descartan al terminar.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', choices=list(ESCALAS), action='append',
+                            help='Puede repetirse (por defecto: 1k)')
+        parser.add_argument('--repeticiones', type=int, default=20)
+
+    def handle(self, *args, **options):
+        # El cliente de pruebas usa el host 'testserver', que setup_test_environment habilita
+        setup_test_environment()
+        excedidas = []
+        for escala in options['escala'] or ['1k']:
+            excedidas += [f'{escala} {ruta}' for ruta in self.medir_escala(escala, options['repeticiones'])]
+        if excedidas:
+            raise CommandError('Rutas sobre su presupuesto de consultas:\n' + '\n'.join(excedidas))
+
+    def medir_escala(self, escala, repeticiones):
+        excedidas = []
+        with transaction.atomic():
+            self.stdout.write(f'Escala {escala}: generando datos sintéticos...')
+            generar_datos(*ESCALAS[escala])
+            escenario = EscenarioRutas()
+            escenario.pasada()
+
+            # Pasadas completas: cada escritura se mide desde el mismo estado que en las pruebas
+            tiempos = [[] for _ in RUTAS]
+            consultas = [0] * len(RUTAS)
+            for _ in range(repeticiones):
+                for i, ruta in enumerate(RUTAS):
+                    # Con DEBUG el registro de consultas tiene un tope: lleno, CaptureQueriesContext no ve nada
+                    reset_queries()
+                    with CaptureQueriesContext(connection) as capturadas:
+                        inicio = time.perf_counter()
+                        escenario.pedir(ruta)
+                        tiempos[i].append((time.perf_counter() - inicio) * 1000)
+                    escenario.reponer(ruta)
+                    consultas[i] = max(consultas[i], len(capturadas))
+
+            for ruta, tiempos_ruta, cantidad in zip(RUTAS, tiempos, consultas):
+                nombre = f'{ruta[1]} {escenario.url(ruta)}'
+                linea = f'{formatear(nombre, percentiles(tiempos_ruta))}  {cantidad:3d}/{ruta[4]} consultas'
+                if cantidad > ruta[4]:
+                    excedidas.append(nombre)
+                    self.stdout.write(self.style.ERROR(linea))
+                else:
+                    self.stdout.write(linea)
+            transaction.set_rollback(True)
+        return excedidas
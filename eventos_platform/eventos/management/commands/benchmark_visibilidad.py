@@ -0,0 +1,53 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from eventos.benchmarks import generar_datos, medir, formatear, escanea_tabla
+from eventos.models import Evento
+
+
+class Command(BaseCommand):
+    help = ('Compara el filtro de visibilidad anterior (OR + JOIN + DISTINCT) con '
+            'visibles_para() sobre datos sintéticos. Los datos se descartan al terminar.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--eventos', type=int, default=100000)
+        parser.add_argument('--inscripciones', type=int, default=1000000)
+        parser.add_argument('--usuarios', type=int, default=50000)
+        parser.add_argument('--repeticiones', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write('Generando datos sintéticos...')
+            generar_datos(options['usuarios'], options['eventos'], options['inscripciones'])
+
+            asistente = User.objects.create_user('bench_asistente')
+            for evento in Evento.objects.filter(privacidad='privado')[:20]:
+                evento.inscribir(asistente)
+
+            anterior = Evento.objects.filter(
+                Q(privacidad='publico') | Q(participantes=asistente)
+            ).distinct()
+            nueva = Evento.objects.visibles_para(asistente)
+
+            # La tabla intermedia aparece con su nombre en el JOIN y como U0 en el EXISTS
+            tabla_intermedia = [Evento.participantes.through._meta.db_table, 'U0']
+            repeticiones = options['repeticiones']
+            for nombre, queryset in [('anterior', anterior), ('visibles_para', nueva)]:
+                self.stdout.write(formatear(f'{nombre}: primera página',
+                                            medir(lambda: list(queryset.all()[:9]), repeticiones)))
+                self.stdout.write(formatear(f'{nombre}: COUNT del paginador',
+                                            medir(lambda: queryset.all().count(), repeticiones)))
+                plan = queryset.explain()
+                self.stdout.write(plan)
+                if escanea_tabla(plan, tabla_intermedia, incluir_indices=True):
+                    self.stdout.write(self.style.WARNING(f'{nombre}: recorre la tabla intermedia completa'))
+                elif 'user_id=?' not in plan:
+                    self.stdout.write(self.style.WARNING(
+                        f'{nombre}: lee todas las inscripciones de cada evento recorrido'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'{nombre}: una búsqueda indexada (evento_id, user_id) por evento'))
+                self.stdout.write('')
+
+            transaction.set_rollback(True)
@@ -0,0 +1,82 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from eventos.tareas import procesar_lote
+
+
+class Command(BaseCommand):
+    help = ('Ejecuta las tareas encoladas (correos de inscripción, recordatorios...). '
+            'Con --procesos N lanza N trabajadores que reclaman lotes sin pisarse; '
+            'SIGTERM o Ctrl+C los detiene al terminar el lote en curso.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=1)
+        parser.add_argument('--lote', type=int, default=50, help='Tareas reclamadas (y correos por conexión) por vez')
+        parser.add_argument('--espera', type=float, default=5, help='Segundos entre consultas con la cola vacía')
+        parser.add_argument('--una-vez', action='store_true', help='Vacía la cola de tareas listas y termina')
+        # Uso interno: el proceso ya es un trabajador lanzado por otro
+        parser.add_argument('--trabajador', action='store_true', help='(uso interno)')
+
+    def handle(self, *args, **options):
+        if options['procesos'] < 1:
+            raise CommandError('--procesos debe ser al menos 1.')
+        if options['procesos'] > 1 and not options['trabajador']:
+            return self.lanzar(options)
+        self.trabajar(options)
+
+    def lanzar(self, options):
+        argumentos = ['--trabajador', '--lote', str(options['lote']), '--espera', str(options['espera'])]
+        if options['una_vez']:
+            argumentos.append('--una-vez')
+        procesos = [
+            subprocess.Popen([sys.executable, sys.argv[0], 'procesar_tareas', *argumentos])
+            for _ in range(options['procesos'])
+        ]
+
+        def reenviar(*args):
+            # Cada trabajador termina su lote antes de salir
+            for proceso in procesos:
+                if proceso.poll() is None:
+                    proceso.send_signal(signal.SIGTERM)
+
+        signal.signal(signal.SIGTERM, reenviar)
+        signal.signal(signal.SIGINT, reenviar)
+        for proceso in procesos:
+            proceso.wait()
+        if any(proceso.returncode for proceso in procesos):
+            raise CommandError('Algún trabajador terminó con error.')
+
+    def trabajar(self, options):
+        nombre = f'{socket.gethostname()}:{os.getpid()}'
+        detener = []
+        # Ctrl+C (SIGINT) igual que SIGTERM: se termina el lote en curso y se sale
+        anteriores = {
+            senal: signal.signal(senal, lambda *args: detener.append(True))
+            for senal in (signal.SIGTERM, signal.SIGINT)
+        }
+        total = 0
+        try:
+            while not detener:
+                close_old_connections()
+                cantidad = procesar_lote(nombre, options['lote'])
+                total += cantidad
+                if not cantidad:
+                    if options['una_vez']:
+                        break
+                    self.esperar(options['espera'], detener)
+        finally:
+            for senal, manejador in anteriores.items():
+                signal.signal(senal, manejador)
+        self.stdout.write(f'{nombre}: {total} tareas procesadas.')
+
+    def esperar(self, segundos, detener):
+        # En pasos cortos para no demorar la salida si llega una señal con la cola vacía
+        limite = time.monotonic() + segundos
+        while not detener and time.monotonic() < limite:
+            time.sleep(min(0.2, max(limite - time.monotonic(), 0)))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from eventos.models import Evento
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el contador de inscritos de cada evento a partir de la tabla de participantes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('eventos', nargs='*', type=int, help='IDs de eventos (por defecto, todos)')
+
+    def handle(self, *args, **options):
+        eventos = Evento.objects.all()
+        if options['eventos']:
+            eventos = eventos.filter(pk__in=options['eventos'])
+        actualizados = eventos.recalcular_inscritos()
+        self.stdout.write(self.style.SUCCESS(f'Contador actualizado en {actualizados} eventos.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand, CommandError
+from eventos.busqueda import fts_disponible, reconstruir_indice
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de texto completo (FTS5) de los eventos'
+
+    def handle(self, *args, **options):
+        if not fts_disponible():
+            raise CommandError('La búsqueda FTS5 solo está disponible con SQLite.')
+        total = reconstruir_indice()
+        self.stdout.write(self.style.SUCCESS(f'Índice reconstruido con {total} eventos.'))
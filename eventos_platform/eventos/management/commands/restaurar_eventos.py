@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from eventos.archivo import LOTE_ARCHIVO, restaurar
+from eventos.fechas import inicio_del_dia
+from eventos.models import EventoArchivado
+
+
+class Command(BaseCommand):
+    help = ('Devuelve eventos archivados a la tabla de eventos, con su id y sus inscripciones. '
+            'Se eligen por ID o por fecha de inicio (--desde/--hasta, AAAA-MM-DD).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int)
+        parser.add_argument('--desde', help='Eventos que empiezan desde esta fecha (incluida)')
+        parser.add_argument('--hasta', help='Eventos que empiezan antes de esta fecha')
+        parser.add_argument('--lote', type=int, default=LOTE_ARCHIVO)
+
+    def handle(self, *args, **options):
+        if not (options['ids'] or options['desde'] or options['hasta']):
+            raise CommandError('Indica los IDs o un rango con --desde/--hasta.')
+        archivados = EventoArchivado.objects.all()
+        if options['ids']:
+            archivados = archivados.filter(pk__in=options['ids'])
+        for opcion, filtro in (('desde', 'fecha_inicio__gte'), ('hasta', 'fecha_inicio__lt')):
+            if options[opcion]:
+                try:
+                    fecha = parse_date(options[opcion])
+                except ValueError:
+                    fecha = None
+                if fecha is None:
+                    raise CommandError(f'Fecha inválida en --{opcion}: {options[opcion]}')
+                archivados = archivados.filter(**{filtro: inicio_del_dia(fecha)})
+        cantidad = restaurar(archivados, options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'{cantidad} eventos restaurados.'))
@@ -0,0 +1,213 @@
+"""
+Métricas de las peticiones en formato Prometheus.
+
+Por cada vista (nombre de la URL) se registran histogramas de latencia total,
+cantidad de consultas SQL, tiempo en la base de datos y tiempo de render de
+plantillas. Los datos de la petición en curso viven en una ContextVar, que
+sigue a la petición también en los hilos de sync_to_async bajo ASGI:
+
+- Las consultas se miden con un execute_wrapper instalado en cada conexión
+  nueva (connection_created), no por petición.
+- Las plantillas, con un motor que envuelve a DjangoTemplates (TEMPLATES).
+
+Los histogramas son del proceso: con varios workers, cada uno expone los suyos.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates
+
+from .cache import estadisticas as estadisticas_cache
+
+logger = logging.getLogger('eventos.metricas')
+
+_medicion = ContextVar('eventos_medicion', default=None)
+_bloqueo = threading.Lock()
+
+LIMITES_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LIMITES_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+class Histograma:
+    """
+    Histograma con etiquetas (vista) y límites fijos, seguro entre hilos
+    """
+    def __init__(self, nombre, ayuda, limites):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.limites = limites
+        # etiqueta -> [conteo por intervalo..., conteo sobre el último límite, suma]
+        self.series = {}
+
+    def observar(self, etiqueta, valor):
+        indice = bisect_left(self.limites, valor)
+        with _bloqueo:
+            serie = self.series.get(etiqueta)
+            if serie is None:
+                serie = self.series[etiqueta] = [0] * (len(self.limites) + 1) + [0.0]
+            serie[indice] += 1
+            serie[-1] += valor
+
+    def exponer(self):
+        with _bloqueo:
+            series = {etiqueta: list(serie) for etiqueta, serie in self.series.items()}
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} histogram']
+        for etiqueta, serie in sorted(series.items()):
+            vista = f'vista="{_escapar(etiqueta)}"'
+            acumulado = 0
+            for limite, conteo in zip(self.limites, serie):
+                acumulado += conteo
+                lineas.append(f'{self.nombre}_bucket{{{vista},le="{limite}"}} {acumulado}')
+            acumulado += serie[-2]
+            lineas.append(f'{self.nombre}_bucket{{{vista},le="+Inf"}} {acumulado}')
+            lineas.append(f'{self.nombre}_sum{{{vista}}} {serie[-1]}')
+            lineas.append(f'{self.nombre}_count{{{vista}}} {acumulado}')
+        return lineas
+
+
+class Contador:
+    """
+    Contador con varias etiquetas, seguro entre hilos
+    """
+    def __init__(self, nombre, ayuda, etiquetas):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.valores = {}
+
+    def incrementar(self, *valores):
+        with _bloqueo:
+            self.valores[valores] = self.valores.get(valores, 0) + 1
+
+    def exponer(self, valores=None):
+        if valores is None:
+            with _bloqueo:
+                valores = dict(self.valores)
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} counter']
+        for clave, valor in sorted(valores.items()):
+            etiquetas = ','.join(f'{nombre}="{_escapar(v)}"' for nombre, v in zip(self.etiquetas, clave))
+            lineas.append(f'{self.nombre}{{{etiquetas}}} {valor}')
+        return lineas
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+DURACION = Histograma('eventos_peticion_segundos', 'Latencia total de la petición', LIMITES_SEGUNDOS)
+CONSULTAS = Histograma('eventos_peticion_consultas', 'Consultas SQL por petición', LIMITES_CONSULTAS)
+BASE_DATOS = Histograma('eventos_peticion_db_segundos', 'Tiempo en la base de datos por petición',
+                        LIMITES_SEGUNDOS)
+PLANTILLAS = Histograma('eventos_peticion_plantillas_segundos',
+                        'Tiempo de render de plantillas por petición (incluye consultas perezosas)',
+                        LIMITES_SEGUNDOS)
+PETICIONES = Contador('eventos_peticiones_total', 'Peticiones atendidas', ['vista', 'estado'])
+CONSULTAS_LENTAS = Contador('eventos_consultas_lentas_total',
+                            'Consultas sobre METRICAS_CONSULTA_LENTA_MS', ['vista'])
+CACHE = Contador('eventos_cache_fragmentos_total', 'Aciertos y fallos de la caché de fragmentos',
+                 ['fragmento', 'resultado'])
+
+
+def nombre_vista(request):
+    coincidencia = getattr(request, 'resolver_match', None)
+    return coincidencia.view_name if coincidencia else 'sin_ruta'
+
+
+def iniciar(request):
+    """
+    Abre la medición de la petición. Retorna el token para cerrarla.
+    """
+    return _medicion.set({'request': request, 'consultas': 0, 'db': 0.0, 'plantillas': 0.0,
+                          'renderizando': False})
+
+
+def finalizar(token, respuesta, duracion):
+    medicion = _medicion.get()
+    _medicion.reset(token)
+    vista = nombre_vista(medicion['request'])
+    DURACION.observar(vista, duracion)
+    CONSULTAS.observar(vista, medicion['consultas'])
+    BASE_DATOS.observar(vista, medicion['db'])
+    PLANTILLAS.observar(vista, medicion['plantillas'])
+    PETICIONES.incrementar(vista, respuesta.status_code)
+
+
+def medir_consulta(execute, sql, params, many, context):
+    """
+    execute_wrapper: suma la consulta a la petición en curso (si la hay)
+    """
+    medicion = _medicion.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        transcurrido = time.perf_counter() - inicio
+        medicion['consultas'] += 1
+        medicion['db'] += transcurrido
+        lenta = getattr(settings, 'METRICAS_CONSULTA_LENTA_MS', None)
+        if lenta is not None and transcurrido * 1000 >= lenta:
+            # Antes de resolver la URL (p. ej. la sesión en un 404) la vista es 'sin_ruta'
+            vista = nombre_vista(medicion['request'])
+            CONSULTAS_LENTAS.incrementar(vista)
+            logger.warning('Consulta lenta (%.1f ms) en %s: %s', transcurrido * 1000, vista, sql)
+
+
+@receiver(connection_created)
+def instrumentar_conexion(sender, connection, **kwargs):
+    if medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(medir_consulta)
+
+
+class PlantillasMedidas(DjangoTemplates):
+    """
+    Motor DjangoTemplates que suma el tiempo de render a la petición en curso
+    """
+    def from_string(self, template_code):
+        return PlantillaMedida(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return PlantillaMedida(super().get_template(template_name))
+
+
+class PlantillaMedida:
+    def __init__(self, plantilla):
+        self.plantilla = plantilla
+
+    def __getattr__(self, nombre):
+        return getattr(self.plantilla, nombre)
+
+    def render(self, context=None, request=None):
+        medicion = _medicion.get()
+        # Un render_to_string dentro de otro render ya se está midiendo
+        if medicion is None or medicion['renderizando']:
+            return self.plantilla.render(context, request)
+        medicion['renderizando'] = True
+        inicio = time.perf_counter()
+        try:
+            return self.plantilla.render(context, request)
+        finally:
+            medicion['plantillas'] += time.perf_counter() - inicio
+            medicion['renderizando'] = False
+
+
+def exponer():
+    """
+    Todas las métricas en formato de texto de Prometheus
+    """
+    cache_fragmentos = {}
+    for clave, valor in estadisticas_cache().items():
+        fragmento, resultado = clave.rsplit('.', 1)
+        cache_fragmentos[(fragmento, resultado)] = valor
+    lineas = []
+    for metrica in (DURACION, CONSULTAS, BASE_DATOS, PLANTILLAS, PETICIONES, CONSULTAS_LENTAS):
+        lineas.extend(metrica.exponer())
+    lineas.extend(CACHE.exponer(cache_fragmentos))
+    return '\n'.join(lineas) + '\n'
@@ -0,0 +1,40 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metricas
+
+
+class MetricasMiddleware:
+    """
+    Mide cada petición (latencia, consultas SQL, tiempo en la base de datos y
+    en plantillas) y la registra bajo el nombre de su URL en eventos.metricas.
+    Va primero en MIDDLEWARE para incluir al resto en la latencia.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICAS_ACTIVAS', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = metricas.iniciar(request)
+        inicio = time.perf_counter()
+        respuesta = self.get_response(request)
+        metricas.finalizar(token, respuesta, time.perf_counter() - inicio)
+        return respuesta
+
+    async def __acall__(self, request):
+        token = metricas.iniciar(request)
+        inicio = time.perf_counter()
+        respuesta = await self.get_response(request)
+        metricas.finalizar(token, respuesta, time.perf_counter() - inicio)
+        return respuesta
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2025-10-20 18:12
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def calcular_inscritos(apps, schema_editor):
+    Evento = apps.get_model('eventos', 'Evento')
+    Participacion = Evento.participantes.through
+    conteo = (
+        Participacion.objects.filter(evento_id=OuterRef('pk'))
+        .order_by()
+        .values('evento_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Evento.objects.update(inscritos=Coalesce(Subquery(conteo), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evento',
+            name='inscritos',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(calcular_inscritos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2025-10-22 17:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0002_evento_inscritos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(fields=['-fecha_inicio', '-id'], name='evento_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(fields=['privacidad', '-fecha_inicio'], name='evento_priv_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2025-10-23 16:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0003_indices_visibilidad'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(fields=['tipo', '-fecha_inicio'], name='evento_tipo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(fields=['creador', '-fecha_inicio'], name='evento_creador_fecha_idx'),
+        ),
+        # Índice inverso en la tabla intermedia: inscripciones de un usuario
+        # (mis_eventos) resueltas solo con el índice
+        migrations.RunSQL(
+            'CREATE INDEX evento_part_user_evento_idx '
+            'ON eventos_evento_participantes (user_id, evento_id);',
+            'DROP INDEX evento_part_user_evento_idx;',
+        ),
+    ]
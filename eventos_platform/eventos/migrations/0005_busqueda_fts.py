@@ -0,0 +1,57 @@
+# Generated by Django 5.2.7 on 2025-10-27 11:30
+
+import django.db.models.deletion
+import eventos.models
+from django.db import migrations, models
+
+
+def crear_indice_fts(apps, schema_editor):
+    # FTS5 solo existe en SQLite; en otros motores la búsqueda usa icontains
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE eventos_evento_fts USING fts5("
+        "titulo, descripcion, ubicacion, creador, "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO eventos_evento_fts(eventos_evento_fts, rank) "
+        "VALUES ('rank', 'bm25(10.0, 1.0, 3.0, 2.0)')"
+    )
+    schema_editor.execute(
+        'INSERT INTO eventos_evento_fts(rowid, titulo, descripcion, ubicacion, creador) '
+        'SELECT e.id, e.titulo, e.descripcion, e.ubicacion, u.username '
+        'FROM eventos_evento e INNER JOIN auth_user u ON u.id = e.creador_id'
+    )
+
+
+def eliminar_indice_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS eventos_evento_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0004_indices_acceso'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoBusqueda',
+            fields=[
+                ('evento', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='busqueda', serialize=False, to='eventos.evento')),
+                ('titulo', models.TextField()),
+                ('descripcion', models.TextField()),
+                ('ubicacion', models.TextField()),
+                ('creador', models.TextField()),
+                ('documento', eventos.models.CampoBusqueda(db_column='eventos_evento_fts')),
+                ('rank', models.FloatField(db_column='rank')),
+            ],
+            options={
+                'db_table': 'eventos_evento_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(crear_indice_fts, eliminar_indice_fts),
+    ]
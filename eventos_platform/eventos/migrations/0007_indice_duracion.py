@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2025-10-29 09:40
+
+from django.db import migrations
+
+
+def crear_indice(apps, schema_editor):
+    # Índice de expresión para MAX(duración) sin recorrer la tabla (ver models.duracion_maxima)
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE INDEX evento_duracion_idx ON eventos_evento '
+            '((julianday(fecha_fin) - julianday(fecha_inicio)))'
+        )
+
+
+def eliminar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP INDEX IF EXISTS evento_duracion_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0006_lista_espera'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
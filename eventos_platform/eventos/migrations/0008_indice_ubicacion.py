@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2025-10-30 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0007_indice_duracion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(fields=['ubicacion', 'fecha_inicio'], name='evento_ubicacion_fecha_idx'),
+        ),
+    ]
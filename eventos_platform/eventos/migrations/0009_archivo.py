@@ -0,0 +1,74 @@
+# Generated by Django 5.2.7 on 2025-10-30 16:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0008_indice_ubicacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('titulo', models.CharField(max_length=200)),
+                ('descripcion', models.TextField()),
+                ('tipo', models.CharField(choices=[('conferencia', 'Conferencia'), ('concierto', 'Concierto'), ('seminario', 'Seminario'), ('taller', 'Taller')], max_length=20)),
+                ('fecha_inicio', models.DateTimeField()),
+                ('fecha_fin', models.DateTimeField()),
+                ('ubicacion', models.CharField(max_length=300)),
+                ('privacidad', models.CharField(choices=[('publico', 'Público'), ('privado', 'Privado')], max_length=10)),
+                ('capacidad', models.PositiveIntegerField()),
+                ('inscritos', models.PositiveIntegerField()),
+                ('fecha_creacion', models.DateTimeField()),
+                ('fecha_actualizacion', models.DateTimeField()),
+                ('fecha_archivado', models.DateTimeField(default=django.utils.timezone.now)),
+                ('creador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eventos_creados_archivados', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Evento archivado',
+                'verbose_name_plural': 'Eventos archivados',
+                'ordering': ['-fecha_inicio'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ParticipacionArchivada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('evento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inscripciones', to='eventos.eventoarchivado')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participaciones_archivadas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Participación archivada',
+                'verbose_name_plural': 'Participaciones archivadas',
+            },
+        ),
+        migrations.AddField(
+            model_name='eventoarchivado',
+            name='participantes',
+            field=models.ManyToManyField(related_name='eventos_archivados', through='eventos.ParticipacionArchivada', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='participacionarchivada',
+            constraint=models.UniqueConstraint(fields=('evento', 'user'), name='participacion_archivada_unica'),
+        ),
+        migrations.AddIndex(
+            model_name='eventoarchivado',
+            index=models.Index(fields=['-fecha_inicio', '-id'], name='archivado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventoarchivado',
+            index=models.Index(fields=['privacidad', '-fecha_inicio'], name='archivado_priv_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventoarchivado',
+            index=models.Index(fields=['creador', '-fecha_inicio'], name='archivado_creador_fecha_idx'),
+        ),
+    ]
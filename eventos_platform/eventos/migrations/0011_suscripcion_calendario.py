@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:36
+
+import django.db.models.deletion
+import eventos.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0010_tarea'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuscripcionCalendario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('secreto', models.CharField(default=eventos.models.nuevo_secreto_calendario, max_length=32)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='suscripcion_calendario', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Suscripción de calendario',
+                'verbose_name_plural': 'Suscripciones de calendario',
+            },
+        ),
+    ]
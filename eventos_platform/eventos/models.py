@@ -1,7 +1,180 @@
-from django.db import models
+import secrets
+from datetime import timedelta
+
+from django.db import models, connection, transaction, IntegrityError
+from django.db.models import (
+    F, Q, OuterRef, Subquery, Count, Exists, Value, BooleanField, ExpressionWrapper, Func, Max,
+)
+from django.db.models.functions import Coalesce, NullIf
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from .cache import aversion_fechas, invalidar_catalogo, timeout, version_fechas
+
+
+def ve_eventos_privados(user):
+    """
+    Administradores, organizadores y usuarios con el permiso ven todos los eventos
+    """
+    return (user.perfil.rol in ['administrador', 'organizador'] or
+            user.has_perm('eventos.puede_ver_eventos_privados'))
+
+
+def _duracion_en_dias():
+    # Misma expresión que el índice evento_duracion_idx (migración 0007)
+    return (Func(F('fecha_fin'), function='julianday', output_field=models.FloatField()) -
+            Func(F('fecha_inicio'), function='julianday', output_field=models.FloatField()))
+
+
+def duracion_maxima():
+    """
+    Duración del evento más largo. Acota por abajo las búsquedas por intervalo:
+    un evento que se superpone con [desde, hasta) empezó después de
+    desde - duracion_maxima(). Los formularios limitan la duración a
+    DURACION_MAXIMA_EVENTO_DIAS para que la cota no se aleje. Se guarda en caché
+    con la versión de fechas en la clave (cambia al guardar o eliminar eventos,
+    no al inscribirse), así que comprobar conflictos o la ubicación es una sola
+    consulta.
+    """
+    clave = _clave_duracion(version_fechas())
+    duracion = cache.get(clave)
+    if duracion is None:
+        duracion = _calcular_duracion_maxima()
+        cache.set(clave, duracion, timeout())
+    return duracion
+
+
+async def aduracion_maxima():
+    clave = _clave_duracion(await aversion_fechas())
+    duracion = await cache.aget(clave)
+    if duracion is None:
+        duracion = await _acalcular_duracion_maxima()
+        await cache.aset(clave, duracion, timeout())
+    return duracion
+
+
+def _clave_duracion(version):
+    return f'eventos:duracion_maxima:{version}'
+
+
+def _calcular_duracion_maxima():
+    # En SQLite se resuelve con un índice de expresión, sin recorrer la tabla
+    if connection.vendor == 'sqlite':
+        dias = Evento.objects.aggregate(maxima=Max(_duracion_en_dias()))['maxima']
+        return _con_margen(dias)
+    duracion = ExpressionWrapper(F('fecha_fin') - F('fecha_inicio'), output_field=models.DurationField())
+    return Evento.objects.aggregate(maxima=Max(duracion))['maxima'] or timedelta(0)
+
+
+async def _acalcular_duracion_maxima():
+    if connection.vendor == 'sqlite':
+        dias = (await Evento.objects.aaggregate(maxima=Max(_duracion_en_dias())))['maxima']
+        return _con_margen(dias)
+    duracion = ExpressionWrapper(F('fecha_fin') - F('fecha_inicio'), output_field=models.DurationField())
+    return (await Evento.objects.aaggregate(maxima=Max(duracion)))['maxima'] or timedelta(0)
+
+
+def _con_margen(dias):
+    # Un segundo de margen por el redondeo de julianday
+    return timedelta(days=dias or 0) + timedelta(seconds=1)
+
+
+class EventoQuerySet(models.QuerySet):
+    def visibles_para(self, user):
+        """
+        Eventos que el usuario puede ver. Para asistentes la inscripción se
+        comprueba con EXISTS sobre la tabla intermedia, así que no hace falta
+        JOIN ni DISTINCT.
+        """
+        if not user.is_authenticated:
+            # Solo eventos públicos para no autenticados
+            return self.filter(privacidad='publico')
+
+        if ve_eventos_privados(user):
+            return self
+
+        # Asistentes ven públicos, los que crearon y donde están inscritos
+        Participacion = Evento.participantes.through
+        inscrito = Exists(
+            Participacion.objects.filter(evento_id=OuterRef('pk'), user_id=user.pk)
+        )
+        return self.filter(Q(privacidad='publico') | Q(creador=user) | inscrito)
+
+    def para_tarjetas(self, user=None):
+        """
+        Datos que necesitan las tarjetas de evento en una sola consulta:
+        creador con su perfil, porcentaje de ocupación y si el usuario está inscrito
+        """
+        Participacion = Evento.participantes.through
+        if user is not None and user.is_authenticated:
+            esta_inscrito = Exists(
+                Participacion.objects.filter(evento_id=OuterRef('pk'), user_id=user.pk)
+            )
+        else:
+            esta_inscrito = Value(False, output_field=BooleanField())
+        return self.select_related('creador__perfil').annotate(
+            porcentaje_ocupacion=Coalesce(
+                F('inscritos') * 100 / NullIf(F('capacidad'), 0), 0
+            ),
+            esta_inscrito=esta_inscrito,
+        )
+
+    def en_rango(self, desde, hasta, duracion=None):
+        """
+        Eventos que se superponen con el intervalo [desde, hasta). `duracion` es
+        la de duracion_maxima(); se puede pasar si ya se calculó.
+        """
+        duracion = duracion_maxima() if duracion is None else duracion
+        return self.filter(
+            fecha_inicio__gte=desde - duracion,
+            fecha_inicio__lt=hasta,
+            fecha_fin__gt=desde,
+        ).order_by('fecha_inicio', 'id')
+
+    def proximos(self, ahora=None, duracion=None):
+        """
+        Eventos en curso o por comenzar, del más cercano al más lejano
+        """
+        ahora = ahora or timezone.now()
+        duracion = duracion_maxima() if duracion is None else duracion
+        return self.filter(
+            fecha_inicio__gte=ahora - duracion,
+            fecha_fin__gte=ahora,
+        ).order_by('fecha_inicio', 'id')
+
+    def pasados(self, ahora=None):
+        """
+        Eventos ya terminados, del más reciente al más antiguo
+        """
+        ahora = ahora or timezone.now()
+        return self.filter(fecha_inicio__lt=ahora, fecha_fin__lt=ahora).order_by('-fecha_inicio', '-id')
+
+    def en_ubicacion(self, ubicacion, desde, hasta, duracion=None):
+        """
+        Eventos en la misma ubicación que se superponen con [desde, hasta)
+        """
+        return self.en_rango(desde, hasta, duracion).filter(ubicacion=ubicacion)
+
+    def recalcular_inscritos(self):
+        """
+        Reconstruye el contador de inscritos a partir de la tabla intermedia
+        """
+        Participacion = Evento.participantes.through
+        conteo = (
+            Participacion.objects.filter(evento_id=OuterRef('pk'))
+            .order_by()
+            .values('evento_id')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        actualizados = self.update(inscritos=Coalesce(Subquery(conteo), 0))
+        # También cierra las cargas masivas: bulk_create no emite post_save
+        invalidar_catalogo()
+        return actualizados
 
 
 class Evento(models.Model):
@@ -11,12 +184,12 @@ class Evento(models.Model):
         ('seminario', 'Seminario'),
         ('taller', 'Taller'),
     ]
-    
+
     PRIVACIDAD_CHOICES = [
         ('publico', 'Público'),
         ('privado', 'Privado'),
     ]
-    
+
     titulo = models.CharField(max_length=200)
     descripcion = models.TextField()
     tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
@@ -25,35 +198,500 @@ class Evento(models.Model):
     ubicacion = models.CharField(max_length=300)
     privacidad = models.CharField(max_length=10, choices=PRIVACIDAD_CHOICES, default='publico')
     capacidad = models.PositiveIntegerField(default=50)
-    
+
     # Relación con usuario creador
     creador = models.ForeignKey(User, on_delete=models.CASCADE, related_name='eventos_creados')
-    
+
     # Participantes registrados
     participantes = models.ManyToManyField(User, related_name='eventos_inscritos', blank=True)
-    
+
+    # Contador desnormalizado de participantes (se mantiene con escrituras condicionales)
+    inscritos = models.PositiveIntegerField(default=0, editable=False)
+
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
-    
+
+    objects = EventoQuerySet.as_manager()
+
     class Meta:
         ordering = ['-fecha_inicio']
         verbose_name = 'Evento'
         verbose_name_plural = 'Eventos'
+        indexes = [
+            # Orden del listado completo (administradores y organizadores)
+            models.Index(fields=['-fecha_inicio', '-id'], name='evento_fecha_idx'),
+            # Listado público (usuarios anónimos y rama pública de asistentes)
+            models.Index(fields=['privacidad', '-fecha_inicio'], name='evento_priv_fecha_idx'),
+            # Filtro por tipo del admin y listados por tipo
+            models.Index(fields=['tipo', '-fecha_inicio'], name='evento_tipo_fecha_idx'),
+            # Eventos creados por un usuario
+            models.Index(fields=['creador', '-fecha_inicio'], name='evento_creador_fecha_idx'),
+            # Eventos de una ubicación en un intervalo (reservas superpuestas)
+            models.Index(fields=['ubicacion', 'fecha_inicio'], name='evento_ubicacion_fecha_idx'),
+        ]
         # Permisos personalizados
         permissions = [
             ('puede_gestionar_eventos', 'Puede gestionar eventos'),
             ('puede_ver_eventos_privados', 'Puede ver eventos privados'),
         ]
-    
+
     def __str__(self):
         return f"{self.titulo} - {self.get_tipo_display()}"
-    
+
+    def save(self, *args, **kwargs):
+        # Al editar no se sobrescribe el contador: solo cambia con inscribir/cancelar
+        if not self._state.adding and self.pk and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != 'inscritos'
+            ]
+        super().save(*args, **kwargs)
+
     def clean(self):
-        if self.fecha_fin and self.fecha_inicio and self.fecha_fin <= self.fecha_inicio:
-            raise ValidationError('La fecha de fin debe ser posterior a la fecha de inicio.')
-    
+        if self.fecha_fin and self.fecha_inicio:
+            if self.fecha_fin <= self.fecha_inicio:
+                raise ValidationError('La fecha de fin debe ser posterior a la fecha de inicio.')
+            # Las búsquedas por intervalo retroceden la duración del evento más largo (ver duracion_maxima)
+            dias = settings.DURACION_MAXIMA_EVENTO_DIAS
+            if self.fecha_fin - self.fecha_inicio > timedelta(days=dias):
+                raise ValidationError({'fecha_fin': f'Un evento no puede durar más de {dias} días.'})
+
+    def es_visible_para(self, user):
+        """
+        Indica si el usuario puede ver este evento
+        """
+        if self.privacidad == 'publico':
+            return True
+        if not user.is_authenticated:
+            return False
+        return (user.pk == self.creador_id or
+                ve_eventos_privados(user) or
+                self.participantes.filter(pk=user.pk).exists())
+
+    async def aes_visible_para(self, user):
+        if self.privacidad == 'publico':
+            return True
+        if not user.is_authenticated:
+            return False
+        return (user.pk == self.creador_id or
+                ve_eventos_privados(user) or
+                await self.participantes.filter(pk=user.pk).aexists())
+
+    def es_editable_por(self, user):
+        """
+        Indica si el usuario puede editar el evento (y exportar sus participantes):
+        necesita el permiso change_evento y ser el creador, organizador o administrador
+        """
+        return (user.is_authenticated and user.has_perm('eventos.change_evento') and
+                (user.pk == self.creador_id or user.perfil.rol in ['administrador', 'organizador']))
+
     def espacios_disponibles(self):
-        return self.capacidad - self.participantes.count()
-    
+        return max(self.capacidad - self.inscritos, 0)
+
     def esta_lleno(self):
-        return self.participantes.count() >= self.capacidad
\ No newline at end of file
+        return self.inscritos >= self.capacidad
+
+    def conflictos_para(self, user):
+        """
+        Eventos en los que el usuario está inscrito y que se superponen con
+        este. Se recorre solo el intervalo del evento y la inscripción se
+        comprueba con EXISTS, sin leer todo el historial del usuario.
+        """
+        Participacion = Evento.participantes.through
+        inscrito = Exists(
+            Participacion.objects.filter(evento_id=OuterRef('pk'), user_id=user.pk)
+        )
+        return (Evento.objects.en_rango(self.fecha_inicio, self.fecha_fin)
+                .filter(inscrito).exclude(pk=self.pk))
+
+    def inscribir(self, user):
+        """
+        Inscribe al usuario si queda cupo. La capacidad se valida en la misma
+        escritura que incrementa el contador, por lo que no hay sobreventa.
+        Mientras otros usuarios esperen, el cupo libre es suyo en orden de
+        llegada: primero se promueve la lista de espera.
+        Retorna True si el usuario quedó inscrito.
+        """
+        inscrito = self._inscribir(user)
+        if inscrito is None:
+            promovidos = self.promover_lista_espera()
+            self.inscritos += len(promovidos)
+            if user.pk in promovidos:
+                return True
+            # Si la lista se vació y aún queda cupo, se intenta una vez más
+            inscrito = self._inscribir(user) if promovidos else False
+        return bool(inscrito)
+
+    def _inscribir(self, user):
+        """
+        Retorna True si inscribió al usuario, False si ya estaba inscrito y None
+        si no hay cupo o hay otros usuarios en la lista de espera
+        """
+        from .tareas import encolar_inscripcion
+
+        Participacion = Evento.participantes.through
+        ahora = timezone.now()
+        otros_en_espera = ListaEspera.objects.filter(evento_id=OuterRef('pk')).exclude(user_id=user.pk)
+        try:
+            with transaction.atomic():
+                actualizados = Evento.objects.filter(
+                    ~Exists(otros_en_espera), pk=self.pk, inscritos__lt=F('capacidad')
+                ).update(inscritos=F('inscritos') + 1, fecha_actualizacion=ahora)
+                if not actualizados:
+                    return None
+                # Si ya estaba inscrito, la restricción única revierte el incremento
+                Participacion.objects.create(evento_id=self.pk, user_id=user.pk)
+                # Quien estaba en la lista y obtiene cupo deja de ocupar un lugar en ella
+                ListaEspera.objects.filter(evento_id=self.pk, user_id=user.pk).delete()
+                encolar_inscripcion(self, user.pk)
+        except IntegrityError:
+            return False
+        self.inscritos += 1
+        self.fecha_actualizacion = ahora
+        invalidar_catalogo(fechas=False, usuarios=[user.pk])
+        return True
+
+    def cancelar(self, user):
+        """
+        Cancela la inscripción del usuario y promueve al siguiente en la lista
+        de espera. Retorna True si estaba inscrito.
+        """
+        from .tareas import encolar_cancelacion
+
+        Participacion = Evento.participantes.through
+        ahora = timezone.now()
+        promovidos = []
+        with transaction.atomic():
+            eliminados, _ = Participacion.objects.filter(evento_id=self.pk, user_id=user.pk).delete()
+            if not eliminados:
+                return False
+            Evento.objects.filter(pk=self.pk, inscritos__gt=0).update(
+                inscritos=F('inscritos') - 1, fecha_actualizacion=ahora
+            )
+            encolar_cancelacion(self, user.pk)
+            # El cupo liberado pasa al siguiente en espera dentro de la misma transacción
+            promovidos = self.promover_lista_espera()
+        self.inscritos = max(self.inscritos - 1, 0) + len(promovidos)
+        self.fecha_actualizacion = ahora
+        invalidar_catalogo(fechas=False, usuarios=[user.pk])
+        return True
+
+    def unirse_lista_espera(self, user):
+        """
+        Agrega al usuario al final de la lista de espera (una sola inserción).
+        Retorna su posición, o None si ya está inscrito.
+        """
+        if self.participantes.filter(pk=user.pk).exists():
+            return None
+        try:
+            with transaction.atomic():
+                ListaEspera.objects.create(evento_id=self.pk, user_id=user.pk)
+        except IntegrityError:
+            pass  # Ya estaba en la lista: se conserva su lugar
+        return self.posicion_en_espera(user)
+
+    def salir_lista_espera(self, user):
+        eliminados, _ = ListaEspera.objects.filter(evento_id=self.pk, user_id=user.pk).delete()
+        return bool(eliminados)
+
+    def posicion_en_espera(self, user):
+        """
+        Posición (desde 1) del usuario en la lista de espera, o None si no está en ella
+        """
+        if not user.is_authenticated:
+            return None
+        espera = ListaEspera.objects.filter(evento_id=self.pk, user_id=user.pk).values_list('pk', flat=True).first()
+        if espera is None:
+            return None
+        return ListaEspera.objects.filter(evento_id=self.pk, pk__lt=espera).count() + 1
+
+    async def aposicion_en_espera(self, user):
+        if not user.is_authenticated:
+            return None
+        espera = await ListaEspera.objects.filter(evento_id=self.pk, user_id=user.pk).values_list('pk', flat=True).afirst()
+        if espera is None:
+            return None
+        return await ListaEspera.objects.filter(evento_id=self.pk, pk__lt=espera).acount() + 1
+
+    def promover_lista_espera(self):
+        """
+        Inscribe en orden de llegada a los usuarios en espera mientras quede cupo.
+        Cada fila se reclama borrándola: si otra transacción la borró primero,
+        se pasa a la siguiente, así que nadie es promovido dos veces. Con
+        CONFLICTOS_INSCRIPCION = 'bloquear', quien se inscribió mientras tanto
+        en un evento que se superpone con este sale de la lista sin inscribirse.
+        Retorna la lista de ids de usuarios promovidos.
+        """
+        from .tareas import encolar_inscripcion
+
+        Participacion = Evento.participantes.through
+        bloquear = settings.CONFLICTOS_INSCRIPCION == 'bloquear'
+        promovidos = []
+        while True:
+            siguiente = (ListaEspera.objects.filter(evento_id=self.pk)
+                         .order_by('pk').values_list('pk', 'user_id').first())
+            if siguiente is None:
+                break
+            espera_id, user_id = siguiente
+            try:
+                with transaction.atomic():
+                    if not ListaEspera.objects.filter(pk=espera_id).delete()[0]:
+                        continue
+                    if Participacion.objects.filter(evento_id=self.pk, user_id=user_id).exists():
+                        continue  # Se inscribió por otra vía: solo se descarta su espera
+                    if bloquear and self.conflictos_para(User(pk=user_id)).exists():
+                        continue
+                    actualizados = Evento.objects.filter(
+                        pk=self.pk, inscritos__lt=F('capacidad')
+                    ).update(inscritos=F('inscritos') + 1, fecha_actualizacion=timezone.now())
+                    if not actualizados:
+                        # Sin cupo: se deshace el borrado y el usuario conserva su lugar
+                        raise _SinCupo
+                    Participacion.objects.create(evento_id=self.pk, user_id=user_id)
+                    encolar_inscripcion(self, user_id)
+            except (_SinCupo, IntegrityError):
+                break
+            promovidos.append(user_id)
+        if promovidos:
+            invalidar_catalogo(fechas=False, usuarios=promovidos)
+        return promovidos
+
+
+class _SinCupo(Exception):
+    pass
+
+
+class ListaEspera(models.Model):
+    """
+    Usuarios esperando cupo en un evento lleno. El orden de llegada es el id.
+    """
+    evento = models.ForeignKey(Evento, on_delete=models.CASCADE, related_name='lista_espera')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='esperas')
+    fecha_ingreso = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['evento', 'id']
+        verbose_name = 'Lista de espera'
+        verbose_name_plural = 'Listas de espera'
+        constraints = [
+            models.UniqueConstraint(fields=['evento', 'user'], name='espera_evento_user_unica'),
+        ]
+        indexes = [
+            # Primero en la fila y posición de un usuario
+            models.Index(fields=['evento', 'id'], name='espera_evento_orden_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} en espera de {self.evento.titulo}"
+
+
+def nuevo_secreto_calendario():
+    return secrets.token_hex(16)
+
+
+class SuscripcionCalendario(models.Model):
+    """
+    Secreto del feed iCalendar personal de cada usuario. Va dentro del token
+    firmado de la URL: cambiarlo revoca los enlaces entregados antes.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='suscripcion_calendario')
+    secreto = models.CharField(max_length=32, default=nuevo_secreto_calendario)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Suscripción de calendario'
+        verbose_name_plural = 'Suscripciones de calendario'
+
+    def __str__(self):
+        return f"Calendario de {self.user.username}"
+
+
+class EventoArchivadoQuerySet(models.QuerySet):
+    def visibles_para(self, user):
+        """
+        Mismas reglas que EventoQuerySet.visibles_para, sobre el archivo
+        """
+        if not user.is_authenticated:
+            return self.filter(privacidad='publico')
+        if ve_eventos_privados(user):
+            return self
+        inscrito = Exists(
+            ParticipacionArchivada.objects.filter(evento_id=OuterRef('pk'), user_id=user.pk)
+        )
+        return self.filter(Q(privacidad='publico') | Q(creador=user) | inscrito)
+
+
+class EventoArchivado(models.Model):
+    """
+    Evento terminado que se movió fuera de la tabla de eventos (ver archivo.py).
+    Las columnas son las mismas que las de Evento, incluido el id original, para
+    archivar y restaurar con INSERT ... SELECT.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    titulo = models.CharField(max_length=200)
+    descripcion = models.TextField()
+    tipo = models.CharField(max_length=20, choices=Evento.TIPO_CHOICES)
+    fecha_inicio = models.DateTimeField()
+    fecha_fin = models.DateTimeField()
+    ubicacion = models.CharField(max_length=300)
+    privacidad = models.CharField(max_length=10, choices=Evento.PRIVACIDAD_CHOICES)
+    capacidad = models.PositiveIntegerField()
+    creador = models.ForeignKey(User, on_delete=models.CASCADE, related_name='eventos_creados_archivados')
+    participantes = models.ManyToManyField(
+        User, through='ParticipacionArchivada', related_name='eventos_archivados'
+    )
+    inscritos = models.PositiveIntegerField()
+    fecha_creacion = models.DateTimeField()
+    fecha_actualizacion = models.DateTimeField()
+    fecha_archivado = models.DateTimeField(default=timezone.now)
+
+    objects = EventoArchivadoQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-fecha_inicio']
+        verbose_name = 'Evento archivado'
+        verbose_name_plural = 'Eventos archivados'
+        indexes = [
+            # Historial completo y paginación por cursor
+            models.Index(fields=['-fecha_inicio', '-id'], name='archivado_fecha_idx'),
+            models.Index(fields=['privacidad', '-fecha_inicio'], name='archivado_priv_fecha_idx'),
+            models.Index(fields=['creador', '-fecha_inicio'], name='archivado_creador_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.titulo} - {self.get_tipo_display()} (archivado)"
+
+
+class ParticipacionArchivada(models.Model):
+    evento = models.ForeignKey(EventoArchivado, on_delete=models.CASCADE, related_name='inscripciones')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='participaciones_archivadas')
+
+    class Meta:
+        verbose_name = 'Participación archivada'
+        verbose_name_plural = 'Participaciones archivadas'
+        constraints = [
+            # Sirve al EXISTS de visibles_para; el historial de un usuario usa el índice de user
+            models.UniqueConstraint(fields=['evento', 'user'], name='participacion_archivada_unica'),
+        ]
+
+
+class Tarea(models.Model):
+    """
+    Trabajo diferido (correos de inscripción, recordatorios...) que procesa
+    `manage.py procesar_tareas` fuera de la petición. Se inserta en la misma
+    transacción que la escritura que lo origina (ver tareas.py).
+    """
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('en_curso', 'En curso'),
+        ('completada', 'Completada'),
+        ('fallida', 'Fallida'),
+    ]
+
+    tipo = models.CharField(max_length=50)
+    datos = models.JSONField(default=dict)
+    estado = models.CharField(max_length=12, choices=ESTADO_CHOICES, default='pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    ejecutar_despues = models.DateTimeField(default=timezone.now)
+    # Mientras un trabajador la procesa; vencido este plazo otro puede reclamarla
+    bloqueada_hasta = models.DateTimeField(null=True, blank=True)
+    trabajador = models.CharField(max_length=100, blank=True)
+    ultimo_error = models.TextField(blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_finalizacion = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Tarea'
+        verbose_name_plural = 'Tareas'
+        indexes = [
+            # Próximas tareas a reclamar (y en curso con el bloqueo vencido)
+            models.Index(fields=['estado', 'ejecutar_despues'], name='tarea_estado_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.get_estado_display()})"
+
+
+# Señal para mantener el contador cuando los participantes cambian por otras vías (admin, shell)
+@receiver(m2m_changed, sender=Evento.participantes.through)
+def actualizar_contador_inscritos(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # Al limpiar se guardan los eventos (o usuarios) afectados antes de borrar
+        if reverse:
+            instance._eventos_afectados = list(instance.eventos_inscritos.values_list('pk', flat=True))
+        else:
+            instance._usuarios_afectados = list(instance.participantes.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        Evento.objects.filter(pk=instance.pk).recalcular_inscritos()
+        if action == 'post_clear':
+            usuarios = getattr(instance, '_usuarios_afectados', [])
+        else:
+            usuarios = pk_set or []
+    else:
+        usuarios = [instance.pk]
+        if action == 'post_clear':
+            Evento.objects.filter(pk__in=getattr(instance, '_eventos_afectados', [])).recalcular_inscritos()
+        elif pk_set:
+            Evento.objects.filter(pk__in=pk_set).recalcular_inscritos()
+    invalidar_catalogo(fechas=False, usuarios=usuarios)
+
+
+# Cualquier cambio en un evento invalida las páginas cacheadas que dependen del catálogo
+@receiver(post_save, sender=Evento)
+@receiver(post_delete, sender=Evento)
+def invalidar_cache_catalogo(sender, **kwargs):
+    invalidar_catalogo()
+
+
+# Las páginas del catálogo muestran el nombre del creador de cada evento y el feed
+# personal de un usuario desactivado queda vacío
+@receiver(post_save, sender=User)
+def invalidar_catalogo_nombre_usuario(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    campos = set(update_fields) if update_fields is not None else {'username', 'is_active'}
+    if campos & {'username', 'first_name', 'last_name', 'is_active'}:
+        usuarios = [instance.pk] if 'is_active' in campos else []
+        invalidar_catalogo(fechas=False, usuarios=usuarios)
+
+
+class CampoBusqueda(models.TextField):
+    """
+    Columna oculta de una tabla FTS5 que admite el operador MATCH
+    """
+
+
+@CampoBusqueda.register_lookup
+class Coincide(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class EventoBusqueda(models.Model):
+    """
+    Índice de texto completo (tabla virtual FTS5 de SQLite). El rowid de cada
+    fila es el id del evento; se mantiene con señales (ver busqueda.py).
+    """
+    evento = models.OneToOneField(
+        Evento, on_delete=models.DO_NOTHING, primary_key=True,
+        db_column='rowid', related_name='busqueda'
+    )
+    titulo = models.TextField()
+    descripcion = models.TextField()
+    ubicacion = models.TextField()
+    creador = models.TextField()
+    # Columna oculta con el nombre de la tabla (destino de MATCH) y ranking BM25
+    documento = CampoBusqueda(db_column='eventos_evento_fts')
+    rank = models.FloatField(db_column='rank')
+
+    class Meta:
+        managed = False
+        db_table = 'eventos_evento_fts'
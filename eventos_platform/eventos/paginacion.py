@@ -0,0 +1,166 @@
+from datetime import datetime
+
+from django.core import signing
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+
+class PaginaCursor:
+    """
+    Página de resultados obtenida con paginación por cursor
+    """
+    def __init__(self, object_list, cursor_siguiente, cursor_anterior, total=None):
+        self.object_list = object_list
+        self.cursor_siguiente = cursor_siguiente
+        self.cursor_anterior = cursor_anterior
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.cursor_siguiente is not None
+
+    def has_previous(self):
+        return self.cursor_anterior is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class PaginadorCursor:
+    """
+    Paginación por cursor (keyset) sobre (fecha_inicio, id), en orden descendente
+    o ascendente. Cada página filtra a partir de la última fila vista en lugar de
+    usar OFFSET, así que la página N cuesta lo mismo que la primera. Los cursores
+    son tokens firmados y opacos para el cliente.
+    """
+    salt = 'eventos.paginacion.cursor'
+
+    def __init__(self, queryset, per_page, contar_total=True, ascendente=False):
+        orden = ('fecha_inicio', 'id') if ascendente else ('-fecha_inicio', '-id')
+        self.queryset = queryset.order_by(*orden)
+        self.per_page = per_page
+        self.contar_total = contar_total
+        self.ascendente = ascendente
+
+    def codificar(self, fila, direccion):
+        # Acepta instancias de Evento o diccionarios de .values()
+        if isinstance(fila, dict):
+            fecha, pk = fila['fecha_inicio'], fila['id']
+        else:
+            fecha, pk = fila.fecha_inicio, fila.pk
+        return signing.dumps([fecha.isoformat(), pk, direccion], salt=self.salt)
+
+    def decodificar(self, cursor):
+        try:
+            fecha, pk, direccion = signing.loads(cursor, salt=self.salt)
+            return datetime.fromisoformat(fecha), int(pk), direccion
+        except (signing.BadSignature, ValueError, TypeError):
+            raise Http404('Cursor de paginación inválido.')
+
+    def _consulta(self, cursor):
+        queryset = self.queryset
+        direccion = 'sig'
+        if cursor:
+            fecha, pk, direccion = self.decodificar(cursor)
+            # Avanzar en orden descendente es buscar valores menores, y al revés
+            menor = (direccion == 'sig') != self.ascendente
+            if menor:
+                filtro = Q(fecha_inicio__lt=fecha) | Q(fecha_inicio=fecha, id__lt=pk)
+            else:
+                filtro = Q(fecha_inicio__gt=fecha) | Q(fecha_inicio=fecha, id__gt=pk)
+            queryset = queryset.filter(filtro)
+            if direccion == 'ant':
+                queryset = queryset.reverse()
+        # Se pide una fila extra para saber si hay más resultados en esa dirección
+        return queryset[:self.per_page + 1], direccion
+
+    def _pagina(self, filas, cursor, direccion, total):
+        hay_mas = len(filas) > self.per_page
+        filas = filas[:self.per_page]
+        if direccion == 'ant':
+            filas.reverse()
+
+        siguiente = anterior = None
+        if filas:
+            if direccion == 'ant' or hay_mas:
+                siguiente = self.codificar(filas[-1], 'sig')
+            if (direccion == 'sig' and cursor) or (direccion == 'ant' and hay_mas):
+                anterior = self.codificar(filas[0], 'ant')
+        return PaginaCursor(filas, siguiente, anterior, total)
+
+    def page(self, cursor=None):
+        queryset, direccion = self._consulta(cursor)
+        filas = list(queryset)
+        total = self.queryset.count() if self.contar_total else None
+        return self._pagina(filas, cursor, direccion, total)
+
+    async def apage(self, cursor=None):
+        queryset, direccion = self._consulta(cursor)
+        filas = [fila async for fila in queryset]
+        total = await self.queryset.acount() if self.contar_total else None
+        return self._pagina(filas, cursor, direccion, total)
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Paginador para el admin que, sin filtros, estima el total en lugar de
+    ejecutar COUNT(*) sobre la tabla completa. Con filtros, o si la tabla es
+    pequeña, cuenta normalmente.
+    """
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if queryset.query.where:
+            return super().count
+        estimado = estimar_filas(queryset.model, queryset.db)
+        return estimado if estimado is not None else super().count
+
+
+# Por debajo de esta estimación el COUNT(*) es barato y se prefiere el total exacto
+CONTEO_EXACTO_HASTA = 10000
+
+
+def estimar_filas(modelo, alias='default'):
+    """
+    Número aproximado de filas de la tabla del modelo, o None si conviene contar
+    (tabla pequeña o motor sin estimación).
+    En SQLite se usan las estadísticas de ANALYZE (sqlite_stat1) si existen y, si no,
+    el rango de ids (MAX - MIN, dos búsquedas en la clave primaria), que es una
+    cota superior: con muchas filas borradas sobreestima. En PostgreSQL se usan
+    las estadísticas del planificador.
+    """
+    conexion = connections[alias]
+    tabla = modelo._meta.db_table
+    with conexion.cursor() as cursor:
+        if conexion.vendor == 'sqlite':
+            estimado = _estadisticas_sqlite(cursor, tabla)
+            if estimado is None:
+                cursor.execute(f'SELECT MAX(rowid) - MIN(rowid) + 1 FROM {conexion.ops.quote_name(tabla)}')
+                estimado = cursor.fetchone()[0] or 0
+        elif conexion.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [tabla])
+            fila = cursor.fetchone()
+            estimado = fila[0] if fila else None
+        else:
+            return None
+    if estimado is None or estimado < CONTEO_EXACTO_HASTA:
+        return None
+    return int(estimado)
+
+
+def _estadisticas_sqlite(cursor, tabla):
+    # La primera cifra de cada fila de sqlite_stat1 es el número de filas de la tabla
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+    if cursor.fetchone() is None:
+        return None
+    cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [tabla])
+    filas = [int(stat.split()[0]) for stat, in cursor.fetchall() if stat]
+    return max(filas) if filas else None
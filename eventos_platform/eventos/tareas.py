@@ -0,0 +1,236 @@
+"""
+Cola de tareas en la base de datos para el trabajo que no debe hacer esperar
+a la petición: correos de inscripción y cancelación, avisos al organizador,
+recordatorios antes del evento y bienvenida al registrarse.
+
+- Las tareas se insertan con bulk_create dentro de la transacción que las
+  origina: si la inscripción se revierte, sus correos también.
+- `manage.py procesar_tareas` las reclama por lotes. Con PostgreSQL se usa
+  SELECT ... FOR UPDATE SKIP LOCKED; en SQLite la transacción empieza con
+  BEGIN IMMEDIATE (OPTIONS de DATABASES), que serializa a los trabajadores
+  que reclaman. Cada tarea reclamada queda bloqueada por TAREAS_BLOQUEO
+  segundos: si el trabajador muere, otro la retoma al vencer el plazo. El
+  resultado solo se guarda si la tarea sigue reclamada por quien la ejecutó.
+- Los correos de un lote salen por una sola conexión SMTP.
+- Una tarea que falla se reintenta con espera exponencial hasta
+  TAREAS_MAX_INTENTOS; después queda como fallida.
+"""
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Evento, Tarea
+
+logger = logging.getLogger('eventos.tareas')
+
+MANEJADORES = {}
+
+
+def manejador(tipo):
+    """
+    Registra la función que ejecuta las tareas de un tipo. Recibe los datos
+    de la tarea y retorna el correo a enviar (o None si no hay nada que enviar).
+    """
+    def registrar(funcion):
+        MANEJADORES[tipo] = funcion
+        return funcion
+    return registrar
+
+
+def nueva(tipo, ejecutar_despues=None, **datos):
+    return Tarea(tipo=tipo, datos=datos, ejecutar_despues=ejecutar_despues or timezone.now())
+
+
+def encolar(*tareas):
+    """
+    Inserta las tareas en un solo INSERT, dentro de la transacción en curso
+    """
+    return Tarea.objects.bulk_create(tareas)
+
+
+def encolar_inscripcion(evento, user_id):
+    tareas = [
+        nueva('confirmar_inscripcion', evento_id=evento.pk, user_id=user_id),
+        nueva('notificar_organizador', evento_id=evento.pk, user_id=user_id, accion='inscripcion'),
+    ]
+    recordatorio = evento.fecha_inicio - timedelta(hours=settings.TAREAS_RECORDATORIO_HORAS)
+    if recordatorio > timezone.now():
+        tareas.append(nueva('recordatorio', recordatorio, evento_id=evento.pk, user_id=user_id,
+                            fecha_inicio=evento.fecha_inicio.isoformat()))
+    encolar(*tareas)
+
+
+def encolar_cancelacion(evento, user_id):
+    # El recordatorio pendiente no se busca: al ejecutarse comprueba que siga inscrito
+    encolar(
+        nueva('confirmar_cancelacion', evento_id=evento.pk, user_id=user_id),
+        nueva('notificar_organizador', evento_id=evento.pk, user_id=user_id, accion='cancelacion'),
+    )
+
+
+def encolar_bienvenida(user):
+    encolar(nueva('bienvenida', user_id=user.pk))
+
+
+# ========== Manejadores ==========
+
+def _destinatario(user_id):
+    return User.objects.filter(pk=user_id).exclude(email='').values('username', 'first_name', 'email').first()
+
+
+def _evento(evento_id):
+    return (Evento.objects.filter(pk=evento_id)
+            .values('titulo', 'fecha_inicio', 'ubicacion', 'creador_id').first())
+
+
+def _correo(destinatario, asunto, cuerpo):
+    nombre = destinatario['first_name'] or destinatario['username']
+    return EmailMessage(asunto, f'Hola {nombre}:\n\n{cuerpo}\n', to=[destinatario['email']])
+
+
+def _cuando(evento):
+    return f"{timezone.localtime(evento['fecha_inicio']):%d/%m/%Y %H:%M} en {evento['ubicacion']}"
+
+
+@manejador('bienvenida')
+def bienvenida(datos):
+    destinatario = _destinatario(datos['user_id'])
+    if destinatario:
+        return _correo(destinatario, 'Bienvenido a la plataforma de eventos',
+                       'Tu cuenta quedó creada. Ya puedes inscribirte en los eventos que te interesen.')
+
+
+@manejador('confirmar_inscripcion')
+def confirmar_inscripcion(datos):
+    destinatario, evento = _destinatario(datos['user_id']), _evento(datos['evento_id'])
+    if destinatario and evento:
+        return _correo(destinatario, f'Inscripción confirmada: {evento["titulo"]}',
+                       f'Quedaste inscrito en "{evento["titulo"]}", el {_cuando(evento)}.')
+
+
+@manejador('confirmar_cancelacion')
+def confirmar_cancelacion(datos):
+    destinatario, evento = _destinatario(datos['user_id']), _evento(datos['evento_id'])
+    if destinatario and evento:
+        return _correo(destinatario, f'Inscripción cancelada: {evento["titulo"]}',
+                       f'Cancelaste tu inscripción en "{evento["titulo"]}".')
+
+
+@manejador('notificar_organizador')
+def notificar_organizador(datos):
+    evento = _evento(datos['evento_id'])
+    if not evento:
+        return None
+    organizador, asistente = _destinatario(evento['creador_id']), User.objects.filter(pk=datos['user_id']).first()
+    if organizador and asistente:
+        accion = 'se inscribió en' if datos['accion'] == 'inscripcion' else 'canceló su inscripción en'
+        return _correo(organizador, f'{evento["titulo"]}: {asistente.username} {accion} el evento',
+                       f'{asistente.username} {accion} "{evento["titulo"]}".')
+
+
+@manejador('recordatorio')
+def recordatorio(datos):
+    Participacion = Evento.participantes.through
+    if not Participacion.objects.filter(evento_id=datos['evento_id'], user_id=datos['user_id']).exists():
+        return None  # Canceló la inscripción (o el evento se archivó)
+    evento = _evento(datos['evento_id'])
+    if evento['fecha_inicio'] != parse_datetime(datos['fecha_inicio']):
+        # El evento cambió de fecha: el recordatorio se vuelve a programar para la fecha nueva
+        cuando = evento['fecha_inicio'] - timedelta(hours=settings.TAREAS_RECORDATORIO_HORAS)
+        if cuando > timezone.now():
+            encolar(nueva('recordatorio', cuando, evento_id=datos['evento_id'], user_id=datos['user_id'],
+                          fecha_inicio=evento['fecha_inicio'].isoformat()))
+            return None
+    destinatario = _destinatario(datos['user_id'])
+    if destinatario:
+        return _correo(destinatario, f'Recordatorio: {evento["titulo"]}',
+                       f'Te esperamos en "{evento["titulo"]}", el {_cuando(evento)}.')
+
+
+# ========== Trabajador ==========
+
+def reclamar(trabajador, cantidad):
+    """
+    Marca como en curso hasta `cantidad` tareas listas para ejecutarse (o con el
+    bloqueo vencido) y las retorna. Dos trabajadores nunca reclaman la misma.
+    """
+    ahora = timezone.now()
+    listas = (Tarea.objects
+              .filter(Q(estado='pendiente', ejecutar_despues__lte=ahora) |
+                      Q(estado='en_curso', bloqueada_hasta__lt=ahora))
+              .order_by('ejecutar_despues', 'id'))
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            listas = listas.select_for_update(skip_locked=True)
+        ids = list(listas.values_list('pk', flat=True)[:cantidad])
+        if not ids:
+            return []
+        Tarea.objects.filter(pk__in=ids).update(
+            estado='en_curso', trabajador=trabajador, intentos=F('intentos') + 1,
+            bloqueada_hasta=ahora + timedelta(seconds=settings.TAREAS_BLOQUEO),
+        )
+    return list(Tarea.objects.filter(pk__in=ids, trabajador=trabajador).order_by('ejecutar_despues', 'id'))
+
+
+def procesar_lote(trabajador, cantidad=50):
+    """
+    Reclama y ejecuta un lote de tareas. Retorna cuántas reclamó (0 si la cola está vacía).
+    """
+    tareas = reclamar(trabajador, cantidad)
+    if not tareas:
+        return 0
+
+    conexion = get_connection()
+    try:
+        conexion.open()
+    except Exception as error:
+        # Sin servidor de correo no se intenta ninguna: todas vuelven a la cola
+        for tarea in tareas:
+            reintentar(tarea, error)
+        return len(tareas)
+
+    completadas = []
+    try:
+        for tarea in tareas:
+            try:
+                mensaje = MANEJADORES[tarea.tipo](tarea.datos)
+                if mensaje is not None:
+                    mensaje.connection = conexion
+                    mensaje.send()
+            except Exception as error:
+                reintentar(tarea, error)
+            else:
+                completadas.append(tarea.pk)
+    finally:
+        conexion.close()
+    # Si el bloqueo venció y otro trabajador la reclamó, el resultado es suyo
+    Tarea.objects.filter(pk__in=completadas, trabajador=trabajador, estado='en_curso').update(
+        estado='completada', bloqueada_hasta=None, fecha_finalizacion=timezone.now()
+    )
+    return len(tareas)
+
+
+def reintentar(tarea, error):
+    """
+    Devuelve la tarea a la cola con espera exponencial, o la marca como fallida
+    """
+    ahora = timezone.now()
+    cambios = {'bloqueada_hasta': None, 'ultimo_error': f'{type(error).__name__}: {error}'}
+    if tarea.intentos >= settings.TAREAS_MAX_INTENTOS:
+        cambios.update(estado='fallida', fecha_finalizacion=ahora)
+        logger.error('Tarea %s (%s) fallida tras %s intentos: %s', tarea.pk, tarea.tipo, tarea.intentos, error)
+    else:
+        espera = min(settings.TAREAS_REINTENTO_SEGUNDOS * 2 ** (tarea.intentos - 1), 3600)
+        # Un poco de azar para que los reintentos de un mismo lote no coincidan
+        espera *= random.uniform(1, 1.25)
+        cambios.update(estado='pendiente', ejecutar_despues=ahora + timedelta(seconds=espera))
+        logger.warning('Tarea %s (%s) falló (intento %s): %s', tarea.pk, tarea.tipo, tarea.intentos, error)
+    Tarea.objects.filter(pk=tarea.pk, trabajador=tarea.trabajador, estado='en_curso').update(**cambios)
@@ -0,0 +1,38 @@
+from django import template
+from django.core.cache import cache
+
+from eventos.cache import clave_tarjeta, registrar, timeout
+
+register = template.Library()
+
+
+class TarjetaCacheadaNode(template.Node):
+    def __init__(self, nodelist, evento, nombre):
+        self.nodelist = nodelist
+        self.evento = evento
+        self.nombre = nombre
+
+    def render(self, context):
+        evento = self.evento.resolve(context)
+        clave = clave_tarjeta(self.nombre.resolve(context), evento)
+        html = cache.get(clave)
+        registrar('tarjetas', acierto=html is not None)
+        if html is None:
+            html = self.nodelist.render(context)
+            cache.set(clave, html, timeout())
+        return html
+
+
+@register.tag
+def cache_tarjeta(parser, token):
+    """
+    Cachea la parte común de la tarjeta de un evento:
+    {% cache_tarjeta evento 'lista' %} ... {% endcache_tarjeta %}
+    Lo personalizado por usuario debe quedar fuera del bloque.
+    """
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' requiere un evento y un nombre de fragmento.")
+    nodelist = parser.parse(('endcache_tarjeta',))
+    parser.delete_first_token()
+    return TarjetaCacheadaNode(nodelist, parser.compile_filter(bits[1]), parser.compile_filter(bits[2]))
@@ -1,3 +1,998 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import random
+import threading
+import time
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core import mail, signing
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+from django.http import Http404
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import include, path
+from django.utils import timezone
+
+from . import metricas, views, vistas_async
+from .archivo import archivar, restaurar
+from .cache import clave_tarjeta, version_catalogo, version_fechas, version_usuario
+from .benchmarks import RUTAS, EscenarioRutas, escanea_tabla, generar_datos
+from .exportacion import COLUMNAS_PARTICIPANTES
+from .forms import EventoForm
+from .icalendario import token_para
+from .busqueda import buscar
+from .models import Evento, EventoArchivado, ListaEspera, Tarea
+from .paginacion import PaginadorCursor, PaginadorEstimado
+from .tareas import MANEJADORES, procesar_lote
+from accounts.acceso import reiniciar_acceso
+from accounts.roles import cambiar_rol
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN es específico de SQLite')
+class PlanConsultasTest(TestCase):
+    """
+    Falla si la consulta de alguna vista pasa a recorrer una tabla completa
+    """
+    tablas = [
+        'eventos_evento',
+        'eventos_evento_participantes',
+        'U0',  # alias de la tabla intermedia en los EXISTS
+        'auth_user',
+        'accounts_perfilusuario',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = User.objects.create_user('organizador')
+        cls.organizador.perfil.rol = 'organizador'
+        cls.organizador.perfil.save()
+        cls.asistente = User.objects.create_user('asistente')
+
+        ahora = timezone.now()
+        for i in range(30):
+            evento = Evento.objects.create(
+                titulo=f'Evento {i}', descripcion='Descripción', tipo='taller',
+                fecha_inicio=ahora + timedelta(days=i), fecha_fin=ahora + timedelta(days=i, hours=2),
+                ubicacion='Sala 1', privacidad='privado' if i % 3 == 0 else 'publico',
+                creador=cls.organizador,
+            )
+            if i % 2 == 0:
+                evento.inscribir(cls.asistente)
+        cls.evento = evento
+
+    def assertSinRecorridoCompleto(self, queryset, ordenado=()):
+        """
+        `ordenado` lista las tablas que pueden recorrerse por un índice de orden
+        porque la consulta tiene LIMIT y se detiene tras la primera página
+        """
+        plan = queryset.explain()
+        for tabla in self.tablas:
+            self.assertFalse(
+                escanea_tabla(plan, tabla, incluir_indices=tabla not in ordenado),
+                f'Recorrido completo de {tabla}:\n{plan}'
+            )
+
+    def test_lista_anonimo(self):
+        anonimo = AnonymousUser()
+        self.assertSinRecorridoCompleto(
+            Evento.objects.visibles_para(anonimo).para_tarjetas(anonimo)[:9]
+        )
+
+    def test_lista_asistente(self):
+        self.assertSinRecorridoCompleto(
+            Evento.objects.visibles_para(self.asistente).para_tarjetas(self.asistente)[:9],
+            ordenado=['eventos_evento'],
+        )
+
+    def test_lista_organizador(self):
+        self.assertSinRecorridoCompleto(
+            Evento.objects.visibles_para(self.organizador).para_tarjetas(self.organizador)[:9],
+            ordenado=['eventos_evento'],
+        )
+
+    def test_proximos(self):
+        anonimo = AnonymousUser()
+        self.assertSinRecorridoCompleto(
+            Evento.objects.visibles_para(anonimo).proximos().para_tarjetas(anonimo)[:9]
+        )
+        self.assertSinRecorridoCompleto(
+            Evento.objects.visibles_para(self.organizador).proximos().para_tarjetas(self.organizador)[:9]
+        )
+
+    def test_rango(self):
+        # Superposición: entra el evento en curso al inicio del rango, no el que empieza al final
+        desde = self.evento.fecha_inicio + timedelta(hours=1)
+        hasta = desde + timedelta(days=1) - timedelta(hours=1)
+        eventos = Evento.objects.visibles_para(self.organizador).en_rango(desde, hasta)
+        self.assertEqual(list(eventos), [self.evento])
+        self.assertSinRecorridoCompleto(eventos)
+
+    def test_conflictos(self):
+        self.assertSinRecorridoCompleto(self.evento.conflictos_para(self.asistente))
+        self.assertSinRecorridoCompleto(
+            Evento.objects.en_ubicacion('Sala 1', self.evento.fecha_inicio, self.evento.fecha_fin)
+        )
+
+    def test_mis_eventos(self):
+        self.assertSinRecorridoCompleto(
+            self.asistente.eventos_inscritos.para_tarjetas(self.asistente)
+        )
+
+    def test_detalle(self):
+        self.assertSinRecorridoCompleto(
+            Evento.objects.select_related('creador__perfil').filter(pk=self.evento.pk)
+        )
+
+    def test_inscripcion(self):
+        self.assertSinRecorridoCompleto(
+            self.evento.participantes.filter(pk=self.asistente.pk)
+        )
+
+    def test_participantes(self):
+        self.assertSinRecorridoCompleto(
+            self.evento.participantes.select_related('perfil').order_by('pk')[:25]
+        )
+
+    def test_admin_filtro_tipo(self):
+        self.assertSinRecorridoCompleto(Evento.objects.filter(tipo='taller')[:100])
+
+    def test_eventos_creados(self):
+        self.assertSinRecorridoCompleto(self.organizador.eventos_creados.all())
+
+
+def crear_evento(creador, capacidad, **kwargs):
+    ahora = timezone.now()
+    datos = {
+        'titulo': 'Evento', 'descripcion': 'Descripción', 'tipo': 'concierto',
+        'fecha_inicio': ahora + timedelta(days=1), 'fecha_fin': ahora + timedelta(days=1, hours=2),
+        'ubicacion': 'Sala 1', **kwargs,
+    }
+    return Evento.objects.create(capacidad=capacidad, creador=creador, **datos)
+
+
+class PaginadorCursorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        usuario = User.objects.create_user('usuario')
+        inicio = timezone.now() + timedelta(days=1)
+        # Cuatro eventos con la misma fecha: el id desempata en los bordes de página
+        for dias in [0, 0, 0, 0, 1, 2, 3]:
+            crear_evento(usuario, 10, fecha_inicio=inicio + timedelta(days=dias),
+                         fecha_fin=inicio + timedelta(days=dias, hours=2))
+        cls.ids = list(Evento.objects.order_by('-fecha_inicio', '-id').values_list('pk', flat=True))
+
+    def recorrer(self, paginador):
+        paginas = [paginador.page()]
+        while paginas[-1].has_next():
+            paginas.append(paginador.page(paginas[-1].cursor_siguiente))
+        return paginas
+
+    def test_avanzar_y_retroceder(self):
+        for ascendente in (False, True):
+            esperados = self.ids[::-1] if ascendente else self.ids
+            paginador = PaginadorCursor(Evento.objects.all(), 2, ascendente=ascendente)
+            paginas = self.recorrer(paginador)
+            self.assertEqual([evento.pk for pagina in paginas for evento in pagina], esperados)
+            self.assertEqual(paginas[0].total, len(esperados))
+            self.assertFalse(paginas[0].has_previous())
+
+            # Hacia atrás con el cursor 'ant' se recorren las mismas páginas
+            pagina, vistas = paginas[-1], []
+            while pagina.has_previous():
+                pagina = paginador.page(pagina.cursor_anterior)
+                vistas.insert(0, [evento.pk for evento in pagina])
+            self.assertEqual(vistas, [[evento.pk for evento in p] for p in paginas[:-1]])
+
+    def test_cursor_alterado(self):
+        paginador = PaginadorCursor(Evento.objects.all(), 2)
+        cursor = paginador.page().cursor_siguiente
+        for alterado in (cursor[:-1] + ('A' if cursor[-1] != 'A' else 'B'), 'basura', cursor + 'x'):
+            with self.subTest(cursor=alterado), self.assertRaises(Http404):
+                paginador.page(alterado)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 es específico de SQLite')
+class BusquedaTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.creador = User.objects.create_user('organizadora')
+        cls.en_titulo = crear_evento(cls.creador, 10, titulo='Congreso de programación')
+        cls.en_descripcion = crear_evento(cls.creador, 10, titulo='Taller',
+                                          descripcion='Preparamos el congreso anual.')
+        cls.privado = crear_evento(cls.creador, 10, titulo='Congreso interno', privacidad='privado')
+        crear_evento(cls.creador, 10, titulo='Concierto')
+
+    def ids(self, texto, queryset=None):
+        return list(buscar(queryset or Evento.objects.visibles_para(AnonymousUser()), texto)
+                    .values_list('pk', flat=True))
+
+    def test_prefijo_y_relevancia(self):
+        # Cada palabra es un prefijo y el título pesa más que la descripción
+        self.assertEqual(self.ids('congr'), [self.en_titulo.pk, self.en_descripcion.pk])
+        # Todas las palabras deben aparecer, sin distinguir tildes
+        self.assertEqual(self.ids('programacion congreso'), [self.en_titulo.pk])
+        # Las comillas y los operadores de FTS5 se buscan como texto
+        self.assertEqual(self.ids('congreso" OR "concierto'), [])
+
+    def test_respeta_la_visibilidad(self):
+        self.assertNotIn(self.privado.pk, self.ids('congreso'))
+        resultados = self.client.get('/eventos/buscar/', {'q': 'congreso'}).json()['resultados']
+        self.assertEqual([r['id'] for r in resultados], [self.en_titulo.pk, self.en_descripcion.pk])
+        self.assertNotContains(self.client.get('/eventos/', {'q': 'congreso'}), 'Congreso interno')
+
+        self.client.force_login(self.creador)
+        resultados = self.client.get('/eventos/buscar/', {'q': 'interno'}).json()['resultados']
+        self.assertEqual([r['id'] for r in resultados], [self.privado.pk])
+
+    def test_admin(self):
+        self.client.force_login(User.objects.create_superuser('admin'))
+        respuesta = self.client.get('/admin/eventos/evento/', {'q': 'congr'})
+        self.assertEqual(
+            {evento.pk for evento in respuesta.context['cl'].result_list},
+            {self.en_titulo.pk, self.en_descripcion.pk, self.privado.pk},
+        )
+
+    def test_renombrar_al_creador(self):
+        self.assertEqual(len(self.ids('organizadora')), 3)
+        self.creador.username = 'coordinadora'
+        self.creador.save()
+        self.assertEqual(self.ids('organizadora'), [])
+        self.assertEqual(len(self.ids('coordinadora')), 3)
+
+
+class ParticipantesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.creador = User.objects.create_user('creador')
+        cls.asistentes = [User.objects.create_user(f'asistente{i:02}') for i in range(30)]
+        cls.evento = crear_evento(cls.creador, 40)
+        for asistente in cls.asistentes:
+            cls.evento.inscribir(asistente)
+        cls.privado = crear_evento(cls.creador, 10, privacidad='privado')
+        cls.privado.inscribir(cls.asistentes[0])
+
+    def test_paginas(self):
+        url = f'/evento/{self.evento.pk}/participantes/'
+        # El evento y una página de participantes con su perfil: sin COUNT(*)
+        with self.assertNumQueries(2):
+            respuesta = self.client.get(url)
+        self.assertEqual([u.pk for u in respuesta.context['participantes']],
+                         [u.pk for u in self.asistentes[:25]])
+        self.assertContains(respuesta, 'Asistente', count=25)
+        self.assertContains(respuesta, '?page=2')
+
+        respuesta = self.client.get(url, {'page': 2})
+        self.assertEqual([u.pk for u in respuesta.context['participantes']],
+                         [u.pk for u in self.asistentes[25:]])
+        self.assertNotContains(respuesta, '?page=')
+
+        # Las páginas salen del contador inscritos: fuera de rango, la última
+        respuesta = self.client.get(url, {'page': 9})
+        self.assertEqual(respuesta.context['page_obj'].number, 2)
+
+    def test_permisos(self):
+        publico = f'/evento/{self.evento.pk}/participantes/'
+        privado = f'/evento/{self.privado.pk}/participantes/'
+        # Como el detalle: quien ve el evento ve sus participantes
+        self.assertEqual(self.client.get(publico).status_code, 200)
+        self.assertEqual(self.client.get(privado).status_code, 403)
+
+        self.client.force_login(self.asistentes[1])
+        self.assertEqual(self.client.get(publico).status_code, 200)
+        self.assertEqual(self.client.get(privado).status_code, 403)
+
+        self.client.force_login(self.asistentes[0])
+        self.assertEqual(list(self.client.get(privado).context['participantes']), [self.asistentes[0]])
+        self.client.force_login(self.creador)
+        self.assertEqual(self.client.get(privado).status_code, 200)
+        self.assertEqual(self.client.get('/evento/0/participantes/').status_code, 404)
+
+
+class PaginadorEstimadoTest(TestCase):
+    def test_tabla_con_filas_borradas(self):
+        usuario = User.objects.create_user('usuario')
+        evento = crear_evento(usuario, 1)
+        usuarios = User.objects.bulk_create([User(username=f'espera{i}') for i in range(500)])
+        ListaEspera.objects.bulk_create([ListaEspera(evento=evento, user=u) for u in usuarios])
+        ListaEspera.objects.exclude(pk=ListaEspera.objects.order_by('pk').last().pk).delete()
+        # El mayor id (500) no es el número de filas: en tablas pequeñas se cuenta
+        paginador = PaginadorEstimado(ListaEspera.objects.all(), 100)
+        self.assertEqual((paginador.count, paginador.num_pages), (1, 1))
+
+    @skipUnless(connection.vendor == 'sqlite', 'estimación por rango de ids de SQLite')
+    def test_estimacion_en_tablas_grandes(self):
+        tareas = Tarea.objects.bulk_create([Tarea(tipo='prueba') for _ in range(50)])
+        Tarea.objects.filter(pk__lt=tareas[10].pk).delete()
+        with mock.patch('eventos.paginacion.CONTEO_EXACTO_HASTA', 20):
+            self.assertEqual(PaginadorEstimado(Tarea.objects.order_by('pk'), 10).count, 40)
+            self.assertEqual(PaginadorEstimado(Tarea.objects.filter(tipo='prueba').order_by('pk'), 10).count, 40)
+
+
+class ListaEsperaTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuarios = [User.objects.create_user(f'usuario{i}') for i in range(5)]
+        cls.evento = crear_evento(cls.usuarios[0], capacidad=2)
+
+    def test_promocion_en_orden_de_llegada(self):
+        primero, segundo, *espera = self.usuarios
+        self.assertTrue(self.evento.inscribir(primero))
+        self.assertTrue(self.evento.inscribir(segundo))
+        self.assertFalse(self.evento.inscribir(espera[0]))
+        self.assertEqual([self.evento.unirse_lista_espera(u) for u in espera], [1, 2, 3])
+
+        self.evento.cancelar(primero)
+        self.assertTrue(self.evento.participantes.filter(pk=espera[0].pk).exists())
+        self.assertEqual(self.evento.posicion_en_espera(espera[1]), 1)
+        self.assertEqual(self.evento.posicion_en_espera(espera[2]), 2)
+        self.evento.refresh_from_db()
+        self.assertEqual(self.evento.inscritos, 2)
+
+    def test_aumento_de_capacidad_promueve(self):
+        for usuario in self.usuarios[:2]:
+            self.evento.inscribir(usuario)
+        for usuario in self.usuarios[2:]:
+            self.evento.unirse_lista_espera(usuario)
+
+        Evento.objects.filter(pk=self.evento.pk).update(capacidad=4)
+        self.assertEqual(self.evento.promover_lista_espera(), [u.pk for u in self.usuarios[2:4]])
+        self.assertEqual(self.evento.posicion_en_espera(self.usuarios[4]), 1)
+
+    def test_unirse_dos_veces_conserva_el_lugar(self):
+        self.evento.unirse_lista_espera(self.usuarios[1])
+        self.evento.unirse_lista_espera(self.usuarios[2])
+        self.assertEqual(self.evento.unirse_lista_espera(self.usuarios[1]), 1)
+        self.assertEqual(ListaEspera.objects.filter(evento=self.evento).count(), 2)
+
+    def test_inscripcion_directa_respeta_la_lista(self):
+        for usuario in self.usuarios[:2]:
+            self.evento.inscribir(usuario)
+        for usuario in self.usuarios[2:]:
+            self.evento.unirse_lista_espera(usuario)
+
+        # Se libera un cupo: el último de la lista no puede saltarse a los demás
+        Evento.objects.filter(pk=self.evento.pk).update(capacidad=3)
+        self.assertFalse(self.evento.inscribir(self.usuarios[4]))
+        self.assertTrue(self.evento.participantes.filter(pk=self.usuarios[2].pk).exists())
+        self.assertEqual(self.evento.posicion_en_espera(self.usuarios[3]), 1)
+
+        # Quien obtiene cupo directamente sale de la lista de espera
+        Evento.objects.filter(pk=self.evento.pk).update(capacidad=4)
+        self.assertTrue(self.evento.inscribir(self.usuarios[3]))
+        self.assertFalse(ListaEspera.objects.filter(evento=self.evento, user=self.usuarios[3]).exists())
+        self.assertEqual(self.evento.posicion_en_espera(self.usuarios[4]), 1)
+        self.evento.refresh_from_db()
+        self.assertEqual(self.evento.inscritos, 4)
+
+
+class ConflictosHorarioTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('usuario')
+        cls.evento = crear_evento(cls.usuario, capacidad=10)
+
+    def test_inscripciones_superpuestas(self):
+        inicio, fin = self.evento.fecha_inicio, self.evento.fecha_fin
+        solapado = crear_evento(self.usuario, 10, fecha_inicio=fin - timedelta(hours=1), fecha_fin=fin + timedelta(hours=1))
+        contiguo = crear_evento(self.usuario, 10, fecha_inicio=inicio - timedelta(hours=1), fecha_fin=inicio)
+        self.evento.inscribir(self.usuario)
+        self.assertEqual(list(solapado.conflictos_para(self.usuario)), [self.evento])
+        self.assertFalse(contiguo.conflictos_para(self.usuario).exists())
+
+    def test_una_consulta_por_comprobacion(self):
+        otro = crear_evento(self.usuario, 10, ubicacion='Sala 2')
+        list(otro.conflictos_para(self.usuario))
+        # Inscribirse no cambia la duración de ningún evento: duracion_maxima() sigue en caché
+        self.evento.inscribir(self.usuario)
+        with self.assertNumQueries(1):
+            list(otro.conflictos_para(self.usuario))
+        with self.assertNumQueries(1):
+            list(Evento.objects.en_ubicacion('Sala 1', otro.fecha_inicio, otro.fecha_fin))
+
+        # Un evento más largo sí la invalida
+        fin = self.evento.fecha_inicio + timedelta(days=3)
+        largo = crear_evento(self.usuario, 10, ubicacion='Sala 3', fecha_inicio=self.evento.fecha_inicio, fecha_fin=fin)
+        eventos = Evento.objects.en_rango(fin - timedelta(hours=1), fin)
+        self.assertEqual(list(eventos), [largo])
+
+    @override_settings(CONFLICTOS_INSCRIPCION='bloquear')
+    def test_promocion_bloquea_conflictos(self):
+        lleno = crear_evento(self.usuario, 1, ubicacion='Sala 2')
+        ocupante, en_conflicto, siguiente = [User.objects.create_user(f'u{i}') for i in range(3)]
+        lleno.inscribir(ocupante)
+        lleno.unirse_lista_espera(en_conflicto)
+        lleno.unirse_lista_espera(siguiente)
+        # Mientras espera se inscribe en otro evento a la misma hora
+        self.evento.inscribir(en_conflicto)
+
+        self.assertTrue(lleno.cancelar(ocupante))
+        self.assertFalse(lleno.participantes.filter(pk=en_conflicto.pk).exists())
+        self.assertTrue(lleno.participantes.filter(pk=siguiente.pk).exists())
+        self.assertFalse(ListaEspera.objects.filter(evento=lleno).exists())
+
+    def test_ubicacion_reservada(self):
+        datos = {
+            'titulo': 'Otro', 'descripcion': 'Descripción', 'tipo': 'taller', 'privacidad': 'publico',
+            'capacidad': 10, 'ubicacion': 'Sala 1',
+            'fecha_inicio': self.evento.fecha_inicio + timedelta(hours=1),
+            'fecha_fin': self.evento.fecha_fin + timedelta(hours=1),
+        }
+        formulario = EventoForm(data=datos)
+        self.assertIn('ubicacion', formulario.errors)
+        # Editar el propio evento no choca consigo mismo
+        self.assertTrue(EventoForm(data=datos, instance=self.evento).is_valid())
+        self.assertTrue(EventoForm(data={**datos, 'ubicacion': 'Sala 2'}).is_valid())
+
+    @override_settings(DURACION_MAXIMA_EVENTO_DIAS=7)
+    def test_duracion_maxima(self):
+        inicio = self.evento.fecha_fin
+        datos = {
+            'titulo': 'Largo', 'descripcion': 'Descripción', 'tipo': 'taller', 'privacidad': 'publico',
+            'capacidad': 10, 'ubicacion': 'Sala 2', 'fecha_inicio': inicio,
+            'fecha_fin': inicio + timedelta(days=7, minutes=1),
+        }
+        self.assertIn('fecha_fin', EventoForm(data=datos).errors)
+        self.assertTrue(EventoForm(data={**datos, 'fecha_fin': inicio + timedelta(days=7)}).is_valid())
+
+
+class CacheCatalogoTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('usuario', first_name='Ana')
+        cls.evento = crear_evento(cls.usuario, 10)
+
+    def test_version_cambia_otra_vez_al_confirmar(self):
+        inicial = version_catalogo()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.evento.inscribir(User.objects.create_user('otro'))
+                durante = version_catalogo()
+            # Antes de confirmar, otra petición podría cachear el catálogo previo con `durante`
+            self.assertNotEqual(durante, inicial)
+        self.assertNotIn(version_catalogo(), (inicial, durante))
+
+    def test_tarjeta_depende_del_nombre_del_creador(self):
+        evento = Evento.objects.select_related('creador').get(pk=self.evento.pk)
+        antes, version = clave_tarjeta('lista', evento), version_catalogo()
+        self.usuario.first_name = 'Ana María'
+        self.usuario.save()
+        evento = Evento.objects.select_related('creador').get(pk=self.evento.pk)
+        self.assertNotEqual(clave_tarjeta('lista', evento), antes)
+        self.assertNotEqual(version_catalogo(), version)
+
+
+class RespuestaCondicionalTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('usuario')
+        cls.evento = crear_evento(cls.usuario, 10)
+        # Fecha de modificación en un segundo anterior al de las inscripciones de la prueba
+        Evento.objects.filter(pk=cls.evento.pk).update(fecha_actualizacion=timezone.now() - timedelta(hours=1))
+
+    def test_lista_304_y_cabeceras(self):
+        respuesta = self.client.get('/eventos/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('private', respuesta['Cache-Control'])
+        self.assertIn('no-cache', respuesta['Cache-Control'])
+        self.assertIn('Cookie', respuesta['Vary'])
+        etag = respuesta['ETag']
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/eventos/', headers={'if_none_match': etag}).status_code, 304)
+        self.evento.inscribir(User.objects.create_user('otro'))
+        nueva = self.client.get('/eventos/', headers={'if_none_match': etag})
+        self.assertEqual(nueva.status_code, 200)
+        self.assertNotEqual(nueva['ETag'], etag)
+
+    def test_detalle_etag_y_last_modified(self):
+        self.client.force_login(self.usuario)
+        url = f'/evento/{self.evento.pk}/'
+        respuesta = self.client.get(url)
+        etag, modificado = respuesta['ETag'], respuesta['Last-Modified']
+        self.assertIn('Cookie', respuesta['Vary'])
+        self.assertEqual(self.client.get(url, headers={'if_none_match': etag}).status_code, 304)
+        self.assertEqual(self.client.get(url, headers={'if_modified_since': modificado}).status_code, 304)
+
+        # Inscribirse cambia el ETag (y la fecha de modificación) del detalle
+        self.evento.inscribir(self.usuario)
+        nueva = self.client.get(url, headers={'if_none_match': etag})
+        self.assertEqual(nueva.status_code, 200)
+        self.assertNotEqual(nueva['ETag'], etag)
+        self.assertEqual(self.client.get(url, headers={'if_modified_since': modificado}).status_code, 200)
+
+
+def urls_con(modulo):
+    """
+    URLconf con la lista y el detalle de `modulo` (views o vistas_async)
+    """
+    class Urls:
+        urlpatterns = [
+            path('eventos/', modulo.ListaEventosView.as_view()),
+            path('evento/<int:pk>/', modulo.DetalleEventoView.as_view()),
+            path('', include(settings.ROOT_URLCONF)),
+        ]
+    return Urls
+
+
+class VistasAsyncTest(TestCase):
+    """
+    Las vistas asíncronas responden lo mismo que las síncronas
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('usuario')
+        cls.publico = crear_evento(cls.usuario, 1)
+        cls.privado = crear_evento(cls.usuario, 10, privacidad='privado')
+        cls.lleno = crear_evento(User.objects.create_user('otro'), 0)
+
+    def respuesta_sincrona(self, url, **headers):
+        with override_settings(ROOT_URLCONF=urls_con(views)):
+            return self.client.get(url, headers=headers)
+
+    async def respuesta_asincrona(self, url, **headers):
+        with override_settings(ROOT_URLCONF=urls_con(vistas_async)):
+            return await self.async_client.get(url, headers=headers)
+
+    async def comparar(self, url):
+        sincrona = await sync_to_async(self.respuesta_sincrona)(url)
+        asincrona = await self.respuesta_asincrona(url)
+        self.assertEqual(asincrona.status_code, sincrona.status_code, url)
+        self.assertEqual(asincrona.get('ETag'), sincrona.get('ETag'), url)
+        if 'ETag' in sincrona:
+            # Cada implementación acepta el ETag de la otra
+            asincrona = await self.respuesta_asincrona(url, if_none_match=sincrona['ETag'])
+            self.assertEqual(asincrona.status_code, 304, url)
+
+    async def test_mismo_estado_y_etag(self):
+        urls = ['/eventos/', f'/evento/{self.publico.pk}/', f'/evento/{self.privado.pk}/',
+                f'/evento/{self.lleno.pk}/', '/evento/0/']
+        for url in urls:
+            await self.comparar(url)
+
+        await sync_to_async(self.client.force_login)(self.usuario)
+        await self.async_client.aforce_login(self.usuario)
+        await sync_to_async(self.publico.inscribir)(self.usuario)
+        for url in urls:
+            await self.comparar(url)
+
+
+class ExportarParticipantesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = User.objects.create_user('organizador')
+        cambiar_rol([cls.organizador.pk], 'organizador')
+        cls.asistentes = [User.objects.create_user(f'asistente{i}', email=f'a{i}@example.com') for i in range(3)]
+        cls.evento = crear_evento(cls.organizador, 10, titulo='Taller, con coma')
+        for asistente in cls.asistentes:
+            cls.evento.inscribir(asistente)
+        cls.url = f'/evento/{cls.evento.pk}/participantes/exportar/'
+
+    def setUp(self):
+        # cambiar_rol en una prueba deja su caché de acceso tras el rollback
+        reiniciar_acceso()
+
+    def descargar(self, consulta=''):
+        respuesta = self.client.get(self.url + consulta)
+        self.assertTrue(respuesta.streaming)
+        return respuesta, b''.join(respuesta.streaming_content).decode()
+
+    def test_csv_y_json(self):
+        self.client.force_login(self.organizador)
+        respuesta, contenido = self.descargar()
+        self.assertEqual(respuesta['Content-Type'], 'text/csv; charset=utf-8')
+        filas = list(csv.reader(io.StringIO(contenido)))
+        self.assertEqual(filas[0], [nombre for nombre, _ in COLUMNAS_PARTICIPANTES])
+        self.assertEqual([fila[2] for fila in filas[1:]], [u.username for u in self.asistentes])
+        self.assertEqual(filas[1][1], 'Taller, con coma')
+        self.assertEqual(filas[1][-1], 'Asistente')
+
+        respuesta, contenido = self.descargar('?formato=json')
+        self.assertEqual(respuesta['Content-Type'], 'application/json')
+        datos = json.loads(contenido)
+        self.assertEqual([fila['email'] for fila in datos], [u.email for u in self.asistentes])
+
+    def test_requiere_el_permiso_de_edicion(self):
+        self.client.force_login(self.asistentes[0])
+        self.assertRedirects(self.client.get(self.url), '/acceso-denegado/')
+        # El creador sin el permiso change_evento tampoco puede exportar (como al editar)
+        cambiar_rol([self.organizador.pk], 'asistente')
+        self.client.force_login(self.organizador)
+        self.assertRedirects(self.client.get(self.url), '/acceso-denegado/')
+        self.assertRedirects(self.client.get(f'/evento/{self.evento.pk}/editar/'), '/acceso-denegado/')
+
+
+class MetricasTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', is_staff=True)
+        crear_evento(cls.staff, capacidad=10)
+
+    def test_registra_consultas_y_plantillas_por_vista(self):
+        self.client.get('/eventos/')
+        # La suma del histograma de consultas acumula las de todas las peticiones
+        self.assertGreater(metricas.CONSULTAS.series['lista_eventos'][-1], 0)
+        self.assertGreater(metricas.PLANTILLAS.series['lista_eventos'][-1], 0)
+
+    @override_settings(METRICAS_TOKEN='secreto')
+    def test_acceso_al_endpoint(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        respuesta = self.client.get('/metrics/', headers={'Authorization': 'Bearer secreto'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('eventos_peticion_segundos_bucket', respuesta.content.decode())
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get('/metrics/').status_code, 200)
+
+
+class ArchivoTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('usuario')
+        cls.otro = User.objects.create_user('otro')
+        hace_dos_anios = timezone.now() - timedelta(days=730)
+        cls.viejo = crear_evento(cls.usuario, 1, titulo='Congreso antiguo', fecha_inicio=hace_dos_anios,
+                                 fecha_fin=hace_dos_anios + timedelta(hours=2), privacidad='privado')
+        cls.viejo.inscribir(cls.usuario)
+        cls.viejo.unirse_lista_espera(cls.otro)
+        cls.vigente = crear_evento(cls.usuario, 10)
+
+    def test_archivar_y_restaurar(self):
+        creado = self.viejo.fecha_creacion
+        self.assertEqual(archivar(lote=1), 1)
+        self.assertEqual(list(Evento.objects.all()), [self.vigente])
+        self.assertFalse(ListaEspera.objects.exists())
+        self.assertFalse(buscar(Evento.objects.all(), 'congreso').filter(pk=self.viejo.pk).exists())
+        archivado = EventoArchivado.objects.get(pk=self.viejo.pk)
+        self.assertEqual(list(self.usuario.eventos_archivados.all()), [archivado])
+
+        self.assertEqual(restaurar([self.viejo.pk]), 1)
+        evento = Evento.objects.get(pk=self.viejo.pk)
+        self.assertEqual((evento.inscritos, evento.fecha_creacion), (1, creado))
+        self.assertTrue(evento.participantes.filter(pk=self.usuario.pk).exists())
+        self.assertTrue(buscar(Evento.objects.all(), 'congreso').filter(pk=evento.pk).exists())
+        self.assertFalse(EventoArchivado.objects.exists())
+
+    def test_historial_respeta_la_visibilidad(self):
+        archivar()
+        self.assertNotContains(self.client.get('/eventos/historial/'), self.viejo.titulo)
+        self.client.force_login(self.usuario)
+        self.assertContains(self.client.get('/mis-eventos/historial/'), self.viejo.titulo)
+        self.assertContains(self.client.get('/eventos/historial/'), self.viejo.titulo)
+
+
+class TareasTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = User.objects.create_user('organizador', email='organizador@example.com')
+        cls.usuario = User.objects.create_user('usuario', email='usuario@example.com')
+        inicio = timezone.now() + timedelta(days=3)
+        cls.evento = crear_evento(cls.organizador, 1, fecha_inicio=inicio, fecha_fin=inicio + timedelta(hours=2))
+
+    def test_inscripcion_encola_y_envia_correos(self):
+        self.evento.inscribir(self.usuario)
+        self.assertEqual(sorted(Tarea.objects.values_list('tipo', flat=True)),
+                         ['confirmar_inscripcion', 'notificar_organizador', 'recordatorio'])
+        # Evento lleno: no hay inscripción ni tareas nuevas
+        self.assertFalse(self.evento.inscribir(self.organizador))
+        self.assertEqual(Tarea.objects.count(), 3)
+
+        call_command('procesar_tareas', una_vez=True, stdout=open(os.devnull, 'w'))
+        # El recordatorio espera hasta 24 horas antes del evento
+        self.assertEqual(sorted(correo.to[0] for correo in mail.outbox),
+                         ['organizador@example.com', 'usuario@example.com'])
+        self.assertEqual(Tarea.objects.filter(estado='completada').count(), 2)
+        self.assertTrue(Tarea.objects.filter(tipo='recordatorio', estado='pendiente').exists())
+
+    @override_settings(TAREAS_MAX_INTENTOS=2)
+    def test_reintento_con_espera_y_fallo_definitivo(self):
+        self.evento.inscribir(self.usuario)
+        self.evento.cancelar(self.usuario)
+        tarea = Tarea.objects.create(tipo='falla', datos={})
+        def fallar(datos):
+            raise ConnectionError('sin servidor')
+        with mock.patch.dict(MANEJADORES, falla=fallar), self.assertLogs('eventos.tareas') as registros:
+            procesar_lote('prueba')
+            tarea.refresh_from_db()
+            self.assertEqual((tarea.estado, tarea.intentos), ('pendiente', 1))
+            self.assertGreater(tarea.ejecutar_despues, timezone.now())
+            self.assertIn('sin servidor', tarea.ultimo_error)
+            # Los demás correos del lote salen igual
+            self.assertEqual(len(mail.outbox), 4)
+
+            Tarea.objects.filter(pk=tarea.pk).update(ejecutar_despues=timezone.now())
+            procesar_lote('prueba')
+            tarea.refresh_from_db()
+            self.assertEqual((tarea.estado, tarea.intentos), ('fallida', 2))
+        self.assertEqual([registro.levelname for registro in registros.records], ['WARNING', 'ERROR'])
+
+    def test_resultado_de_tarea_reclamada_por_otro(self):
+        lenta = Tarea.objects.create(tipo='lenta', datos={})
+        fallida = Tarea.objects.create(tipo='falla', datos={})
+
+        def retomar(tarea):
+            # Simula que el bloqueo venció y otro trabajador la reclamó mientras tanto
+            Tarea.objects.filter(pk=tarea.pk).update(trabajador='otro', intentos=F('intentos') + 1)
+
+        def lenta_manejador(datos):
+            retomar(lenta)
+
+        def falla_manejador(datos):
+            retomar(fallida)
+            raise ConnectionError('sin servidor')
+
+        with mock.patch.dict(MANEJADORES, lenta=lenta_manejador, falla=falla_manejador), \
+                self.assertLogs('eventos.tareas'):
+            procesar_lote('prueba')
+        for tarea in (lenta, fallida):
+            tarea.refresh_from_db()
+            self.assertEqual((tarea.estado, tarea.trabajador, tarea.ultimo_error), ('en_curso', 'otro', ''))
+
+
+class CalendarioIcsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('usuario')
+        cls.publico = crear_evento(cls.usuario, 10, titulo='Concierto; al aire libre, gratis',
+                                   descripcion='Música en vivo.\n' * 10)
+        cls.privado = crear_evento(cls.usuario, 10, titulo='Reunión privada', privacidad='privado')
+        cls.privado.inscribir(cls.usuario)
+
+    def setUp(self):
+        cache.clear()
+
+    def leer(self, url, **headers):
+        respuesta = self.client.get(url, headers=headers)
+        contenido = b''.join(respuesta.streaming_content) if respuesta.streaming else respuesta.content
+        return respuesta, contenido.decode()
+
+    def test_feed_cacheado_y_condicional(self):
+        with self.assertNumQueries(1):
+            respuesta, contenido = self.leer('/eventos/calendario.ics')
+        self.assertEqual(respuesta['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertIn('SUMMARY:Concierto\\; al aire libre\\, gratis\r\n', contenido)
+        self.assertNotIn('privada', contenido)
+        self.assertTrue(all(len(linea.encode()) <= 75 for linea in contenido.split('\r\n')))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.leer('/eventos/calendario.ics')[1], contenido)
+            no_modificada, _ = self.leer('/eventos/calendario.ics', if_none_match=respuesta['ETag'])
+        self.assertEqual(no_modificada.status_code, 304)
+
+        # Cualquier cambio en el catálogo invalida el feed y su ETag
+        self.publico.inscribir(User.objects.create_user('otro'))
+        otra, _ = self.leer('/eventos/calendario.ics', if_none_match=respuesta['ETag'])
+        self.assertEqual(otra.status_code, 200)
+
+    def test_feed_personal_con_token(self):
+        url = f'/mis-eventos/{token_para(self.usuario)}/calendario.ics'
+        contenido = self.leer(url)[1]
+        self.assertIn(f'UID:evento-{self.privado.pk}@testserver', contenido)
+        self.assertNotIn(f'evento-{self.publico.pk}@', contenido)
+        self.assertEqual(self.client.get(f'/mis-eventos/{self.usuario.pk}:falso/calendario.ics').status_code, 404)
+
+        self.privado.cancelar(self.usuario)
+        self.assertNotIn('VEVENT', self.leer(url)[1])
+
+    def test_claves_por_usuario_no_desplazan_las_globales(self):
+        # Las versiones globales no comparten caché con las de cada usuario: aunque
+        # haya más usuarios que MAX_ENTRIES de 'versiones', no se descartan
+        versiones = (version_catalogo(), version_fechas())
+        for user_id in range(1, 1001):
+            version_usuario(user_id)
+        self.assertEqual((version_catalogo(), version_fechas()), versiones)
+
+    def test_feed_personal_versionado_por_usuario(self):
+        url = f'/mis-eventos/{token_para(self.usuario)}/calendario.ics'
+        etag = self.leer(url)[0]['ETag']
+        # Las inscripciones de otros no tocan este feed: sigue en caché, sin consultas
+        self.publico.inscribir(User.objects.create_user('otro'))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.leer(url, if_none_match=etag)[0].status_code, 304)
+
+        self.publico.inscribir(self.usuario)
+        respuesta, contenido = self.leer(url, if_none_match=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn(f'UID:evento-{self.publico.pk}@testserver', contenido)
+
+        # Editar un evento del feed también lo invalida
+        etag = respuesta['ETag']
+        self.publico.titulo = 'Concierto reprogramado'
+        self.publico.save()
+        self.assertIn('SUMMARY:Concierto reprogramado', self.leer(url, if_none_match=etag)[1])
+
+        self.usuario.is_active = False
+        self.usuario.save(update_fields=['is_active'])
+        self.assertNotIn('VEVENT', self.leer(url)[1])
+
+    def test_regenerar_revoca_el_enlace(self):
+        anterior = f'/mis-eventos/{token_para(self.usuario)}/calendario.ics'
+        self.assertEqual(self.client.get(anterior).status_code, 200)
+        # Un token con el formato anterior (solo el id firmado) no es válido
+        sin_secreto = signing.Signer(salt='eventos.icalendario').sign(str(self.usuario.pk))
+        self.assertEqual(self.client.get(f'/mis-eventos/{sin_secreto}/calendario.ics').status_code, 404)
+
+        self.client.force_login(self.usuario)
+        self.assertEqual(self.client.get('/mis-eventos/calendario/regenerar/').status_code, 405)
+        self.assertRedirects(self.client.post('/mis-eventos/calendario/regenerar/'), '/mis-eventos/')
+        self.assertEqual(self.client.get(anterior).status_code, 404)
+        nueva = f'/mis-eventos/{token_para(self.usuario)}/calendario.ics'
+        self.assertNotEqual(nueva, anterior)
+        self.assertEqual(self.client.get(nueva).status_code, 200)
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('usuario')
+        inicio = timezone.now() + timedelta(days=1)
+        # Dos eventos con la misma fecha para que el cursor desempate por id
+        for dias in [0, 0, 1, 2, 3]:
+            crear_evento(cls.usuario, 10, fecha_inicio=inicio + timedelta(days=dias),
+                         fecha_fin=inicio + timedelta(days=dias, hours=2))
+        crear_evento(cls.usuario, 10, privacidad='privado')
+        cls.ids = list(Evento.objects.filter(privacidad='publico')
+                       .order_by('-fecha_inicio', '-id').values_list('pk', flat=True))
+
+    def test_campos(self):
+        datos = self.client.get('/api/eventos/', {'fields': 'id, titulo'}).json()
+        self.assertEqual(set(datos['resultados'][0]), {'id', 'titulo'})
+
+        respuesta = self.client.get('/api/eventos/', {'fields': 'titulo,clave,creador__password'})
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('clave', respuesta.json()['error'])
+        self.assertIn('creador__password', respuesta.json()['error'])
+
+        evento = self.client.get(f'/api/eventos/{self.ids[0]}/', {'fields': 'creador'}).json()
+        self.assertEqual(evento, {'creador': 'usuario', 'url': f'/evento/{self.ids[0]}/'})
+
+    def test_limite(self):
+        def cantidad(limite):
+            return len(self.client.get('/api/eventos/', {'limite': limite}).json()['resultados'])
+
+        self.assertEqual(cantidad(2), 2)
+        # Fuera de rango se ajusta a [1, LIMITE_MAXIMO]
+        self.assertEqual(cantidad(0), 1)
+        self.assertEqual(cantidad(-5), 1)
+        self.assertEqual(cantidad(10 ** 6), len(self.ids))
+        self.assertEqual(self.client.get('/api/eventos/', {'limite': 'diez'}).status_code, 400)
+
+    def test_cursor_ida_y_vuelta(self):
+        paginas = [self.client.get('/api/eventos/', {'limite': 2, 'fields': 'id'}).json()]
+        while paginas[-1]['siguiente']:
+            paginas.append(self.client.get(paginas[-1]['siguiente']).json())
+        self.assertEqual([fila['id'] for pagina in paginas for fila in pagina['resultados']], self.ids)
+        self.assertIsNone(paginas[0]['anterior'])
+
+        # El enlace anterior devuelve la página previa tal cual
+        anterior = self.client.get(paginas[-1]['anterior']).json()
+        self.assertEqual(anterior['resultados'], paginas[-2]['resultados'])
+
+        respuesta = self.client.get('/api/eventos/', {'cursor': 'sig:manipulado'})
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_mis_eventos_requiere_sesion(self):
+        respuesta = self.client.get('/api/mis-eventos/')
+        self.assertEqual(respuesta.status_code, 401)
+        self.assertEqual(respuesta.json(), {'error': 'Autenticación requerida.'})
+
+        Evento.objects.get(pk=self.ids[0]).inscribir(self.usuario)
+        self.client.force_login(self.usuario)
+        datos = self.client.get('/api/mis-eventos/', {'fields': 'id'}).json()
+        self.assertEqual(datos['resultados'], [{'id': self.ids[0]}])
+
+    def test_etag(self):
+        respuesta = self.client.get('/api/eventos/')
+        etag = respuesta['ETag']
+        self.assertIn('Cookie', respuesta['Vary'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/eventos/', headers={'if_none_match': etag}).status_code, 304)
+        # Otros parámetros, otro ETag
+        self.assertNotEqual(self.client.get('/api/eventos/', {'fields': 'id'})['ETag'], etag)
+
+        url = f'/api/eventos/{self.ids[0]}/'
+        etag_evento = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, headers={'if_none_match': etag_evento}).status_code, 304)
+        Evento.objects.get(pk=self.ids[0]).inscribir(self.usuario)
+        self.assertEqual(self.client.get('/api/eventos/', headers={'if_none_match': etag}).status_code, 200)
+        self.assertEqual(self.client.get(url, headers={'if_none_match': etag_evento}).status_code, 200)
+
+    def test_privado_no_visible(self):
+        privado = Evento.objects.get(privacidad='privado')
+        self.assertEqual(self.client.get(f'/api/eventos/{privado.pk}/').status_code, 404)
+
+
+class PresupuestoConsultasTest(TestCase):
+    """
+    Cada ruta de RUTAS con su cantidad de consultas: falla ante un N+1 o una consulta nueva
+    """
+    @classmethod
+    def setUpTestData(cls):
+        generar_datos(60, 40, 300)
+        # Los eventos de más de un año pasan al archivo, que también recorre el historial
+        archivar()
+
+    def test_rutas(self):
+        escenario = EscenarioRutas()
+        # La primera pasada llena las cachés; la segunda parte del estado que deja cada pasada
+        escenario.pasada()
+        for ruta in RUTAS:
+            with self.subTest(ruta=escenario.url(ruta), actor=ruta[1]), self.assertNumQueries(ruta[4]):
+                self.assertLess(escenario.pedir(ruta).status_code, 400)
+            escenario.reponer(ruta)
+
+
+class ListaEsperaConcurrenciaTest(TransactionTestCase):
+    """
+    Varios hilos se inscriben, cancelan y se unen a la lista de espera a la vez.
+    Al final nunca se supera la capacidad, el contador coincide con las
+    inscripciones y nadie está inscrito y en espera al mismo tiempo.
+    """
+    hilos = 8
+    operaciones = 40
+    capacidad = 5
+
+    def setUp(self):
+        self.usuarios = [User.objects.create_user(f'usuario{i}') for i in range(20)]
+        self.evento = crear_evento(self.usuarios[0], capacidad=self.capacidad)
+
+    @staticmethod
+    def reintentar(funcion, *args):
+        # La base de pruebas de SQLite (en memoria, caché compartida) no respeta
+        # busy_timeout: un bloqueo falla de inmediato. Cada operación es atómica,
+        # así que basta con reintentarla tras una pausa
+        for _ in range(200):
+            try:
+                return funcion(*args)
+            except OperationalError:
+                time.sleep(0.002)
+        raise AssertionError('La operación no pudo completarse por bloqueos')
+
+    def trabajador(self, semilla, errores, completadas):
+        rnd = random.Random(semilla)
+        try:
+            evento = self.reintentar(lambda: Evento.objects.get(pk=self.evento.pk))
+            for _ in range(self.operaciones):
+                usuario = rnd.choice(self.usuarios)
+                operacion = rnd.choice([evento.inscribir, evento.cancelar, evento.unirse_lista_espera])
+                self.reintentar(operacion, usuario)
+                completadas.append(1)
+        except Exception as error:
+            errores.append(error)
+        finally:
+            connection.close()
+
+    def test_invariantes_bajo_concurrencia(self):
+        errores, completadas = [], []
+        hilos = [
+            threading.Thread(target=self.trabajador, args=(semilla, errores, completadas))
+            for semilla in range(self.hilos)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(errores, [])
+        self.assertEqual(len(completadas), self.hilos * self.operaciones)
+
+        # Una última cancelación promueve a quien corresponda
+        inscritos = list(self.evento.participantes.values_list('pk', flat=True))
+        if inscritos:
+            self.evento.cancelar(User.objects.get(pk=inscritos[0]))
+
+        self.evento.refresh_from_db()
+        participantes = set(self.evento.participantes.values_list('pk', flat=True))
+        en_espera = set(ListaEspera.objects.filter(evento=self.evento).values_list('user_id', flat=True))
+        self.assertLessEqual(len(participantes), self.capacidad)
+        self.assertEqual(self.evento.inscritos, len(participantes))
+        self.assertFalse(participantes & en_espera)
+        if en_espera:
+            # Si queda gente esperando es porque el evento está lleno
+            self.assertEqual(len(participantes), self.capacidad)
@@ -1,15 +1,37 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, views, vistas_async
+
+# Vistas de lectura: asíncronas bajo ASGI, síncronas bajo WSGI
+lectura = vistas_async if settings.VISTAS_ASYNC else views
 
 urlpatterns = [
-    path('', views.inicio, name='inicio'),
-    path('eventos/', views.ListaEventosView.as_view(), name='lista_eventos'),
-    path('evento/<int:pk>/', views.DetalleEventoView.as_view(), name='detalle_evento'),
+    path('', lectura.inicio, name='inicio'),
+    path('eventos/', lectura.ListaEventosView.as_view(), name='lista_eventos'),
+    path('eventos/buscar/', views.buscar_eventos, name='buscar_eventos'),
+    path('eventos/calendario/', views.calendario, name='calendario'),
+    path('eventos/calendario/<int:anio>/<int:mes>/', views.calendario, name='calendario_mes'),
+    path('eventos/calendario.ics', views.calendario_ics, name='calendario_ics'),
+    path('evento/<int:pk>/', lectura.DetalleEventoView.as_view(), name='detalle_evento'),
+    path('evento/<int:pk>/participantes/', views.participantes_evento, name='participantes_evento'),
+    path('evento/<int:pk>/participantes/exportar/', views.exportar_participantes, name='exportar_participantes'),
+    path('eventos/exportar/', views.exportar_catalogo, name='exportar_catalogo'),
     path('evento/crear/', views.CrearEventoView.as_view(), name='crear_evento'),
     path('evento/<int:pk>/editar/', views.EditarEventoView.as_view(), name='editar_evento'),
     path('evento/<int:pk>/eliminar/', views.EliminarEventoView.as_view(), name='eliminar_evento'),
     path('evento/<int:evento_id>/inscribirse/', views.inscribirse_evento, name='inscribirse_evento'),
     path('evento/<int:evento_id>/cancelar/', views.cancelar_inscripcion, name='cancelar_inscripcion'),
-    path('mis-eventos/', views.mis_eventos, name='mis_eventos'),
+    path('evento/<int:evento_id>/lista-espera/', views.unirse_lista_espera, name='unirse_lista_espera'),
+    path('evento/<int:evento_id>/lista-espera/salir/', views.salir_lista_espera, name='salir_lista_espera'),
+    path('mis-eventos/', lectura.mis_eventos, name='mis_eventos'),
+    path('mis-eventos/historial/', views.mis_eventos_historial, name='mis_eventos_historial'),
+    path('mis-eventos/<str:token>/calendario.ics', views.mis_eventos_ics, name='calendario_mis_eventos'),
+    path('mis-eventos/calendario/regenerar/', views.regenerar_calendario, name='regenerar_calendario'),
+    path('eventos/historial/', views.historial, name='historial'),
+    path('cache/estadisticas/', views.estadisticas_cache, name='estadisticas_cache'),
+    path('metrics/', views.metricas, name='metricas'),
+    path('api/eventos/', api.eventos, name='api_eventos'),
+    path('api/eventos/<int:pk>/', api.evento, name='api_evento'),
+    path('api/mis-eventos/', api.mis_eventos, name='api_mis_eventos'),
     path('acceso-denegado/', views.acceso_denegado, name='acceso_denegado'),
 ]
\ No newline at end of file
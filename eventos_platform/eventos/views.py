@@ -1,12 +1,77 @@
+import calendar
+from datetime import datetime, timedelta
+
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, HttpResponse, JsonResponse
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import transaction
+from django.views.decorators.http import require_POST
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
-from django.urls import reverse_lazy
-from django.db.models import Q
-from .models import Evento
+from django.urls import reverse, reverse_lazy
+from .models import Evento, EventoArchivado, ve_eventos_privados
+from .fechas import inicio_del_dia
 from .forms import EventoForm
+from .paginacion import PaginadorCursor
+from .exportacion import (
+    COLUMNAS_CATALOGO, COLUMNAS_PARTICIPANTES, filas_catalogo, filas_participantes,
+    respuesta_exportacion,
+)
+from .busqueda import buscar, construir_consulta
+from .icalendario import regenerar_secreto, respuesta_feed, url_feed_personal, usuario_del_token
+from .metricas import exponer
+from .cache import (
+    clave_inicio_anonimo, registrar, estadisticas, etag_para, version_catalogo, version_fechas,
+    version_usuario, timeout as cache_timeout,
+)
+
+
+PARTICIPANTES_POR_PAGINA = 25
+EVENTOS_POR_DIA_CALENDARIO = 3
+EVENTOS_POR_PAGINA_HISTORIAL = 24
+FILTROS_CUANDO = ['proximos', 'fin_de_semana', 'pasados', 'todos']
+
+
+def _leer_fecha(valor):
+    try:
+        return parse_date(valor or '')
+    except ValueError:
+        return None
+
+
+def leer_filtro_fechas(parametros):
+    """
+    Interpreta ?cuando= y ?desde=/?hasta= (AAAA-MM-DD, ambos inclusive).
+    Retorna (cuando, desde, hasta); un rango explícito tiene prioridad.
+    """
+    desde = _leer_fecha(parametros.get('desde'))
+    hasta = _leer_fecha(parametros.get('hasta'))
+    if desde or hasta:
+        desde, hasta = desde or hasta, hasta or desde
+        return 'rango', min(desde, hasta), max(desde, hasta)
+
+    cuando = parametros.get('cuando')
+    if cuando == 'fin_de_semana':
+        # El fin de semana en curso o, entre lunes y viernes, el siguiente
+        hoy = timezone.localdate()
+        sabado = hoy - timedelta(days=hoy.weekday()) + timedelta(days=5)
+        return cuando, sabado, sabado + timedelta(days=1)
+    if cuando not in FILTROS_CUANDO:
+        cuando = 'proximos'
+    return cuando, None, None
 
 
 # ========== Vistas basadas en funciones ==========
@@ -15,20 +80,45 @@ def inicio(request):
     """
     Página de inicio - muestra eventos públicos
     """
-    if request.user.is_authenticated:
-        # Usuarios autenticados ven eventos públicos y privados (si tienen permiso)
-        if request.user.has_perm('eventos.puede_ver_eventos_privados') or request.user.perfil.rol in ['administrador', 'organizador']:
-            eventos = Evento.objects.all()[:6]
-        else:
-            # Asistentes ven solo públicos y donde están inscritos
-            eventos = Evento.objects.filter(
-                Q(privacidad='publico') | Q(participantes=request.user)
-            ).distinct()[:6]
-    else:
-        # Usuarios no autenticados solo ven públicos
-        eventos = Evento.objects.filter(privacidad='publico')[:6]
+    # Para anónimos la página es idéntica: se sirve desde caché salvo que haya mensajes pendientes
+    if not request.user.is_authenticated and not len(messages.get_messages(request)):
+        clave = clave_inicio_anonimo()
+        html = cache.get(clave)
+        registrar('inicio', acierto=html is not None)
+        if html is None:
+            html = render_to_string('eventos/inicio.html', _contexto_inicio(request), request)
+            cache.set(clave, html, cache_timeout())
+        return HttpResponse(html)
     
-    return render(request, 'eventos/inicio.html', {'eventos': eventos})
+    return render(request, 'eventos/inicio.html', _contexto_inicio(request))
+
+
+def _contexto_inicio(request):
+    user = request.user
+    context = {'eventos': Evento.objects.visibles_para(user).para_tarjetas(user)[:6]}
+    if user.is_authenticated:
+        context['total_inscritos'] = user.eventos_inscritos.count()
+        context['total_creados'] = user.eventos_creados.count()
+    return context
+
+
+@staff_member_required
+def estadisticas_cache(request):
+    """
+    Aciertos y fallos de la caché de fragmentos (solo personal)
+    """
+    return JsonResponse(estadisticas())
+
+
+def metricas(request):
+    """
+    Métricas de este proceso en formato Prometheus (personal o token de METRICAS_TOKEN)
+    """
+    token = settings.METRICAS_TOKEN
+    autorizado = token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if not (autorizado or (request.user.is_active and request.user.is_staff)):
+        raise PermissionDenied
+    return HttpResponse(exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 @login_required
@@ -36,8 +126,11 @@ def mis_eventos(request):
     """
     Eventos donde el usuario está inscrito
     """
-    eventos_inscritos = request.user.eventos_inscritos.all()
-    return render(request, 'eventos/mis_eventos.html', {'eventos': eventos_inscritos})
+    eventos_inscritos = request.user.eventos_inscritos.para_tarjetas(request.user)
+    return render(request, 'eventos/mis_eventos.html', {
+        'eventos': eventos_inscritos,
+        'url_calendario': url_feed_personal(request.user),
+    })
 
 
 @login_required
@@ -52,18 +145,74 @@ def inscribirse_evento(request, evento_id):
         messages.error(request, 'No tienes permiso para acceder a este evento privado.')
         return redirect('acceso_denegado')
     
-    # Verificar capacidad
-    if evento.esta_lleno():
-        messages.warning(request, 'Este evento ha alcanzado su capacidad máxima.')
-        return redirect('detalle_evento', pk=evento.id)
-    
     # Verificar si ya está inscrito
-    if request.user in evento.participantes.all():
+    if evento.participantes.filter(pk=request.user.pk).exists():
         messages.info(request, 'Ya estás inscrito en este evento.')
+        return redirect('detalle_evento', pk=evento.id)
+    
+    conflictos = _conflictos_horario(request.user, evento)
+    if conflictos and settings.CONFLICTOS_INSCRIPCION == 'bloquear':
+        messages.error(request, f'No puedes inscribirte: el evento se superpone con {conflictos}.')
+    # La capacidad se verifica en la misma escritura que registra la inscripción
+    elif evento.inscribir(request.user):
+        messages.success(request, f'Te has inscrito exitosamente en "{evento.titulo}".')
+        if conflictos:
+            messages.warning(request, f'Atención: este evento se superpone con {conflictos}.')
     else:
-        evento.participantes.add(request.user)
+        messages.warning(request, 'Este evento ha alcanzado su capacidad máxima. Puedes unirte a la lista de espera.')
+    
+    return redirect('detalle_evento', pk=evento.id)
+
+
+def _conflictos_horario(user, evento):
+    """
+    Títulos (hasta tres) de los eventos del usuario que se superponen con `evento`
+    """
+    titulos = evento.conflictos_para(user).values_list('titulo', flat=True)[:3]
+    return ', '.join(f'"{titulo}"' for titulo in titulos)
+
+
+@login_required
+def unirse_lista_espera(request, evento_id):
+    """
+    Agregar al usuario a la lista de espera de un evento lleno
+    """
+    evento = get_object_or_404(Evento, id=evento_id)
+    
+    if evento.privacidad == 'privado' and not request.user.has_perm('eventos.puede_ver_eventos_privados'):
+        messages.error(request, 'No tienes permiso para acceder a este evento privado.')
+        return redirect('acceso_denegado')
+    
+    if settings.CONFLICTOS_INSCRIPCION == 'bloquear':
+        conflictos = _conflictos_horario(request.user, evento)
+        if conflictos:
+            messages.error(request, f'No puedes inscribirte: el evento se superpone con {conflictos}.')
+            return redirect('detalle_evento', pk=evento.id)
+    
+    # Si se liberó un cupo mientras tanto, se inscribe directamente
+    if evento.inscribir(request.user):
         messages.success(request, f'Te has inscrito exitosamente en "{evento.titulo}".')
+        return redirect('detalle_evento', pk=evento.id)
+    
+    posicion = evento.unirse_lista_espera(request.user)
+    if posicion is None:
+        messages.info(request, 'Ya estás inscrito en este evento.')
+    else:
+        messages.success(request, f'Estás en la lista de espera de "{evento.titulo}" (posición {posicion}).')
+    return redirect('detalle_evento', pk=evento.id)
+
+
+@login_required
+def salir_lista_espera(request, evento_id):
+    """
+    Quitar al usuario de la lista de espera
+    """
+    evento = get_object_or_404(Evento, id=evento_id)
     
+    if evento.salir_lista_espera(request.user):
+        messages.success(request, f'Saliste de la lista de espera de "{evento.titulo}".')
+    else:
+        messages.info(request, 'No estabas en la lista de espera de este evento.')
     return redirect('detalle_evento', pk=evento.id)
 
 
@@ -74,8 +223,7 @@ def cancelar_inscripcion(request, evento_id):
     """
     evento = get_object_or_404(Evento, id=evento_id)
     
-    if request.user in evento.participantes.all():
-        evento.participantes.remove(request.user)
+    if evento.cancelar(request.user):
         messages.success(request, f'Has cancelado tu inscripción a "{evento.titulo}".')
     else:
         messages.info(request, 'No estabas inscrito en este evento.')
@@ -83,6 +231,185 @@ def cancelar_inscripcion(request, evento_id):
     return redirect('mis_eventos')
 
 
+def participantes_evento(request, pk):
+    """
+    Lista paginada de participantes de un evento (fragmento HTML que el detalle carga bajo demanda)
+    """
+    evento = get_object_or_404(Evento, pk=pk)
+    if not evento.es_visible_para(request.user):
+        raise PermissionDenied
+    
+    # Ordenar por id de usuario recorre el índice único (evento_id, user_id) sin ordenar en memoria
+    participantes = evento.participantes.select_related('perfil').order_by('pk')
+    paginator = Paginator(participantes, PARTICIPANTES_POR_PAGINA)
+    # El contador desnormalizado evita el COUNT(*) sobre la tabla intermedia
+    paginator.count = evento.inscritos
+    page_obj = paginator.get_page(request.GET.get('page'))
+    return render(request, 'eventos/participantes.html', {
+        'evento': evento,
+        'page_obj': page_obj,
+        'participantes': page_obj.object_list,
+    })
+
+
+@login_required
+def exportar_participantes(request, pk):
+    """
+    Descarga de los participantes de un evento (?formato=csv|json)
+    """
+    evento = get_object_or_404(Evento, pk=pk)
+    # Mismas reglas que para editar el evento
+    if not evento.es_editable_por(request.user):
+        messages.error(request, 'No tienes permisos para exportar los participantes de este evento.')
+        return redirect('acceso_denegado')
+    
+    return respuesta_exportacion(
+        f'participantes_evento_{evento.pk}', COLUMNAS_PARTICIPANTES,
+        filas_participantes([evento.pk]), request.GET.get('formato', 'csv')
+    )
+
+
+@staff_member_required
+def exportar_catalogo(request):
+    """
+    Descarga del catálogo completo de eventos (solo personal)
+    """
+    return respuesta_exportacion(
+        'catalogo_eventos', COLUMNAS_CATALOGO,
+        filas_catalogo(Evento.objects.all()), request.GET.get('formato', 'csv')
+    )
+
+
+def calendario_ics(request):
+    """
+    Suscripción iCalendar a los eventos públicos
+    """
+    return respuesta_feed(request, 'catalogo', 'Eventos', Evento.objects.visibles_para(AnonymousUser()),
+                          privado=False, version=version_catalogo())
+
+
+def mis_eventos_ics(request, token):
+    """
+    Suscripción iCalendar a los eventos del usuario, autenticada por el token firmado
+    de la URL (sin sesión: los clientes de calendario no envían cookies)
+    """
+    user_id = usuario_del_token(token)
+    if user_id is None:
+        raise Http404('Calendario no encontrado.')
+    # Un usuario desactivado deja de ver sus eventos en el feed
+    eventos = Evento.objects.filter(participantes__id=user_id, participantes__is_active=True)
+    # Las inscripciones de otros usuarios no cambian este feed: no se usa la versión del catálogo
+    version = f'{version_fechas()}:{version_usuario(user_id)}'
+    return respuesta_feed(request, f'mis-eventos:{user_id}', 'Mis eventos', eventos,
+                          privado=True, version=version)
+
+
+@login_required
+@require_POST
+def regenerar_calendario(request):
+    """
+    Cambia el enlace del feed personal: el anterior deja de funcionar
+    """
+    regenerar_secreto(request.user)
+    messages.success(request, 'Generamos un nuevo enlace de calendario. El anterior ya no funciona.')
+    return redirect('mis_eventos')
+
+
+def buscar_eventos(request):
+    """
+    Búsqueda de eventos por texto (JSON), con las mismas reglas de visibilidad que la lista
+    """
+    texto = request.GET.get('q', '')
+    if construir_consulta(texto) is None:
+        return JsonResponse({'resultados': []})
+    eventos = buscar(Evento.objects.visibles_para(request.user), texto)
+    resultados = [
+        {
+            'id': evento['id'],
+            'titulo': evento['titulo'],
+            'tipo': evento['tipo'],
+            'fecha_inicio': evento['fecha_inicio'],
+            'url': reverse('detalle_evento', kwargs={'pk': evento['id']}),
+        }
+        for evento in eventos.values('id', 'titulo', 'tipo', 'fecha_inicio')[:10]
+    ]
+    return JsonResponse({'resultados': resultados})
+
+
+def calendario(request, anio=None, mes=None):
+    """
+    Calendario mensual con los eventos visibles para el usuario
+    """
+    hoy = timezone.localdate()
+    if anio is None:
+        anio, mes = hoy.year, hoy.month
+    if not 1 <= mes <= 12 or not datetime.min.year < anio < datetime.max.year:
+        raise Http404('Mes inválido.')
+
+    semanas = calendar.Calendar().monthdatescalendar(anio, mes)
+    primero, ultimo = semanas[0][0], semanas[-1][-1]
+    eventos = (
+        Evento.objects.visibles_para(request.user)
+        .en_rango(inicio_del_dia(primero), inicio_del_dia(ultimo + timedelta(days=1)))
+        .values('id', 'titulo', 'tipo', 'fecha_inicio', 'fecha_fin')
+    )
+
+    # Cada evento aparece en todos los días visibles que abarca
+    por_dia = {}
+    for evento in eventos:
+        dia = max(timezone.localdate(evento['fecha_inicio']), primero)
+        # fecha_fin es exclusiva: un evento que termina a medianoche no ocupa el día siguiente
+        fin = max(evento['fecha_fin'] - timedelta(microseconds=1), evento['fecha_inicio'])
+        fin = min(timezone.localdate(fin), ultimo)
+        while dia <= fin:
+            por_dia.setdefault(dia, []).append(evento)
+            dia += timedelta(days=1)
+
+    def celda(dia):
+        del_dia = por_dia.get(dia, [])
+        return {
+            'fecha': dia,
+            'del_mes': dia.month == mes,
+            'hoy': dia == hoy,
+            'eventos': del_dia[:EVENTOS_POR_DIA_CALENDARIO],
+            'mas': max(len(del_dia) - EVENTOS_POR_DIA_CALENDARIO, 0),
+        }
+
+    anterior = (anio, mes - 1) if mes > 1 else (anio - 1, 12)
+    siguiente = (anio, mes + 1) if mes < 12 else (anio + 1, 1)
+    context = {
+        'mes': datetime(anio, mes, 1),
+        'semanas': [[celda(dia) for dia in semana] for semana in semanas],
+        'anterior': anterior,
+        'siguiente': siguiente,
+    }
+    return render(request, 'eventos/calendario.html', context)
+
+
+def historial(request):
+    """
+    Eventos archivados visibles para el usuario (solo lectura)
+    """
+    return _historial(request, EventoArchivado.objects.visibles_para(request.user), 'Historial de eventos')
+
+
+@login_required
+def mis_eventos_historial(request):
+    """
+    Eventos archivados en los que el usuario estuvo inscrito
+    """
+    return _historial(request, request.user.eventos_archivados.all(), 'Mi historial de eventos')
+
+
+def _historial(request, queryset, titulo):
+    # Sin COUNT(*): el archivo crece sin límite y solo se recorre hacia atrás
+    paginador = PaginadorCursor(queryset, EVENTOS_POR_PAGINA_HISTORIAL, contar_total=False)
+    return render(request, 'eventos/historial.html', {
+        'titulo': titulo,
+        'page_obj': paginador.page(request.GET.get('cursor')),
+    })
+
+
 def acceso_denegado(request):
     """
     Página de acceso denegado
@@ -92,7 +419,84 @@ def acceso_denegado(request):
 
 # ========== Vistas basadas en clases ==========
 
-class ListaEventosView(ListView):
+def _estado_visitante(user):
+    """
+    Lo que cambia el HTML según quién mira la página (barra de navegación y permisos)
+    """
+    if not user.is_authenticated:
+        return ('anonimo',)
+    return (user.pk, user.username, user.perfil.rol, user.is_staff, ve_eventos_privados(user))
+
+
+def marca_minuto():
+    return timezone.now().strftime('%Y%m%d%H%M')
+
+
+def etag_lista(version, user):
+    """
+    ETag de la lista de eventos, compartido con la vista asíncrona. La versión
+    del catálogo cambia al guardar o eliminar eventos y con cada inscripción;
+    el minuto en curso, porque próximos y pasados dependen de la hora.
+    """
+    return etag_para('lista', version, marca_minuto(), *_estado_visitante(user))
+
+
+def etag_detalle(evento, user, esta_inscrito, posicion_espera):
+    """
+    ETag del detalle de un evento, compartido con la vista asíncrona
+    """
+    return etag_para(
+        'detalle', evento.pk, evento.fecha_actualizacion.timestamp(), evento.inscritos,
+        esta_inscrito, posicion_espera, *_estado_visitante(user)
+    )
+
+
+def respuesta_no_modificada(request, etag, last_modified):
+    """
+    Retorna la respuesta 304 (o 412) si el navegador ya tiene esta versión, o None
+    """
+    # Con mensajes pendientes la página debe renderizarse para mostrarlos
+    if len(messages.get_messages(request)):
+        return None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    respuesta = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if respuesta is not None:
+        marcar_respuesta(respuesta)
+    return respuesta
+
+
+def marcar_respuesta(respuesta, etag=None, last_modified=None):
+    if etag:
+        respuesta.headers.setdefault('ETag', etag)
+    if last_modified:
+        respuesta.headers.setdefault('Last-Modified', http_date(int(last_modified.timestamp())))
+    # El contenido depende del usuario: cada navegador revalida su propia copia
+    patch_cache_control(respuesta, private=True, no_cache=True)
+    patch_vary_headers(respuesta, ['Cookie'])
+    return respuesta
+
+
+class RespuestaCondicionalMixin:
+    """
+    GET condicional: si el ETag o la fecha de modificación coinciden con los
+    del navegador se responde 304 sin consultar la lista ni renderizar plantillas
+    """
+    def get_etag(self):
+        return None
+    
+    def get_last_modified(self):
+        return None
+    
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag()
+        last_modified = self.get_last_modified()
+        respuesta = respuesta_no_modificada(request, etag, last_modified)
+        if respuesta is None:
+            respuesta = marcar_respuesta(super().get(request, *args, **kwargs), etag, last_modified)
+        return respuesta
+
+
+class ListaEventosView(RespuestaCondicionalMixin, ListView):
     """
     Lista de todos los eventos (filtra según permisos)
     """
@@ -100,25 +504,79 @@ class ListaEventosView(ListView):
     template_name = 'eventos/lista_eventos.html'
     context_object_name = 'eventos'
     paginate_by = 9
+    # Paginación por cursor (opcional): se activa aquí o al recibir ?cursor=
+    paginacion_cursor = False
+    # En modo cursor, permite omitir el COUNT(*) del total de eventos
+    contar_total = True
+    
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        self.cuando, self.desde, self.hasta = leer_filtro_fechas(request.GET)
+        # duracion_maxima() ya calculada (la vista asíncrona la obtiene con await)
+        self.duracion = None
     
     def get_queryset(self):
-        queryset = Evento.objects.all()
-        
-        if not self.request.user.is_authenticated:
-            # Solo eventos públicos para no autenticados
-            return queryset.filter(privacidad='publico')
-        
-        # Administradores y organizadores ven todo
-        if self.request.user.perfil.rol in ['administrador', 'organizador']:
-            return queryset
-        
-        # Asistentes ven públicos y donde están inscritos
-        return queryset.filter(
-            Q(privacidad='publico') | Q(participantes=self.request.user)
-        ).distinct()
+        queryset = self.filtrar_fechas(Evento.objects.visibles_para(self.request.user))
+        return buscar(queryset.para_tarjetas(self.request.user), self.request.GET.get('q'))
+    
+    def filtrar_fechas(self, queryset):
+        if self.desde is not None:
+            hasta = inicio_del_dia(self.hasta + timedelta(days=1))
+            return queryset.en_rango(inicio_del_dia(self.desde), hasta, self.duracion)
+        if self.cuando == 'proximos':
+            return queryset.proximos(duracion=self.duracion)
+        if self.cuando == 'pasados':
+            return queryset.pasados()
+        return queryset
+    
+    def ascendente(self):
+        # Lo que está por venir se lista del más cercano al más lejano
+        return self.cuando in ('proximos', 'fin_de_semana', 'rango')
+    
+    def usa_cursor(self):
+        # Con búsqueda el orden es por relevancia, que no admite cursor por fecha
+        if self.request.GET.get('q'):
+            return False
+        return self.paginacion_cursor or 'cursor' in self.request.GET
+    
+    def paginate_queryset(self, queryset, page_size):
+        if not self.usa_cursor():
+            return super().paginate_queryset(queryset, page_size)
+        paginator = PaginadorCursor(queryset, page_size, contar_total=self.contar_total,
+                                    ascendente=self.ascendente())
+        page = paginator.page(self.request.GET.get('cursor'))
+        return (paginator, page, page.object_list, page.has_other_pages())
+    
+    def get_etag(self):
+        return etag_lista(version_catalogo(), self.request.user)
+    
+    def get_template_names(self):
+        # Las peticiones de scroll infinito solo necesitan las tarjetas
+        if self.request.GET.get('parcial'):
+            return ['eventos/tarjetas_eventos.html']
+        return super().get_template_names()
+    
+    def contexto_filtros(self):
+        parametros = self.request.GET.copy()
+        for nombre in ('page', 'cursor', 'parcial'):
+            parametros.pop(nombre, None)
+        return {
+            'paginacion_cursor': self.usa_cursor(),
+            'q': self.request.GET.get('q', ''),
+            'cuando': self.cuando,
+            'desde': self.desde,
+            'hasta': self.hasta,
+            # Parámetros que conservan los enlaces de paginación
+            'filtros': parametros.urlencode(),
+        }
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(self.contexto_filtros())
+        return context
 
 
-class DetalleEventoView(DetailView):
+class DetalleEventoView(RespuestaCondicionalMixin, DetailView):
     """
     Detalle de un evento
     """
@@ -126,6 +584,15 @@ class DetalleEventoView(DetailView):
     template_name = 'eventos/detalle_evento.html'
     context_object_name = 'evento'
     
+    def get_queryset(self):
+        return Evento.objects.select_related('creador__perfil')
+    
+    def get_object(self, queryset=None):
+        # dispatch ya cargó el evento; get() lo reutiliza en lugar de consultarlo otra vez
+        if getattr(self, 'object', None) is None:
+            self.object = super().get_object(queryset)
+        return self.object
+    
     def dispatch(self, request, *args, **kwargs):
         evento = self.get_object()
         
@@ -135,20 +602,39 @@ class DetalleEventoView(DetailView):
                 messages.error(request, 'Debes iniciar sesión para ver este evento.')
                 return redirect('login')
             
-            # Verificar si tiene permiso o está inscrito
-            if not (request.user.has_perm('eventos.puede_ver_eventos_privados') or 
-                    request.user in evento.participantes.all() or
-                    request.user == evento.creador):
+            # Verificar si tiene permiso, es el creador o está inscrito
+            if not evento.es_visible_para(request.user):
                 messages.error(request, 'No tienes permiso para ver este evento privado.')
                 return redirect('acceso_denegado')
         
         return super().dispatch(request, *args, **kwargs)
     
+    def esta_inscrito(self):
+        if not hasattr(self, '_esta_inscrito'):
+            user = self.request.user
+            self._esta_inscrito = user.is_authenticated and self.object.participantes.filter(pk=user.pk).exists()
+        return self._esta_inscrito
+    
+    def posicion_espera(self):
+        if not hasattr(self, '_posicion_espera'):
+            self._posicion_espera = None
+            if not self.esta_inscrito() and self.object.esta_lleno():
+                self._posicion_espera = self.object.posicion_en_espera(self.request.user)
+        return self._posicion_espera
+    
+    def get_etag(self):
+        return etag_detalle(self.object, self.request.user, self.esta_inscrito(), self.posicion_espera())
+    
+    def get_last_modified(self):
+        # Las inscripciones también actualizan fecha_actualizacion (ver Evento.inscribir)
+        return self.object.fecha_actualizacion
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         if self.request.user.is_authenticated:
-            context['esta_inscrito'] = self.request.user in self.object.participantes.all()
-            context['es_creador'] = self.request.user == self.object.creador
+            context['esta_inscrito'] = self.esta_inscrito()
+            context['posicion_espera'] = self.posicion_espera()
+            context['es_creador'] = self.request.user.pk == self.object.creador_id
         return context
 
 
@@ -182,16 +668,20 @@ class EditarEventoView(LoginRequiredMixin, PermissionRequiredMixin, UserPassesTe
     permission_required = 'eventos.change_evento'
     
     def test_func(self):
-        evento = self.get_object()
-        user = self.request.user
         # Solo el creador, organizadores y administradores pueden editar
-        return (user == evento.creador or 
-                user.perfil.rol in ['administrador', 'organizador'])
+        return self.get_object().es_editable_por(self.request.user)
     
     def handle_no_permission(self):
         messages.error(self.request, 'No tienes permisos para editar este evento.')
         return redirect('acceso_denegado')
     
+    def form_valid(self, form):
+        # Si aumentó la capacidad, los cupos nuevos pasan a la lista de espera en la misma transacción
+        with transaction.atomic():
+            respuesta = super().form_valid(form)
+            self.object.promover_lista_espera()
+        return respuesta
+    
     def get_success_url(self):
         messages.success(self.request, 'Evento actualizado exitosamente.')
         return reverse_lazy('detalle_evento', kwargs={'pk': self.object.pk})
@@ -0,0 +1,142 @@
+"""
+Versiones asíncronas de las vistas de lectura más usadas, para servir con ASGI.
+
+Usan el ORM asíncrono (aiterator, acount, aget) y materializan todos los datos
+antes de renderizar, de modo que las plantillas no consultan la base de datos.
+El middleware de acceso deja `request.user` resuelto con su perfil y permisos.
+Se activan con VISTAS_ASYNC (ver asgi.py); bajo WSGI se usan las de views.py.
+"""
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404, HttpResponse
+from django.shortcuts import aget_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.views import View
+
+from . import views
+from .cache import aversion_catalogo, clave_inicio_anonimo, registrar, timeout as cache_timeout
+from .icalendario import aurl_feed_personal
+from .models import Evento, aduracion_maxima
+from .paginacion import PaginadorCursor
+
+
+async def _listar(queryset):
+    return [objeto async for objeto in queryset.aiterator()]
+
+
+async def inicio(request):
+    """
+    Página de inicio - muestra eventos públicos
+    """
+    user = request.user
+    if not user.is_authenticated and not len(messages.get_messages(request)):
+        clave = clave_inicio_anonimo(await aversion_catalogo())
+        html = await cache.aget(clave)
+        registrar('inicio', acierto=html is not None)
+        if html is None:
+            html = render_to_string('eventos/inicio.html', await _contexto_inicio(user), request)
+            await cache.aset(clave, html, cache_timeout())
+        return HttpResponse(html)
+
+    return render(request, 'eventos/inicio.html', await _contexto_inicio(user))
+
+
+async def _contexto_inicio(user):
+    eventos = Evento.objects.visibles_para(user).para_tarjetas(user)[:6]
+    context = {'eventos': await _listar(eventos)}
+    if user.is_authenticated:
+        context['total_inscritos'] = await user.eventos_inscritos.acount()
+        context['total_creados'] = await user.eventos_creados.acount()
+    return context
+
+
+@login_required
+async def mis_eventos(request):
+    """
+    Eventos donde el usuario está inscrito
+    """
+    eventos_inscritos = request.user.eventos_inscritos.para_tarjetas(request.user)
+    return render(request, 'eventos/mis_eventos.html', {
+        'eventos': await _listar(eventos_inscritos),
+        'url_calendario': await aurl_feed_personal(request.user),
+    })
+
+
+class ListaEventosView(views.ListaEventosView):
+    """
+    Lista de eventos (asíncrona). Reutiliza la consulta, la plantilla y las
+    reglas de paginación de la versión síncrona.
+    """
+    async def get(self, request, *args, **kwargs):
+        etag = views.etag_lista(await aversion_catalogo(), request.user)
+        respuesta = views.respuesta_no_modificada(request, etag, None)
+        if respuesta is not None:
+            return respuesta
+
+        if self.cuando in ('proximos', 'fin_de_semana', 'rango'):
+            self.duracion = await aduracion_maxima()
+        queryset = self.get_queryset()
+        if self.usa_cursor():
+            paginator = PaginadorCursor(queryset, self.paginate_by, contar_total=self.contar_total,
+                                        ascendente=self.ascendente())
+            page = await paginator.apage(request.GET.get('cursor'))
+        else:
+            paginator = Paginator(queryset, self.paginate_by)
+            paginator.count = await queryset.acount()
+            try:
+                page = paginator.page(request.GET.get(self.page_kwarg) or 1)
+            except InvalidPage:
+                raise Http404('Página inválida.')
+            page.object_list = await _listar(page.object_list)
+
+        self.object_list = page.object_list
+        context = {
+            'view': self,
+            'paginator': paginator,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'object_list': page.object_list,
+            'eventos': page.object_list,
+            **self.contexto_filtros(),
+        }
+        return views.marcar_respuesta(render(request, self.get_template_names(), context), etag)
+
+
+class DetalleEventoView(View):
+    """
+    Detalle de un evento (asíncrona). El evento se consulta una sola vez.
+    """
+    template_name = 'eventos/detalle_evento.html'
+
+    async def get(self, request, pk):
+        user = request.user
+        evento = await aget_object_or_404(Evento.objects.select_related('creador__perfil'), pk=pk)
+
+        # Verificar acceso a eventos privados
+        if evento.privacidad == 'privado':
+            if not user.is_authenticated:
+                messages.error(request, 'Debes iniciar sesión para ver este evento.')
+                return redirect('login')
+            if not await evento.aes_visible_para(user):
+                messages.error(request, 'No tienes permiso para ver este evento privado.')
+                return redirect('acceso_denegado')
+
+        esta_inscrito = user.is_authenticated and await evento.participantes.filter(pk=user.pk).aexists()
+        posicion_espera = None
+        if not esta_inscrito and evento.esta_lleno():
+            posicion_espera = await evento.aposicion_en_espera(user)
+
+        etag = views.etag_detalle(evento, user, esta_inscrito, posicion_espera)
+        respuesta = views.respuesta_no_modificada(request, etag, evento.fecha_actualizacion)
+        if respuesta is not None:
+            return respuesta
+
+        context = {'evento': evento, 'object': evento}
+        if user.is_authenticated:
+            context['esta_inscrito'] = esta_inscrito
+            context['es_creador'] = user.pk == evento.creador_id
+            context['posicion_espera'] = posicion_espera
+        respuesta = render(request, self.template_name, context)
+        return views.marcar_respuesta(respuesta, etag, evento.fecha_actualizacion)
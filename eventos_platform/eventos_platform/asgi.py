@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eventos_platform.settings')
+# Bajo ASGI las vistas de lectura usan el ORM asíncrono (ver eventos/vistas_async.py)
+os.environ.setdefault('EVENTOS_VISTAS_ASYNC', '1')
+# Las conexiones persistentes no se reutilizan de forma fiable entre peticiones asíncronas
+os.environ.setdefault('EVENTOS_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
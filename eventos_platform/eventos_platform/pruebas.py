@@ -0,0 +1,33 @@
+"""
+Ejecutor de `manage.py test`.
+
+Las cachés en disco (FileBasedCache, p. ej. 'versiones' sin Redis) se apuntan a
+un directorio temporal propio de la ejecución, que se borra al terminar: las
+pruebas no leen ni dejan claves en el directorio del servidor de desarrollo.
+"""
+import os
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+EN_DISCO = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+class EjecutorPruebas(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._directorio = tempfile.TemporaryDirectory(prefix='eventos-platform-pruebas-')
+        configuracion = {
+            alias: {**conf, 'LOCATION': os.path.join(self._directorio.name, alias)}
+            if conf['BACKEND'] == EN_DISCO else conf
+            for alias, conf in settings.CACHES.items()
+        }
+        self._caches = override_settings(CACHES=configuracion)
+        self._caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._caches.disable()
+        self._directorio.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,11 +43,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'eventos.middleware.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.AccesoUsuarioMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -55,7 +58,8 @@ ROOT_URLCONF = 'eventos_platform.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que además mide el tiempo de render (eventos/metricas.py)
+        'BACKEND': 'eventos.metricas.PlantillasMedidas',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -78,9 +82,125 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Conexiones persistentes: no se reabre la base ni se repiten los PRAGMA en cada
+        # petición. asgi.py las desactiva (en ASGI cada petición puede usar otro hilo)
+        'CONN_MAX_AGE': int(os.environ.get('EVENTOS_CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Las transacciones (atomic) piden el bloqueo de escritura al empezar y esperan
+            # su turno, en lugar de fallar al pasar de lectura a escritura
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# PRAGMA aplicados a cada conexión SQLite nueva (ver eventos/basedatos.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,       # milisegundos
+    'cache_size': -20000,       # KiB por conexión
+    'mmap_size': 134217728,     # 128 MiB
+    'temp_store': 'MEMORY',
+}
+
+# EVENTOS_SQLITE_CONCURRENTE=0 vuelve a la configuración por defecto de Django
+# (usado por benchmark_escrituras para comparar)
+if os.environ.get('EVENTOS_SQLITE_CONCURRENTE', '1') == '0':
+    DATABASES['default'].update(CONN_MAX_AGE=0, OPTIONS={})
+    SQLITE_PRAGMAS = {}
+
+
+# Caché
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# La caché en memoria es de cada proceso: las invalidaciones (permisos, versión del
+# catálogo, fragmentos) solo llegan al proceso que las hace. Con varios workers hay
+# que usar un backend compartido: EVENTOS_REDIS_URL=redis://host:6379/0 (requiere
+# el paquete redis).
+
+# La caché 'versiones' guarda la versión del catálogo de la que dependen los ETag y
+# la página de inicio cacheada: sin Redis es un directorio que comparten los procesos
+# del mismo servidor (EVENTOS_CACHE_VERSIONES, por defecto cache/versiones junto a
+# manage.py). `manage.py test` usa un directorio temporal propio (ver pruebas.py).
+# Solo guarda un par de claves globales, muy por debajo de MAX_ENTRIES (300 por
+# defecto; al superarlo FileBasedCache descarta claves al azar). Las claves por
+# usuario (versión y secreto del feed iCalendar) van a la caché 'usuarios', que
+# puede descartarlas sin más costo que regenerar un feed o releer un secreto.
+
+if os.environ.get('EVENTOS_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['EVENTOS_REDIS_URL'],
+            'KEY_PREFIX': 'eventos-platform',
+        },
+        'versiones': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['EVENTOS_REDIS_URL'],
+            'KEY_PREFIX': 'eventos-platform-versiones',
+        },
+        'usuarios': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['EVENTOS_REDIS_URL'],
+            'KEY_PREFIX': 'eventos-platform-usuarios',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'eventos-platform',
+        },
+        'versiones': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('EVENTOS_CACHE_VERSIONES', BASE_DIR / 'cache' / 'versiones'),
+        },
+        'usuarios': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('EVENTOS_CACHE_USUARIOS', BASE_DIR / 'cache' / 'usuarios'),
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        },
+    }
+
+TEST_RUNNER = 'eventos_platform.pruebas.EjecutorPruebas'
+
+# Segundos que se mantienen en caché el rol y los permisos de cada usuario
+ACCESO_CACHE_TIMEOUT = 300
+
+# Segundos que se mantienen los fragmentos renderizados (tarjetas e inicio anónimo)
+FRAGMENTOS_CACHE_TIMEOUT = 600
+
+# Vistas de lectura asíncronas (eventos/vistas_async.py). asgi.py las activa por defecto
+VISTAS_ASYNC = os.environ.get('EVENTOS_VISTAS_ASYNC', '0') == '1'
+
+# Inscripción en un evento que se superpone con otro del usuario: 'advertir' o 'bloquear'
+CONFLICTOS_INSCRIPCION = 'advertir'
+
+# Duración máxima de un evento al crearlo o editarlo. Acota cuánto retroceden las
+# búsquedas por intervalo (ver eventos.models.duracion_maxima)
+DURACION_MAXIMA_EVENTO_DIAS = 31
+
+# Los eventos terminados hace más de estos días pasan al archivo (manage.py archivar_eventos)
+ARCHIVO_ANTIGUEDAD_DIAS = 365
+
+# Métricas por vista en /metrics/ (formato Prometheus). Además del personal, puede
+# leerlas quien envíe "Authorization: Bearer <EVENTOS_METRICAS_TOKEN>"
+METRICAS_ACTIVAS = os.environ.get('EVENTOS_METRICAS', '1') == '1'
+METRICAS_TOKEN = os.environ.get('EVENTOS_METRICAS_TOKEN', '')
+# Registra en el logger 'eventos.metricas' las consultas que tarden más (None = nunca)
+METRICAS_CONSULTA_LENTA_MS = None
+
+# Correo: en desarrollo se imprime en consola; en producción EVENTOS_EMAIL_BACKEND
+# apunta al backend SMTP (django.core.mail.backends.smtp.EmailBackend)
+EMAIL_BACKEND = os.environ.get('EVENTOS_EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.environ.get('EVENTOS_EMAIL_REMITENTE', 'eventos@localhost')
+
+# Cola de tareas (eventos/tareas.py, manage.py procesar_tareas)
+TAREAS_MAX_INTENTOS = 5
+TAREAS_REINTENTO_SEGUNDOS = 30  # Espera antes del primer reintento; se duplica en cada uno
+TAREAS_BLOQUEO = 300  # Segundos que una tarea reclamada queda reservada a su trabajador
+TAREAS_RECORDATORIO_HORAS = 24  # Antelación del recordatorio a los inscritos
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators